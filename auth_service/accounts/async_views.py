@@ -0,0 +1,169 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .authentication import CachedJWTAuthentication
+from .conditional import conditional_response
+from .hashing import PoolSaturated, get_hashing_pool
+from .models import Connections, CustomUser, Profile
+from .pagination import KeysetPagination
+from .presence import presence_store
+from .profiles import host_variant, profile_cache
+from .serializers import ConnectionsSerializer, ContactReadSerializer, ProfileReadSerializer
+from .tokens import RefreshToken
+
+authenticator = CachedJWTAuthentication()
+
+
+def verify_password(password, encoded):
+    """Проверить пароль; для несуществующего пользователя хэшируем впустую, чтобы время ответа не отличалось"""
+    if encoded is None:
+        make_password(password)
+        return False
+    return check_password(password, encoded)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """Асинхронная авторизация: хэширование пароля идет в ограниченном пуле потоков"""
+
+    async def post(self, request, *args, **kwargs):
+        """Обработка POST запроса для авторизации"""
+        try:
+            data = json.loads(request.body)
+            username = data['username']
+            password = data['password']
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({"detail": "username and password are required."}, status=400)
+
+        user = await CustomUser.objects.filter(username=username).afirst()
+        try:
+            valid = await get_hashing_pool().run(verify_password, password, user.password if user else None)
+        except PoolSaturated:
+            response = JsonResponse({"detail": "Login is temporarily overloaded, retry later."}, status=503)
+            response['Retry-After'] = str(settings.LOGIN_RETRY_AFTER)
+            return response
+
+        if not (valid and user.is_active):
+            return JsonResponse(
+                {"non_field_errors": ["Неверные учетные данные или учетная запись не активна."]}, status=400
+            )
+
+        # Генерация JWT токенов для пользователя
+        refresh = await sync_to_async(RefreshToken.for_user)(user)
+        return JsonResponse({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        })
+
+
+@sync_to_async
+def create_connection(from_user, to_user):
+    # atomic в async ORM нет, а savepoint нужен, чтобы IntegrityError не ломал внешнюю транзакцию
+    with transaction.atomic():
+        return Connections.objects.create(from_user=from_user, to_user=to_user)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncJWTView(View):
+    """
+    Основа async-представлений: JWT-аутентификация без перехода в поток
+    (пользователь из кэша, см. CachedJWTAuthentication.aauthenticate).
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            auth = await authenticator.aauthenticate(request)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, dict) else {"detail": e.detail}
+            return JsonResponse(detail, status=401)
+        if auth is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        request.user = auth[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncContactsView(AsyncJWTView):
+    """Async-версия ContactManagementView на async ORM"""
+
+    async def get(self, request, *args, **kwargs):
+        """Получить страницу подтвержденных контактов (?cursor=...&limit=...)"""
+        user = request.user
+        confirmed_connections = ContactReadSerializer.get_queryset(Connections.objects.filter(
+            Q(from_user=user) | Q(to_user=user),
+            is_confirmed=True
+        ))
+
+        # Пагинатор и сериализатор ждут DRF Request, пользователь уже определен выше
+        drf_request = Request(request)
+        drf_request.user = request.user
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(confirmed_connections, drf_request)
+        serializer = ContactReadSerializer(page, many=True, context={'request': drf_request})
+        data = {'next': paginator.get_next_link(), 'results': serializer.data}
+        return conditional_response(request, JsonResponse(data, encoder=DjangoJSONEncoder))
+
+    async def post(self, request, *args, **kwargs):
+        """Отправить запрос на добавление в контакты"""
+        try:
+            to_user_id = json.loads(request.body).get('to_user_id')
+            to_user = await CustomUser.objects.aget(id=to_user_id)
+        except (ValueError, AttributeError, CustomUser.DoesNotExist):
+            return JsonResponse({"detail": "User not found"}, status=404)
+
+        # Повторный запрос отсекает ограничение unique_connection
+        try:
+            connection = await create_connection(request.user, to_user)
+        except IntegrityError:
+            return JsonResponse({"detail": "Request already sent"}, status=400)
+        return JsonResponse(ConnectionsSerializer(connection).data, status=201)
+
+    async def patch(self, request, *args, **kwargs):
+        """Подтвердить запрос на добавление в контакты"""
+        try:
+            connection = await Connections.objects.aget(id=kwargs.get('pk'), to_user=request.user, is_confirmed=False)
+        except Connections.DoesNotExist:
+            return JsonResponse({"detail": "Request not found or already confirmed"}, status=404)
+
+        connection.is_confirmed = True
+        await connection.asave()
+        return JsonResponse(ConnectionsSerializer(connection).data)
+
+    async def delete(self, request, *args, **kwargs):
+        """Удалить контакт или отклонить запрос"""
+        try:
+            connection = await Connections.objects.aget(id=kwargs.get('pk'))
+        except Connections.DoesNotExist:
+            return JsonResponse({"detail": "Connection not found"}, status=404)
+        if request.user.pk not in (connection.to_user_id, connection.from_user_id):
+            return JsonResponse({"detail": "Not allowed"}, status=403)
+
+        await connection.adelete()
+        return HttpResponse(status=204)
+
+
+class AsyncProfileView(AsyncJWTView):
+    """Async-версия ProfileDetailView: тот же кэш профилей, ETag/Last-Modified и 304"""
+
+    async def get(self, request, *args, **kwargs):
+        user_id = request.user.pk
+
+        async def build():
+            row = await ProfileReadSerializer.get_queryset(Profile.objects.filter(user_id=user_id)).aget()
+            return ProfileReadSerializer(row, context={'request': request}).data
+
+        data, modified = await profile_cache.aget(user_id, host_variant(request, 'detail'), build)
+        data = {**data, 'is_online': await presence_store.ais_online(user_id)}
+        return conditional_response(request, JsonResponse(data, encoder=DjangoJSONEncoder), last_modified=modified)
@@ -0,0 +1,131 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import LRUCache
+from .models import CustomUser
+
+
+class UserCache:
+    """
+    Поля пользователей по id из токена в LRU процесса. Запись помечена версией
+    пользователя из общего кэша AUTH_USER_CACHE, сброс (см. accounts.signals)
+    меняет версию — изменение, например деактивацию при удалении аккаунта, все
+    воркеры видят на следующем запросе. Проверка — один GET версии, без базы.
+    """
+    version_prefix = 'auth_user:version:'
+
+    def __init__(self):
+        self.local = LRUCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL.total_seconds(),
+                              name='auth_user')
+
+    @property
+    def cache(self):
+        return caches[settings.AUTH_USER_CACHE]
+
+    def version(self, user_id):
+        key = f'{self.version_prefix}{user_id}'
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key) or time.time_ns()
+        return version
+
+    async def aversion(self, user_id):
+        key = f'{self.version_prefix}{user_id}'
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+            version = await self.cache.aget(key) or time.time_ns()
+        return version
+
+    def get(self, user_id, version):
+        """Поля пользователя, если они закэшированы для этой версии, иначе None"""
+        item = self.local.get(str(user_id))
+        return item[1] if item is not None and item[0] == version else None
+
+    def set(self, user_id, version, values):
+        # Версия прочитана до загрузки из базы: если сброс успел раньше записи, следующий запрос перечитает
+        self.local.set(str(user_id), (version, values))
+
+    def invalidate(self, *user_ids):
+        version = time.time_ns()
+        self.cache.set_many({f'{self.version_prefix}{user_id}': version for user_id in user_ids}, timeout=None)
+        for user_id in user_ids:
+            self.local.delete(str(user_id))
+
+    def clear(self):
+        self.local.clear()
+
+
+user_cache = UserCache()
+
+
+def _user_fields():
+    return [field.attname for field in CustomUser._meta.concrete_fields]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без SELECT пользователя на каждый запрос.
+    Пользователь собирается из user_id токена и закэшированных полей,
+    в базу идем только при промахе кэша.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        version = user_cache.version(user_id)
+        values = user_cache.get(user_id, version)
+        if values is None:
+            return self.load_user(validated_token, version)
+        return self.user_from_cache(values, validated_token)
+
+    async def aget_user(self, validated_token):
+        """get_user для async-представлений: в поток уходим только при промахе кэша"""
+        user_id = self.get_user_id(validated_token)
+        version = await user_cache.aversion(user_id)
+        values = user_cache.get(user_id, version)
+        if values is None:
+            return await sync_to_async(self.load_user)(validated_token, version)
+        return self.user_from_cache(values, validated_token)
+
+    async def aauthenticate(self, request):
+        """authenticate для async-представлений (вне DRF), вернуть (user, token) или None"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def load_user(self, validated_token, version):
+        user = super().get_user(validated_token)
+        user_cache.set(user.pk, version, [getattr(user, name) for name in _user_fields()])
+        return user
+
+    def user_from_cache(self, values, validated_token):
+        user = CustomUser.from_db(None, _user_fields(), values)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
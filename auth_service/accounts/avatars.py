@@ -0,0 +1,128 @@
+import hashlib
+import io
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# avatars/<2 символа хэша>/<sha256>[_<размер>].<расширение>
+AVATAR_NAME = re.compile(r'^avatars/(?P<prefix>[0-9a-f]{2})/(?P<sha>[0-9a-f]{64})(?:_(?P<size>\d+))?\.(?P<ext>\w+)$')
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.AVATAR_WORKERS, thread_name_prefix='avatars')
+    return _executor
+
+
+def avatar_name(sha, ext, size=None):
+    suffix = f'_{size}' if size else ''
+    return f'avatars/{sha[:2]}/{sha}{suffix}.{ext}'
+
+
+def content_hash(upload):
+    """sha256 файла, читаем по частям, не загружая его в память целиком"""
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def save_once(name, content):
+    """
+    Сохранить файл, если его еще нет, и вернуть имя, под которым он лежит в хранилище.
+    Если тот же файл параллельно записал другой воркер, storage.save() выберет
+    свободное имя — копию удаляем: содержимое по хэшу то же самое.
+    """
+    if default_storage.exists(name):
+        return name
+    saved = default_storage.save(name, content)
+    if saved != name and default_storage.exists(name):
+        default_storage.delete(saved)
+        return name
+    return saved
+
+
+def store_avatar(upload):
+    """
+    Сохранить загруженный аватар под именем по хэшу содержимого и вернуть это имя.
+    Одинаковые файлы хранятся один раз; миниатюры строятся в фоновом пуле.
+    """
+    if upload.size > settings.AVATAR_MAX_SIZE:
+        raise ValidationError(f"Avatar must be smaller than {settings.AVATAR_MAX_SIZE} bytes.")
+    try:
+        with Image.open(upload) as image:
+            image_format = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError) as e:
+        raise ValidationError("Upload a valid image.") from e
+    if image_format not in EXTENSIONS:
+        raise ValidationError(f"Unsupported image format: {image_format}.")
+    upload.seek(0)
+
+    name = save_once(avatar_name(content_hash(upload), EXTENSIONS[image_format]), upload)
+    # Миниатюры только для имени по хэшу: иначе avatar_url отдает оригинал
+    if AVATAR_NAME.match(name):
+        get_executor().submit(generate_thumbnails, name)
+    return name
+
+
+def generate_thumbnails(name):
+    # Исключение в пуле потоков иначе осталось бы в Future незамеченным
+    for size in settings.AVATAR_THUMBNAIL_SIZES:
+        try:
+            ensure_thumbnail(name, size)
+        except Exception:
+            logger.exception("Failed to generate %spx thumbnail for %s", size, name)
+
+
+def ensure_thumbnail(name, size):
+    """Построить миниатюру, если ее еще нет, вернуть ее имя"""
+    match = AVATAR_NAME.match(name)
+    thumbnail = avatar_name(match['sha'], match['ext'], size)
+    if default_storage.exists(thumbnail):
+        return thumbnail
+
+    with default_storage.open(name) as f, Image.open(f) as image:
+        image_format = image.format
+        image.thumbnail((size, size))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format)
+    # Параллельная генерация той же миниатюры уже могла успеть ее записать
+    return save_once(thumbnail, ContentFile(buffer.getvalue()))
+
+
+def avatar_url(name, size=None):
+    """URL аватара или его миниатюры; старые аватары без хэша в имени отдаются как есть"""
+    if not name:
+        return None
+    match = AVATAR_NAME.match(name)
+    if size and match and not match['size']:
+        name = avatar_name(match['sha'], match['ext'], size)
+    return default_storage.url(name)
+
+
+def avatar_urls(name):
+    if not name:
+        return None
+    urls = {str(size): avatar_url(name, size) for size in settings.AVATAR_THUMBNAIL_SIZES}
+    urls['original'] = avatar_url(name)
+    return urls
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+@lru_cache(maxsize=None)
+def cache_metrics_hook():
+    return import_string(settings.CACHE_METRICS_HOOK) if settings.CACHE_METRICS_HOOK else None
+
+
+@receiver(setting_changed)
+def reset_cache_metrics_hook(setting, **kwargs):
+    if setting == 'CACHE_METRICS_HOOK':
+        cache_metrics_hook.cache_clear()
+
+
+def record_cache(name, hits=0, misses=0):
+    """Сообщить об обращениях к кэшу в CACHE_METRICS_HOOK: приложение не зависит от модуля метрик"""
+    hook = cache_metrics_hook()
+    if hook is not None:
+        hook(name, hits=hits, misses=misses)
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш в памяти процесса.
+    Хранит не более maxsize записей, каждая живет не дольше ttl секунд.
+    Если задано name, попадания и промахи учитываются в метриках под этим именем.
+    """
+    def __init__(self, maxsize, ttl, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] <= time.monotonic():
+                del self._data[key]
+                item = None
+            if item is not None:
+                self._data.move_to_end(key)
+        if self.name:
+            record_cache(self.name, hits=int(item is not None), misses=int(item is None))
+        return default if item is None else item[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
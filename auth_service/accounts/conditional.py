@@ -0,0 +1,35 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(data):
+    """ETag по содержимому ответа"""
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    return quote_etag(hashlib.md5(payload).hexdigest())
+
+
+def conditional_response(request, response, etag=None, last_modified=None):
+    """
+    Проставить ETag/Last-Modified и вернуть 304, если у клиента актуальная версия
+    (If-None-Match / If-Modified-Since). last_modified — datetime. response —
+    Response DRF или уже отрендеренный JsonResponse async-представлений.
+    """
+    if etag is None:
+        if isinstance(response, Response):
+            etag = make_etag(response.data)
+        else:
+            etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED) if isinstance(response, Response) else not_modified
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
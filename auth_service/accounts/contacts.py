@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .graph import contact_graph
+from .models import Connections, CustomUser
+from .outbox import emit_many
+
+OPERATIONS = ('send', 'confirm', 'delete')
+
+
+def apply_contact_operations(user, operations):
+    """
+    Выполнить пачку операций с контактами в одной транзакции.
+
+    operations — список {"op": "send", "to_user_id": id} / {"op": "confirm" | "delete", "id": id}.
+    Операции выполняются по типам (отправка, подтверждение, удаление) набором запросов
+    на тип, а не запросом на операцию. Возвращает результаты в порядке входных операций.
+    """
+    results = [None] * len(operations)
+    pending = {op: {} for op in OPERATIONS}
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        key = 'to_user_id' if op == 'send' else 'id'
+        try:
+            target = int(operation[key])
+        except (KeyError, TypeError, ValueError):
+            results[index] = {'op': op, 'status': 'invalid'}
+            continue
+        if op not in OPERATIONS:
+            results[index] = {'op': op, 'status': 'invalid'}
+            continue
+        pending[op].setdefault(target, []).append(index)
+
+    with transaction.atomic():
+        statuses = {
+            'send': _send(user, pending['send']),
+            'confirm': _confirm(user, pending['confirm']),
+            'delete': _delete(user, pending['delete']),
+        }
+
+    for op, targets in pending.items():
+        for target, indexes in targets.items():
+            for index in indexes:
+                results[index] = {'op': op, **statuses[op][target]}
+    return results
+
+
+def _send(user, targets):
+    if not targets:
+        return {}
+    statuses = {}
+    existing_users = set(CustomUser.objects.filter(id__in=targets).values_list('id', flat=True))
+    already_sent = set(
+        Connections.objects.filter(from_user=user, to_user_id__in=existing_users)
+        .values_list('to_user_id', flat=True)
+    )
+    new_targets = [
+        target for target in targets
+        if target in existing_users and target not in already_sent and target != user.pk
+    ]
+    # Повторы и гонки отсекает ограничение unique_connection, а не отдельная проверка
+    Connections.objects.bulk_create(
+        [Connections(from_user=user, to_user_id=target) for target in new_targets],
+        ignore_conflicts=True,
+    )
+    created = dict(
+        Connections.objects.filter(from_user=user, to_user_id__in=new_targets).values_list('to_user_id', 'id')
+    )
+    # bulk_create не шлет сигналы, события outbox пишем сами
+    emit_many([
+        ('connection.requested', user.pk, connection_id,
+         {'id': connection_id, 'from_user_id': user.pk, 'to_user_id': target, 'is_confirmed': False})
+        for target, connection_id in created.items()
+    ])
+    for target in targets:
+        if target not in existing_users or target == user.pk:
+            statuses[target] = {'to_user_id': target, 'status': 'not_found'}
+        elif target in created:
+            statuses[target] = {'to_user_id': target, 'status': 'sent', 'id': created[target]}
+        else:
+            statuses[target] = {'to_user_id': target, 'status': 'already_sent'}
+    return statuses
+
+
+def _confirm(user, targets):
+    if not targets:
+        return {}
+    requests = Connections.objects.filter(id__in=targets, to_user=user, is_confirmed=False)
+    senders = dict(requests.values_list('id', 'from_user_id'))
+    requests.filter(id__in=senders).update(is_confirmed=True)
+    # update() не шлет сигналы, поэтому граф контактов и outbox обновляем сами
+    if senders:
+        transaction.on_commit(lambda: contact_graph.invalidate(user.pk, *senders.values()))
+        emit_many([
+            ('connection.confirmed', sender, connection_id,
+             {'id': connection_id, 'from_user_id': sender, 'to_user_id': user.pk, 'is_confirmed': True})
+            for connection_id, sender in senders.items()
+        ])
+    return {
+        target: {'id': target, 'status': 'confirmed' if target in senders else 'not_found'}
+        for target in targets
+    }
+
+
+def _delete(user, targets):
+    if not targets:
+        return {}
+    connections = Connections.objects.filter(Q(from_user=user) | Q(to_user=user), id__in=targets)
+    found = set(connections.values_list('id', flat=True))
+    connections.filter(id__in=found).delete()
+    return {
+        target: {'id': target, 'status': 'deleted' if target in found else 'not_found'}
+        for target in targets
+    }
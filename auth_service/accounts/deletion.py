@@ -0,0 +1,152 @@
+"""
+Отложенное удаление аккаунтов. DeleteView только деактивирует пользователя
+и ставит AccountDeletion в очередь; purge_accounts удаляет его связи и токены
+пачками по ACCOUNT_DELETION_CHUNK_SIZE, каждую в своей транзакции: блокировки
+короткие, в памяти не больше одной пачки, а прерванное удаление продолжается
+с того же места. Последним удаляется сам пользователь — его post_delete пишет
+в outbox событие user.deleted, tombstone для других сервисов.
+
+Несколько purge_accounts не делят задачу: claim_deletion забирает ее под
+select_for_update(skip_locked=True) и условным UPDATE (на SQLite блокировки
+строк нет). Задачу упавшего purger через ACCOUNT_DELETION_LEASE без новых
+пачек забирает другой.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from .graph import contact_graph
+from .models import AccountDeletion, Connections, CustomUser, Profile
+
+
+def request_deletion(user):
+    """Деактивировать пользователя и вернуть его задачу удаления (новую или уже поставленную)"""
+    with transaction.atomic():
+        if user.is_active:
+            # Неактивный пользователь сразу теряет доступ: JWT и вход проверяют is_active
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+        job, _ = AccountDeletion.objects.get_or_create(user_id=user.pk, completed_at__isnull=True)
+    return job
+
+
+def _raw_delete(queryset):
+    """
+    DELETE по queryset одним запросом, без Collector и сигналов. QuerySet._raw_delete —
+    приватный API Django, проверен на 5.1 и 5.2 (requirements.txt: Django<5.3);
+    при обновлении Django сверить сигнатуру. Других вызовов в проекте нет
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def _progress(job, field, count):
+    setattr(job, field, getattr(job, field) + count)
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=[field, 'heartbeat_at'])
+
+
+def _purge_connections(job, field, chunk_size):
+    with transaction.atomic():
+        rows = list(
+            Connections.objects.filter(**{field: job.user_id})
+            .order_by('id')
+            .values_list('id', 'from_user_id', 'to_user_id', 'is_confirmed')[:chunk_size]
+        )
+        if not rows:
+            return 0
+        # Без Collector и сигналов: событие на каждую связь заменяет один tombstone пользователя
+        _raw_delete(Connections.objects.filter(id__in=[row[0] for row in rows]))
+        contacts = {
+            from_user_id if to_user_id == job.user_id else to_user_id
+            for _, from_user_id, to_user_id, confirmed in rows if confirmed
+        }
+        if contacts:
+            transaction.on_commit(lambda: contact_graph.invalidate(job.user_id, *contacts))
+        _progress(job, 'connections_deleted', len(rows))
+    return len(rows)
+
+
+def _purge_tokens(job, chunk_size):
+    with transaction.atomic():
+        ids = list(
+            OutstandingToken.objects.filter(user_id=job.user_id)
+            .order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0
+        # Связанные BlacklistedToken удаляются каскадом
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        _progress(job, 'tokens_deleted', len(ids))
+    return len(ids)
+
+
+def purge_account(job, chunk_size=None, pause=0):
+    """Выполнить задачу удаления до конца; pause — пауза между пачками в секундах"""
+    chunk_size = chunk_size or settings.ACCOUNT_DELETION_CHUNK_SIZE
+    if job.status == AccountDeletion.Status.PENDING:
+        job.status = AccountDeletion.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+
+    # Исходящие и входящие связи отдельно: каждая сторона идет по своему индексу
+    for step in (lambda: _purge_connections(job, 'from_user_id', chunk_size),
+                 lambda: _purge_connections(job, 'to_user_id', chunk_size),
+                 lambda: _purge_tokens(job, chunk_size)):
+        while step():
+            if pause:
+                time.sleep(pause)
+
+    with transaction.atomic():
+        Profile.objects.filter(user_id=job.user_id).delete()
+        # Зависимых строк не осталось, Collector лишь проверит пустые связи
+        CustomUser.objects.filter(pk=job.user_id).delete()
+        job.status = AccountDeletion.Status.DONE
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'completed_at'])
+    return job
+
+
+def pending_deletions():
+    """Задачи, которые можно взять: новые и брошенные упавшим purger"""
+    abandoned = timezone.now() - settings.ACCOUNT_DELETION_LEASE
+    return AccountDeletion.objects.filter(
+        Q(status=AccountDeletion.Status.PENDING)
+        | Q(status=AccountDeletion.Status.RUNNING, heartbeat_at__lt=abandoned)
+    ).order_by('requested_at')
+
+
+def claim_deletion():
+    """Забрать следующую задачу, вернуть ее или None, если брать нечего"""
+    while True:
+        with transaction.atomic():
+            job = pending_deletions().select_for_update(skip_locked=True).first()
+            if job is None:
+                return None
+            now = timezone.now()
+            # Условие по heartbeat_at: задачу мог забрать другой purger между чтением и записью
+            claimed = AccountDeletion.objects.filter(
+                pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at,
+            ).update(status=AccountDeletion.Status.RUNNING, started_at=job.started_at or now, heartbeat_at=now)
+            if claimed:
+                job.refresh_from_db()
+                return job
+
+
+def purge_finished(older_than=None, chunk_size=1000):
+    """Удалить завершенные задачи старше ACCOUNT_DELETION_RETENTION пачками, вернуть их число"""
+    cutoff = timezone.now() - (older_than if older_than is not None else settings.ACCOUNT_DELETION_RETENTION)
+    deleted = 0
+    while True:
+        ids = list(
+            AccountDeletion.objects.filter(status=AccountDeletion.Status.DONE, completed_at__lt=cutoff)
+            .order_by('completed_at')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        deleted += AccountDeletion.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .avatars import avatar_url
+from .cache import record_cache
+from .models import CustomUser
+
+COMPACT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'avatar')
+KEY_PREFIX = 'user:compact:'
+
+
+def _cache():
+    return caches[settings.USERS_BATCH_CACHE]
+
+
+def _key(user_id):
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def compact_user(user):
+    # В списки отдаем миниатюру, а не исходный файл
+    avatar = user.profile.avatar.name if hasattr(user, 'profile') else None
+    return {
+        'id': user.pk,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'avatar': avatar_url(avatar, settings.AVATAR_LIST_SIZE),
+    }
+
+
+def get_compact_users(user_ids):
+    """
+    Краткие данные пользователей {user_id: {...}} для отображения в других сервисах.
+    Cache-aside: попадания читаются одним get_many, промахи — одним запросом с профилем через JOIN.
+    """
+    keys = {_key(user_id): user_id for user_id in user_ids}
+    result = {keys[key]: data for key, data in _cache().get_many(keys).items()}
+
+    missing = [user_id for user_id in keys.values() if user_id not in result]
+    record_cache('compact_users', hits=len(result), misses=len(missing))
+    if missing:
+        users = (
+            CustomUser.objects.filter(id__in=missing)
+            .select_related('profile')
+            .only('id', 'username', 'first_name', 'last_name', 'profile__avatar')
+        )
+        loaded = {user.pk: compact_user(user) for user in users}
+        _cache().set_many({_key(user_id): data for user_id, data in loaded.items()},
+                          timeout=settings.USERS_BATCH_CACHE_TTL.total_seconds())
+        result.update(loaded)
+    return result
+
+
+def invalidate_compact_users(*user_ids):
+    _cache().delete_many([_key(user_id) for user_id in user_ids])
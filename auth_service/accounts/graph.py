@@ -0,0 +1,91 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from .cache import record_cache
+from .models import Connections
+
+
+class ContactGraph:
+    """
+    Граф подтвержденных контактов в кэше: для каждого пользователя — множество id его контактов.
+
+    Проверка связи, общие контакты и число контактов считаются по множествам
+    без запросов к Connections. Множество строится из базы при промахе и
+    сбрасывается при подтверждении или удалении связи (см. accounts.signals).
+
+    Как в accounts.profiles, ключ множества содержит версию пользователя, а сброс
+    меняет только версию: множество, прочитанное из базы до сброса и записанное
+    после него, уходит под старый ключ и больше не читается.
+    """
+    key_prefix = 'contacts:'
+    version_prefix = 'contacts:version:'
+
+    @property
+    def cache(self):
+        return caches[settings.CONTACT_GRAPH_CACHE]
+
+    def make_key(self, user_id, version):
+        return f'{self.key_prefix}{user_id}:{version}'
+
+    def versions(self, user_ids):
+        """Текущие версии пользователей; недостающие создаются (версия могла вытесниться из кэша)"""
+        keys = {f'{self.version_prefix}{user_id}': user_id for user_id in user_ids}
+        versions = {keys[key]: version for key, version in self.cache.get_many(keys).items()}
+        missing = [user_id for user_id in keys.values() if user_id not in versions]
+        if missing:
+            now = time.time_ns()
+            for user_id in missing:
+                self.cache.add(f'{self.version_prefix}{user_id}', now, timeout=None)
+            stored = self.cache.get_many([f'{self.version_prefix}{user_id}' for user_id in missing])
+            versions.update({user_id: stored.get(f'{self.version_prefix}{user_id}', now) for user_id in missing})
+        return versions
+
+    def contacts_many(self, user_ids):
+        """Вернуть {user_id: frozenset(id контактов)}, промахи догружаются одним запросом"""
+        versions = self.versions(user_ids)
+        keys = {self.make_key(user_id, version): user_id for user_id, version in versions.items()}
+        result = {keys[key]: contacts for key, contacts in self.cache.get_many(keys).items()}
+
+        missing = {user_id for user_id in keys.values() if user_id not in result}
+        record_cache('contact_graph', hits=len(result), misses=len(missing))
+        if missing:
+            loaded = {user_id: set() for user_id in missing}
+            rows = Connections.objects.filter(
+                Q(from_user_id__in=missing) | Q(to_user_id__in=missing),
+                is_confirmed=True
+            ).values_list('from_user_id', 'to_user_id')
+            for from_user_id, to_user_id in rows:
+                if from_user_id in loaded:
+                    loaded[from_user_id].add(to_user_id)
+                if to_user_id in loaded:
+                    loaded[to_user_id].add(from_user_id)
+            loaded = {user_id: frozenset(contacts) for user_id, contacts in loaded.items()}
+            self.cache.set_many(
+                {self.make_key(user_id, versions[user_id]): contacts for user_id, contacts in loaded.items()},
+                timeout=settings.CONTACT_GRAPH_TTL.total_seconds(),
+            )
+            result.update(loaded)
+        return result
+
+    def contacts(self, user_id):
+        return self.contacts_many([user_id])[user_id]
+
+    def is_connected(self, user_id, other_id):
+        return other_id in self.contacts(user_id)
+
+    def mutual(self, user_id, other_id):
+        graph = self.contacts_many([user_id, other_id])
+        return graph[user_id] & graph[other_id]
+
+    def count(self, user_id):
+        return len(self.contacts(user_id))
+
+    def invalidate(self, *user_ids):
+        version = time.time_ns()
+        self.cache.set_many({f'{self.version_prefix}{user_id}': version for user_id in user_ids}, timeout=None)
+
+
+contact_graph = ContactGraph()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class PoolSaturated(Exception):
+    """Все потоки заняты и очередь заполнена"""
+
+
+class HashingPool:
+    """
+    Ограниченный пул потоков для хэширования паролей.
+
+    PBKDF2 из hashlib отпускает GIL, поэтому потоки действительно работают
+    параллельно и не блокируют event loop. Если в работе и в очереди уже
+    workers + max_queue задач, новая задача сразу отклоняется PoolSaturated.
+    """
+    latency_window = 1000
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hashing')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies = deque(maxlen=self.latency_window)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturated()
+            self._in_flight += 1
+        future = self._executor.submit(self._timed, fn, *args)
+        # Колбэк вызывается и при отмене задачи из очереди (клиент отключился), тогда _timed не выполняется
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        """Выполнить fn в пуле, не блокируя event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._completed += 1
+                self._latencies.append(elapsed)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self):
+        """Метрики пула: загрузка и задержка хэширования за последние latency_window задач"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            in_flight = self._in_flight
+            completed = self._completed
+            rejected = self._rejected
+
+        def percentile(q):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000, 3)
+
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': in_flight,
+            'busy_workers': min(in_flight, self.workers),
+            'queued': max(in_flight - self.workers, 0),
+            'completed': completed,
+            'rejected': rejected,
+            'latency_ms_p50': percentile(0.5),
+            'latency_ms_p99': percentile(0.99),
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_QUEUE)
+    return _pool
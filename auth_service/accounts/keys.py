@@ -0,0 +1,145 @@
+import fcntl
+import functools
+import logging
+import os
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SigningKey:
+    """Ключ подписи JWT с идентификатором (kid) из заголовка токена"""
+    def __init__(self, kid, private_key):
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+
+    def to_jwk(self, algorithm):
+        jwk = jwt.PyJWS().get_algorithm_by_name(algorithm).to_jwk(self.public_key, as_dict=True)
+        jwk.update({'kid': self.kid, 'use': 'sig', 'alg': algorithm})
+        return jwk
+
+
+class KeyRing:
+    """
+    Набор ключей подписи: последний по kid подписывает новые токены,
+    предыдущие остаются для проверки уже выданных токенов до их истечения.
+    """
+    def __init__(self, keys, algorithm, version=None):
+        self.keys = sorted(keys, key=lambda key: key.kid)
+        self.algorithm = algorithm
+        self.version = version  # mtime каталога ключей на момент загрузки
+        self._by_kid = {key.kid: key for key in self.keys}
+        self.jwks = {'keys': [key.to_jwk(algorithm) for key in self.keys]}
+
+    @property
+    def active(self):
+        return self.keys[-1]
+
+    def get(self, kid):
+        return self._by_kid.get(kid)
+
+
+def generate_private_key(algorithm):
+    """Сгенерировать приватный ключ под алгоритм подписи"""
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm.startswith(('RS', 'PS')):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+
+
+def new_kid():
+    return timezone.now().strftime('%Y%m%dT%H%M%S%fZ')
+
+
+def write_private_key(path, private_key):
+    # Через временный файл: другой процесс не прочитает ключ наполовину записанным
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_bytes(private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ))
+    tmp_path.chmod(0o600)
+    os.replace(tmp_path, path)
+
+
+def keys_version(keys_dir):
+    try:
+        return keys_dir.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_keys(keys_dir):
+    return [
+        SigningKey(path.stem, serialization.load_pem_private_key(path.read_bytes(), password=None))
+        for path in sorted(keys_dir.glob('*.pem'))
+    ] if keys_dir.is_dir() else []
+
+
+def create_dev_key(keys_dir, algorithm):
+    """
+    Создать ключ в keys_dir, если его там еще нет. Под блокировкой файла, чтобы
+    воркеры, стартующие одновременно, не создали каждый свой ключ
+    """
+    keys_dir.mkdir(parents=True, exist_ok=True)
+    with open(keys_dir / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not any(keys_dir.glob('*.pem')):
+            write_private_key(keys_dir / f'{new_kid()}.pem', generate_private_key(algorithm))
+
+
+@functools.lru_cache(maxsize=None)
+def get_keyring():
+    """
+    Загрузить ключи из JWT_KEYS_DIR (файлы <kid>.pem). Каталог общий для всех
+    воркеров и процессов сервиса: ключ, созданный в памяти одного процесса, не
+    проверился бы в остальных, поэтому без ключей сервис не стартует.
+    """
+    algorithm = api_settings.ALGORITHM
+    keys_dir = settings.JWT_KEYS_DIR
+    version = keys_version(keys_dir)
+    keys = load_keys(keys_dir)
+
+    if not keys:
+        if not settings.DEBUG:
+            raise ImproperlyConfigured(
+                f"No JWT signing keys in {keys_dir}. Run `manage.py rotate_jwt_keys` "
+                f"and share the directory between all processes of the service."
+            )
+        logger.warning("No JWT signing keys in %s, creating one for local development.", keys_dir)
+        create_dev_key(keys_dir, algorithm)
+        version = keys_version(keys_dir)
+        keys = load_keys(keys_dir)
+    return KeyRing(keys, algorithm, version)
+
+
+def get_verifying_key(kid):
+    """
+    Ключ проверки по kid. Неизвестный kid мог появиться после rotate_jwt_keys
+    в другом процессе: если каталог ключей изменился, перечитываем его один раз.
+    Для мусорных kid это только stat каталога, файлы ключей не читаются
+    """
+    keyring = get_keyring()
+    key = keyring.get(kid)
+    if key is None and keyring.version != keys_version(settings.JWT_KEYS_DIR):
+        get_keyring.cache_clear()
+        key = get_keyring().get(kid)
+    return key
+
+
+@receiver(setting_changed)
+def reset_keyring(setting, **kwargs):
+    if setting in ('JWT_KEYS_DIR', 'SIMPLE_JWT'):
+        get_keyring.cache_clear()
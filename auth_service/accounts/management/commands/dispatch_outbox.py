@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.outbox import dispatch, get_publisher, purge_published
+
+
+class Command(BaseCommand):
+    help = ("Публиковать события outbox (изменения пользователей, профилей и связей) "
+            "пачками в OUTBOX_PUBLISHER. Работает постоянно. Доставка at-least-once, "
+            "порядок событий пользователя потребители восстанавливают по sequence")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help="Событий в одной публикации")
+        parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX_POLL_INTERVAL.total_seconds(),
+                            help="Пауза в секундах, когда новых событий нет")
+        parser.add_argument('--once', action='store_true', help="Опубликовать накопленное и выйти")
+
+    def handle(self, *args, **options):
+        publisher = get_publisher()
+        published = 0
+        while True:
+            count = dispatch(publisher, options['batch_size'])
+            published += count
+            if count:
+                continue
+            # Очередь пуста — заодно чистим старые опубликованные события
+            purged = purge_published()
+            if options['once']:
+                break
+            if purged:
+                self.stdout.write(f"Purged {purged} published events")
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Published {published} events"))
@@ -0,0 +1,153 @@
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import CustomUser, Profile
+from accounts.outbox import emit_many, user_payload
+
+FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+
+def _init_worker():
+    django.setup()
+
+
+def read_records(path, fmt):
+    """Построчно читать пользователей из CSV или JSONL, не загружая файл целиком"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def clean_record(record):
+    """
+    Привести username и email к виду, в котором их сохраняет create_user, и проверить
+    поля валидаторами модели (формат, max_length). Вернуть (запись, ошибки или None):
+    bulk_create не валидирует, а одно слишком длинное значение на PostgreSQL
+    откатило бы всю пачку
+    """
+    values = [record.get(field) for field in (*FIELDS, 'password', 'password_hash')]
+    if not all(value is None or isinstance(value, str) for value in values):
+        return record, {'__all__': ["Fields must be strings."]}
+    record = {**record, 'username': CustomUser.normalize_username(record['username']),
+              'email': CustomUser.objects.normalize_email(record['email'])}
+    user = CustomUser(password=record.get('password_hash') or '',
+                      **{field: record.get(field) or '' for field in FIELDS})
+    try:
+        # Пароль проверяем, только если передан готовый хэш: make_password укладывается в max_length
+        user.clean_fields(exclude=None if record.get('password_hash') else ['password'])
+    except ValidationError as e:
+        return record, e.message_dict
+    return record, None
+
+
+class Command(BaseCommand):
+    help = ("Массовый импорт пользователей из CSV/JSONL: пароли хэшируются в пуле процессов, "
+            "CustomUser, Profile и события outbox создаются через bulk_create без сигналов. "
+            "Поля: username, email, first_name, last_name и password или готовый password_hash")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл .csv или .jsonl")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Формат файла, по умолчанию по расширению")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Пользователей в одной транзакции")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Процессов для хэширования, 0 — хэшировать в текущем процессе")
+        parser.add_argument('--checkpoint', help="Файл прогресса, по умолчанию <path>.checkpoint")
+        parser.add_argument('--restart', action='store_true', help="Игнорировать сохраненный прогресс")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f"File not found: {path}")
+        fmt = options['format'] or path.suffix.lstrip('.').lower()
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError("Unknown format, use --format csv|jsonl")
+
+        checkpoint = Path(options['checkpoint'] or f'{path}.checkpoint')
+        done = 0
+        if checkpoint.exists() and not options['restart']:
+            done = int(checkpoint.read_text() or 0)
+            self.stdout.write(f"Resuming after {done} records")
+
+        records = itertools.islice(read_records(path, fmt), done, None)
+        pool = ProcessPoolExecutor(options['workers'], initializer=_init_worker) if options['workers'] else None
+        totals = {'created': 0, 'skipped': 0}
+        started = time.monotonic()
+
+        try:
+            while True:
+                batch = list(itertools.islice(records, options['batch_size']))
+                if not batch:
+                    break
+                created, skipped = self.import_batch(batch, pool, first=done + 1)
+                done += len(batch)
+                checkpoint.write_text(str(done))
+
+                totals['created'] += created
+                totals['skipped'] += skipped
+                rate = totals['created'] / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(f"{done} records processed: {totals['created']} created, "
+                                  f"{totals['skipped']} skipped, {rate:.0f} users/s")
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} users, skipped {totals['skipped']} "
+            f"in {time.monotonic() - started:.1f}s"
+        ))
+
+    def import_batch(self, batch, pool, first=1):
+        """Создать пользователей пачки, вернуть (создано, пропущено); first — номер первой записи"""
+        # Пропускаем неполные и некорректные записи, уже существующих пользователей и дубликаты внутри пачки
+        valid = []
+        for number, record in enumerate(batch, first):
+            if not (record.get('username') and record.get('email')
+                    and (record.get('password') or record.get('password_hash'))):
+                continue
+            record, errors = clean_record(record)
+            if errors:
+                self.stderr.write(f"Record {number} rejected: {errors}")
+                continue
+            valid.append(record)
+        taken_usernames = set(CustomUser.objects.filter(username__in=[r['username'] for r in valid])
+                              .values_list('username', flat=True))
+        taken_emails = set(CustomUser.objects.filter(email__in=[r['email'] for r in valid])
+                           .values_list('email', flat=True))
+        fresh = []
+        for record in valid:
+            if record['username'] in taken_usernames or record['email'] in taken_emails:
+                continue
+            taken_usernames.add(record['username'])
+            taken_emails.add(record['email'])
+            fresh.append(record)
+
+        raw = [record['password'] for record in fresh if not record.get('password_hash')]
+        hashed = iter(pool.map(make_password, raw, chunksize=64) if pool else map(make_password, raw))
+        users = [
+            CustomUser(
+                password=record.get('password_hash') or next(hashed),
+                **{field: record.get(field) or '' for field in FIELDS},
+            )
+            for record in fresh
+        ]
+
+        with transaction.atomic():
+            users = CustomUser.objects.bulk_create(users)
+            Profile.objects.bulk_create([Profile(user=user) for user in users])
+            emit_many([('user.created', user.pk, user.pk, user_payload(user)) for user in users])
+        return len(users), len(batch) - len(users)
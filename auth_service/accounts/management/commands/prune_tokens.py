@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+
+class Command(BaseCommand):
+    help = ("Удалить истекшие OutstandingToken/BlacklistedToken пачками, чтобы таблицы токенов "
+            "не росли бесконечно. С --repeat работает постоянно (сервис auth-token-pruner в "
+            "docker-compose), без него — один проход, например из cron")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Сколько токенов удалять за раз")
+        parser.add_argument('--sleep', type=float, default=0, help="Пауза между пачками в секундах")
+        parser.add_argument('--repeat', action='store_true', help="Повторять проход каждые --interval секунд")
+        parser.add_argument('--interval', type=float, default=settings.TOKEN_PRUNE_INTERVAL.total_seconds(),
+                            help="Пауза между проходами в секундах")
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.prune(options['chunk_size'], options['sleep'])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens"))
+            if not options['repeat']:
+                break
+            time.sleep(options['interval'])
+
+    def prune(self, chunk_size, pause):
+        now = timezone.now()
+        last_id = 0
+        deleted = 0
+
+        while True:
+            # Идем по первичному ключу: старые токены истекают первыми, индекс по expires_at не нужен
+            ids = list(
+                OutstandingToken.objects
+                .filter(id__gt=last_id, expires_at__lte=now)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                return deleted
+            last_id = ids[-1]
+            # Связанные BlacklistedToken удаляются каскадом
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            if pause:
+                time.sleep(pause)
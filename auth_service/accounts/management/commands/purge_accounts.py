@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.deletion import claim_deletion, purge_account, purge_finished
+
+
+class Command(BaseCommand):
+    help = ("Удалять аккаунты, поставленные в очередь DELETE /delete-user/: связи и токены "
+            "пачками, затем сам пользователь с tombstone-событием в outbox. Работает постоянно")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=settings.ACCOUNT_DELETION_CHUNK_SIZE,
+                            help="Строк в одной пачке удаления")
+        parser.add_argument('--sleep', type=float, default=0, help="Пауза между пачками в секундах")
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.ACCOUNT_DELETION_POLL_INTERVAL.total_seconds(),
+                            help="Пауза в секундах, когда очередь пуста")
+        parser.add_argument('--once', action='store_true', help="Обработать текущую очередь и выйти")
+
+    def handle(self, *args, **options):
+        purged = 0
+        while True:
+            job = claim_deletion()
+            if job is None:
+                # Очередь пуста — заодно чистим старые завершенные задачи
+                purge_finished()
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.monotonic()
+            purge_account(job, options['chunk_size'], options['sleep'])
+            purged += 1
+            self.stdout.write(f"Deleted user {job.user_id}: {job.connections_deleted} connections, "
+                              f"{job.tokens_deleted} tokens in {time.monotonic() - started:.1f}s")
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {purged} accounts"))
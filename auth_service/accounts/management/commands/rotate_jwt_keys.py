@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.keys import generate_private_key, new_kid, write_private_key
+
+
+class Command(BaseCommand):
+    help = "Создать новый ключ подписи JWT и удалить самые старые"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=2,
+                            help="Сколько последних ключей оставить (старые нужны до истечения refresh-токенов)")
+
+    def handle(self, *args, **options):
+        if options['keep'] < 1:
+            raise CommandError("--keep must be at least 1")
+
+        keys_dir = settings.JWT_KEYS_DIR
+        keys_dir.mkdir(parents=True, exist_ok=True)
+
+        kid = new_kid()
+        write_private_key(keys_dir / f'{kid}.pem', generate_private_key(api_settings.ALGORITHM))
+        self.stdout.write(self.style.SUCCESS(f"Created signing key {kid}"))
+
+        for path in sorted(keys_dir.glob('*.pem'))[:-options['keep']]:
+            path.unlink()
+            self.stdout.write(f"Removed signing key {path.stem}")
+
+        # Проверять токены с новым kid воркеры начнут сами, перечитав каталог
+        self.stdout.write("Restart the service so that workers start signing with the new key.")
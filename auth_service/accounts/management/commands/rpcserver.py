@@ -0,0 +1,23 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.rpc.server import RPCServer
+
+
+class Command(BaseCommand):
+    help = "Запустить сервер бинарного протокола для внутренних вызовов (токены, пользователи, связи)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.RPC_HOST)
+        parser.add_argument('--port', type=int, default=settings.RPC_PORT)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.serve(options['host'], options['port']))
+
+    async def serve(self, host, port):
+        server = await RPCServer().start(host, port)
+        self.stdout.write(self.style.SUCCESS(f"RPC server listening on {host}:{port}"))
+        async with server:
+            await server.serve_forever()
@@ -1,22 +1,46 @@
-import datetime
-from django.utils import timezone
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .presence import amark_seen, mark_seen
 
 
 class UpdateLastStatusMiddleware:
     """
     Middleware для обновления last_seen и is_online пользователя при каждом запросе.
+    Статус сразу попадает в кэш присутствия, а в базу пишется пачками (см. accounts.presence).
+    Работает и в синхронной, и в асинхронной цепочке, чтобы под ASGI не было лишних переходов между потоками.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
         response = self.get_response(request)
 
         # Проверяем, авторизован ли пользователь
         if request.user.is_authenticated:
-            profile = request.user.profile
-            profile.last_seen = timezone.now()
-            profile.is_online = True  # Пользователь считается онлайн при каждом запросе
-            profile.save()
+            # Пользователь считается онлайн при каждом запросе
+            mark_seen(request.user.pk)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        # JWT-представления подменяют request.user готовым пользователем. Ленивого
+        # пользователя сессии в async нельзя вычислять синхронно, берем его через auser()
+        user = request.user
+        if isinstance(user, SimpleLazyObject):
+            user = await request.auser()
+        if user.is_authenticated:
+            await amark_seen(user.pk)
 
-        return response
\ No newline at end of file
+        return response
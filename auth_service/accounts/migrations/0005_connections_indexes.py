@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-18 19:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_rename_connection_connections'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='connections',
+            name='from_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_connections', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='connections',
+            name='to_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='incoming_connections', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='connections',
+            index=models.Index(fields=['to_user', 'is_confirmed'], name='conn_to_user_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='connections',
+            index=models.Index(condition=models.Q(('is_confirmed', True)), fields=['from_user', '-created', '-id'], name='conn_from_confirmed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='connections',
+            index=models.Index(condition=models.Q(('is_confirmed', True)), fields=['to_user', '-created', '-id'], name='conn_to_confirmed_idx'),
+        ),
+    ]
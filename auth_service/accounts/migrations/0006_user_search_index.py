@@ -0,0 +1,73 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    # FTS5-индекс поверх accounts_customuser (external content), prefix ускоряет короткие префиксы
+    """
+    CREATE VIRTUAL TABLE accounts_user_search USING fts5(
+        username, first_name, last_name, email,
+        content='accounts_customuser', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER accounts_user_search_ai AFTER INSERT ON accounts_customuser BEGIN
+        INSERT INTO accounts_user_search(rowid, username, first_name, last_name, email)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_user_search_ad AFTER DELETE ON accounts_customuser BEGIN
+        INSERT INTO accounts_user_search(accounts_user_search, rowid, username, first_name, last_name, email)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER accounts_user_search_au AFTER UPDATE OF username, first_name, last_name, email
+    ON accounts_customuser BEGIN
+        INSERT INTO accounts_user_search(accounts_user_search, rowid, username, first_name, last_name, email)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email);
+        INSERT INTO accounts_user_search(rowid, username, first_name, last_name, email)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email);
+    END
+    """,
+    "INSERT INTO accounts_user_search(accounts_user_search) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS accounts_user_search_au",
+    "DROP TRIGGER IF EXISTS accounts_user_search_ad",
+    "DROP TRIGGER IF EXISTS accounts_user_search_ai",
+    "DROP TABLE IF EXISTS accounts_user_search",
+]
+
+SEARCH_COLUMNS = ('username', 'first_name', 'last_name', 'email')
+
+# Триграммные GIN-индексы под UPPER(col) LIKE UPPER('prefix%'), который Django строит для istartswith
+POSTGRES_FORWARD = ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+    f'CREATE INDEX IF NOT EXISTS accounts_user_{column}_trgm '
+    f'ON accounts_customuser USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+    for column in SEARCH_COLUMNS
+]
+
+POSTGRES_BACKWARD = [f'DROP INDEX IF EXISTS accounts_user_{column}_trgm' for column in SEARCH_COLUMNS]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_connections_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def fts5_table(remove_diacritics):
+    # Триггеры из 0006 ссылаются на таблицу по имени и продолжают работать с новой
+    return [
+        "DROP TABLE accounts_user_search",
+        f"""
+        CREATE VIRTUAL TABLE accounts_user_search USING fts5(
+            username, first_name, last_name, email,
+            content='accounts_customuser', content_rowid='id',
+            tokenize='unicode61 remove_diacritics {remove_diacritics}', prefix='2 3'
+        )
+        """,
+        "INSERT INTO accounts_user_search(accounts_user_search) VALUES ('rebuild')",
+    ]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+    """Без снятия диакритики, как istartswith на PostgreSQL: 'é' не совпадает с 'e'"""
+
+    dependencies = [
+        ('accounts', '0009_outbox_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(fts5_table(0)), run(fts5_table(2))),
+    ]
@@ -1,11 +1,73 @@
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, router, transaction
 from django.utils import timezone
-from datetime import timedelta
 
 
-class CustomUser(AbstractUser):
+class DirtyFieldsMixin:
+    '''
+    Отслеживание измененных полей: save() без update_fields пишет только
+    изменившиеся колонки, а если ничего не изменилось — не пишет вовсе
+    '''
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    def _tracked_value(self, field):
+        value = getattr(self, field.attname)
+        # У файловых полей сравниваем имя файла, а не объект FieldFile
+        return value.name if isinstance(field, models.FileField) else value
+
+    def _snapshot_fields(self, names=None):
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (names is None or field.name in names or field.attname in names):
+                loaded[field.attname] = self._tracked_value(field)
+        self._loaded_values = loaded
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_fields(kwargs.get('fields'))
+
+    def get_dirty_fields(self):
+        '''Имена полей, изменившихся с момента загрузки или последнего сохранения'''
+        loaded = getattr(self, '_loaded_values', {})
+        return [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname in self.__dict__
+            and (field.attname not in loaded or loaded[field.attname] != self._tracked_value(field))
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None \
+                and not kwargs.get('force_insert'):
+            dirty = self.get_dirty_fields()
+            if not dirty:
+                return
+            kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        self._snapshot_fields(kwargs.get('update_fields'))
+
+
+class OutboxMixin:
+    '''
+    save() в транзакции: событие outbox, которое пишет post_save,
+    попадает в ту же транзакцию, что и само изменение (accounts.outbox)
+    '''
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class CustomUser(DirtyFieldsMixin, OutboxMixin, AbstractUser):
     '''Пользовательская модель'''
     email = models.EmailField(unique=True, max_length=255)
     username = models.CharField(
@@ -18,7 +80,7 @@ class CustomUser(AbstractUser):
         return self.username
 
 
-class Profile(models.Model):
+class Profile(DirtyFieldsMixin, OutboxMixin, models.Model):
     '''Модель профиля'''
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
     bio = models.CharField(max_length=500, null=True, blank=True)
@@ -32,23 +94,23 @@ class Profile(models.Model):
         return f"{self.user.username}'s profile"
 
     def update_online_status(self):
+        '''Пересчитать is_online по last_seen (без записи в базу)'''
         if self.last_seen:
             now = timezone.now()
-            if now - self.last_seen > timedelta(minutes=5):
-                self.is_online = False
-            else:
-                self.is_online = True
-            self.save()
+            self.is_online = now - self.last_seen <= settings.PRESENCE_ONLINE_WINDOW
 
 
-class Connections(models.Model):
+class Connections(OutboxMixin, models.Model):
     '''Модель связей'''
+    # Отдельные индексы по FK не нужны: их покрывают unique_connection и индексы ниже
     from_user = models.ForeignKey(CustomUser,
                                   related_name='outgoing_connections',
-                                  on_delete=models.CASCADE)
+                                  on_delete=models.CASCADE,
+                                  db_index=False)
     to_user = models.ForeignKey(CustomUser,
                                 related_name='incoming_connections',
-                                on_delete=models.CASCADE)
+                                on_delete=models.CASCADE,
+                                db_index=False)
     is_confirmed = models.BooleanField(default=False)  # Если двусторонняя связь, дружба подтверждена
     created = models.DateTimeField(auto_now_add=True)
 
@@ -56,7 +118,81 @@ class Connections(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['from_user', 'to_user'], name='unique_connection')
         ]
+        indexes = [
+            # Входящие запросы пользователя (подтверждение, каскадное удаление)
+            models.Index(fields=['to_user', 'is_confirmed'], name='conn_to_user_confirmed_idx'),
+            # Подтвержденные контакты в порядке keyset-пагинации, по индексу на каждую сторону связи
+            models.Index(fields=['from_user', '-created', '-id'], condition=models.Q(is_confirmed=True),
+                         name='conn_from_confirmed_idx'),
+            models.Index(fields=['to_user', '-created', '-id'], condition=models.Q(is_confirmed=True),
+                         name='conn_to_confirmed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.from_user.username} is connected with {self.to_user.username}"
 
+
+
+class OutboxEvent(models.Model):
+    '''Событие для других сервисов, публикуется командой dispatch_outbox'''
+    event_type = models.CharField(max_length=64)
+    user_id = models.BigIntegerField()  # Ключ упорядочивания; не FK, событие переживает удаление пользователя
+    sequence = models.BigIntegerField(default=0)  # Номер события пользователя, по нему потребители упорядочивают
+    aggregate_id = models.BigIntegerField()  # id измененного пользователя или связи
+    payload = models.JSONField()
+    created = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь на публикацию: диспетчер выбирает неопубликованные по порядку id
+            models.Index(fields=['id'], condition=models.Q(published_at__isnull=True), name='outbox_pending_idx'),
+            # Очистка опубликованных старше OUTBOX_RETENTION
+            models.Index(fields=['published_at'], condition=models.Q(published_at__isnull=False),
+                         name='outbox_published_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk}"
+
+
+class OutboxSequence(models.Model):
+    '''
+    Последний выданный номер события пользователя. Строка блокируется до конца
+    транзакции, которая пишет событие, поэтому номера идут в порядке коммитов
+    '''
+    user_id = models.BigIntegerField(primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+
+class AccountDeletion(models.Model):
+    '''Задача отложенного удаления аккаунта, выполняется командой purge_accounts'''
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)  # Неугадываемый id для прогресса
+    user_id = models.BigIntegerField()  # Не FK: пользователь удаляется раньше, чем задача
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    connections_deleted = models.PositiveIntegerField(default=0)
+    tokens_deleted = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Обновляется каждой пачкой; старое — purger упал
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Очередь purge_accounts
+            models.Index(fields=['requested_at'], condition=~models.Q(status='done'), name='deletion_pending_idx'),
+        ]
+        constraints = [
+            # Не больше одной незавершенной задачи на пользователя
+            models.UniqueConstraint(fields=['user_id'], condition=models.Q(completed_at__isnull=True),
+                                    name='unique_active_deletion'),
+        ]
+
+    def __str__(self):
+        return f"Deletion of user {self.user_id}: {self.status}"
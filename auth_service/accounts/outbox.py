@@ -0,0 +1,200 @@
+"""
+Transactional outbox: события об изменениях пользователей, профилей и связей
+пишутся в OutboxEvent в той же транзакции, что и сами изменения, а команда
+dispatch_outbox пачками публикует их в Redis Stream.
+
+Доставка at-least-once, порядок публикации — best-effort: событие помечается
+опубликованным только после успешной публикации, поэтому после сбоя его могут
+получить повторно. Диспетчер идет по возрастанию id, но транзакция, получившая
+id раньше, может закоммититься позже, а на SQLite select_for_update не
+сериализует параллельные диспетчеры. Поэтому у каждого события есть sequence —
+номер события пользователя (user_id), выданный под блокировкой строки
+OutboxSequence в той же транзакции: номера одного пользователя идут в порядке
+коммитов без пропусков. Потребители применяют событие, только если его sequence
+больше последнего примененного, и по разрыву в номерах понимают, что ждут еще.
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .avatars import avatar_url
+from .models import OutboxEvent, OutboxSequence
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Поля, изменения которых интересны другим сервисам; присутствие (last_seen,
+# is_online) меняется слишком часто и в события не попадает
+USER_FIELDS = frozenset({'username', 'email', 'first_name', 'last_name', 'is_active'})
+PROFILE_FIELDS = frozenset({'bio', 'avatar', 'birthday', 'status_message'})
+
+
+def user_payload(user):
+    return {field: getattr(user, field) for field in ('id', *sorted(USER_FIELDS))}
+
+
+def profile_payload(profile):
+    return {
+        'user_id': profile.user_id,
+        'bio': profile.bio,
+        'avatar': avatar_url(profile.avatar.name, settings.AVATAR_LIST_SIZE),
+        'birthday': profile.birthday,
+        'status_message': profile.status_message,
+    }
+
+
+def connection_payload(connection):
+    return {
+        'id': connection.pk,
+        'from_user_id': connection.from_user_id,
+        'to_user_id': connection.to_user_id,
+        'is_confirmed': connection.is_confirmed,
+    }
+
+
+def reserve_sequences(counts):
+    """
+    Выделить номера событий {user_id: count} одним запросом, вернуть {user_id:
+    последний выделенный номер}. Upsert блокирует строки OutboxSequence до конца
+    транзакции: параллельная запись событий тех же пользователей ждет коммита и
+    получает следующие номера.
+    """
+    connection = connections[router.db_for_write(OutboxSequence)]
+    table = connection.ops.quote_name(OutboxSequence._meta.db_table)
+    # Сортировка по user_id — одинаковый порядок блокировок, без взаимных блокировок
+    counts = sorted(counts.items())
+    with connection.cursor() as cursor:
+        # ON CONFLICT ... RETURNING есть и в PostgreSQL, и в SQLite 3.35+
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, value) VALUES {", ".join(["(%s, %s)"] * len(counts))} '
+            f'ON CONFLICT (user_id) DO UPDATE SET value = {table}.value + excluded.value '
+            f'RETURNING user_id, value',
+            [value for pair in counts for value in pair],
+        )
+        return dict(cursor.fetchall())
+
+
+def _event(event_type, user_id, aggregate_id, payload, sequence):
+    # Даты и пр. приводим к JSON сразу, чтобы JSONField не зависел от типов полей
+    payload = json.loads(json.dumps(payload, cls=DjangoJSONEncoder))
+    return OutboxEvent(event_type=event_type, user_id=user_id, sequence=sequence,
+                       aggregate_id=aggregate_id, payload=payload)
+
+
+def emit(event_type, user_id, aggregate_id, payload):
+    """Записать событие; вызывать внутри транзакции, в которой меняются данные"""
+    event = _event(event_type, user_id, aggregate_id, payload, reserve_sequences({user_id: 1})[user_id])
+    event.save()
+    return event
+
+
+def emit_many(events):
+    """Записать пачку событий [(event_type, user_id, aggregate_id, payload), ...] одним INSERT"""
+    if not events:
+        return []
+    counts = Counter(user_id for _, user_id, _, _ in events)
+    # Номера выделяются одним upsert на всю пачку и раздаются в порядке событий
+    last = reserve_sequences(counts)
+    next_sequence = {user_id: last[user_id] - count + 1 for user_id, count in counts.items()}
+    objs = []
+    for event_type, user_id, aggregate_id, payload in events:
+        objs.append(_event(event_type, user_id, aggregate_id, payload, next_sequence[user_id]))
+        next_sequence[user_id] += 1
+    return OutboxEvent.objects.bulk_create(objs)
+
+
+def event_message(event):
+    return {
+        'id': event.pk,
+        'type': event.event_type,
+        'user_id': event.user_id,
+        'sequence': event.sequence,
+        'aggregate_id': event.aggregate_id,
+        'payload': event.payload,
+        'created': event.created.isoformat(),
+    }
+
+
+class InMemoryPublisher:
+    """Публикатор в память процесса — для тестов и локального запуска без Redis"""
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, messages):
+        self.messages.extend(messages)
+
+
+class RedisStreamPublisher:
+    """
+    XADD в Redis Stream одним пайплайном на пачку. Stream хранит порядок и
+    позволяет потребителям (consumer groups) дочитать пропущенное после простоя.
+    """
+
+    def __init__(self, url=None, stream=None, maxlen=None):
+        if redis is None:
+            raise ImproperlyConfigured("RedisStreamPublisher requires the redis package.")
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.stream = stream or settings.OUTBOX_STREAM
+        self.maxlen = maxlen or settings.OUTBOX_STREAM_MAXLEN
+
+    def publish(self, messages):
+        pipeline = self.client.pipeline(transaction=False)
+        for message in messages:
+            pipeline.xadd(self.stream, {
+                'id': message['id'],
+                'type': message['type'],
+                'user_id': message['user_id'],
+                'sequence': message['sequence'],
+                'data': json.dumps(message, cls=DjangoJSONEncoder),
+            }, maxlen=self.maxlen, approximate=True)
+        pipeline.execute()
+
+
+def get_publisher():
+    return import_string(settings.OUTBOX_PUBLISHER)()
+
+
+def dispatch(publisher, batch_size=None):
+    """
+    Опубликовать следующую пачку событий по возрастанию id, вернуть их число.
+    На PostgreSQL select_for_update заставляет параллельные диспетчеры ждать друг
+    друга; порядок внутри пользователя потребители восстанавливают по sequence
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update()
+            .filter(published_at__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+        # Если публикация упадет, транзакция откатится и пачка уйдет повторно
+        publisher.publish([event_message(event) for event in events])
+        OutboxEvent.objects.filter(id__in=[event.pk for event in events]).update(published_at=timezone.now())
+    return len(events)
+
+
+def purge_published(older_than=None, chunk_size=1000):
+    """Удалить опубликованные события старше OUTBOX_RETENTION пачками, вернуть их число"""
+    cutoff = timezone.now() - (older_than if older_than is not None else settings.OUTBOX_RETENTION)
+    deleted = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(published_at__lt=cutoff)
+            .order_by('published_at')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.filter(id__in=ids).delete()[0]
+
@@ -0,0 +1,77 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагинация по (created, id) от новых к старым.
+    Следующая страница выбирается условием по индексу, а не OFFSET,
+    поэтому стоимость страницы не растет с ее номером.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return settings.CONTACTS_PAGE_SIZE
+        return max(1, min(limit, settings.CONTACTS_MAX_PAGE_SIZE))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created, pk = base64.urlsafe_b64decode(encoded.encode()).decode().rsplit('|', 1)
+            created = parse_datetime(created)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created, pk
+
+    def encode_cursor(self, row):
+        # Строка — экземпляр модели или словарь из values()
+        created, pk = (row['created'], row['id']) if isinstance(row, dict) else (row.created, row.pk)
+        raw = f'{created.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def get_page_queryset(self, queryset, request):
+        """Срез на одну строку больше страницы: по ней видно, есть ли следующая"""
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+        if cursor:
+            created, pk = cursor
+            queryset = queryset.filter(Q(created__lt=created) | Q(created=created, id__lt=pk))
+        return queryset.order_by('-created', '-id')[:self.limit + 1]
+
+    def get_page(self, rows):
+        self.next_cursor = self.encode_cursor(rows[self.limit - 1]) if len(rows) > self.limit else None
+        return rows[:self.limit]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset для async-представлений: страница читается через async ORM"""
+        return self.get_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
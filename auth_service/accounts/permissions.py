@@ -0,0 +1,10 @@
+from rest_framework import permissions
+
+from common.auth import has_service_token
+
+
+class IsService(permissions.BasePermission):
+    """Запрос другого сервиса с общим секретом SERVICE_TOKEN, а не пользователя"""
+
+    def has_permission(self, request, view):
+        return has_service_token(request)
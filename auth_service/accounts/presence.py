@@ -0,0 +1,176 @@
+import atexit
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceBuffer:
+    """
+    Буфер отложенной записи last_seen/is_online.
+
+    Middleware только запоминает время последней активности пользователя,
+    а в базу накопленные значения уходят одним bulk_update из фонового потока:
+    раз в PRESENCE_MAX_STALENESS или сразу, как в буфере PRESENCE_FLUSH_BATCH_SIZE
+    пользователей. Запрос в базу не ходит и от ее ошибок не падает.
+    """
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, user_id):
+        """Ждет ли активность пользователя сброса в базу"""
+        return user_id in self._pending
+
+    def record(self, user_id, seen_at=None):
+        """
+        Запомнить активность пользователя. Вернуть True, если буфер полон, а фоновый
+        сброс выключен (PRESENCE_FLUSH_IN_BACKGROUND) — тогда сбрасывает вызывающий
+        """
+        with self._lock:
+            self._pending[user_id] = seen_at or timezone.now()
+            full = len(self._pending) >= settings.PRESENCE_FLUSH_BATCH_SIZE
+        if not settings.PRESENCE_FLUSH_IN_BACKGROUND:
+            return full
+        self.start()
+        if full:
+            self._wakeup.set()
+        return False
+
+    def start(self):
+        """Запустить фоновый сброс; после fork поток в дочернем процессе запускается заново"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='presence-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while settings.PRESENCE_FLUSH_IN_BACKGROUND:
+            self._wakeup.wait(settings.PRESENCE_MAX_STALENESS.total_seconds())
+            self._wakeup.clear()
+            if not settings.PRESENCE_FLUSH_IN_BACKGROUND:
+                break
+            self.flush()
+            # У потока свое соединение: закрываем по CONN_MAX_AGE, как после запроса
+            close_old_connections()
+
+    def flush(self):
+        """Записать накопленные значения в базу, вернуть число обновленных профилей"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            profiles = list(Profile.objects.filter(user_id__in=pending).only('id', 'user_id'))
+            for profile in profiles:
+                profile.last_seen = pending[profile.user_id]
+                profile.is_online = True
+            Profile.objects.bulk_update(profiles, ['last_seen', 'is_online'],
+                                        batch_size=settings.PRESENCE_FLUSH_BATCH_SIZE)
+        except Exception:
+            # Возвращаем значения в буфер, не затирая более свежие, и пробуем в следующий раз
+            logger.exception("Failed to flush presence of %d users", len(pending))
+            with self._lock:
+                for user_id, seen_at in pending.items():
+                    self._pending.setdefault(user_id, seen_at)
+            return 0
+        return len(profiles)
+
+
+class PresenceStore:
+    """
+    Хранилище присутствия в кэше (Redis или память процесса).
+
+    Ключ пользователя живет PRESENCE_ONLINE_WINDOW: пока он есть, пользователь онлайн.
+    Чтение никогда не пишет в базу, статус многих пользователей читается одним get_many.
+    """
+    key_prefix = 'presence:'
+
+    @property
+    def cache(self):
+        return caches[settings.PRESENCE_CACHE]
+
+    def make_key(self, user_id):
+        return f'{self.key_prefix}{user_id}'
+
+    def touch(self, user_id, seen_at=None):
+        """Отметить пользователя онлайн"""
+        self.cache.set(self.make_key(user_id), seen_at or timezone.now(),
+                       timeout=settings.PRESENCE_ONLINE_WINDOW.total_seconds())
+
+    async def atouch(self, user_id, seen_at=None):
+        await self.cache.aset(self.make_key(user_id), seen_at or timezone.now(),
+                              timeout=settings.PRESENCE_ONLINE_WINDOW.total_seconds())
+
+    def get_many(self, user_ids):
+        """Вернуть {user_id: {'is_online', 'last_seen'}} для существующих пользователей"""
+        keys = {self.make_key(user_id): user_id for user_id in user_ids}
+        cached = self.cache.get_many(keys)
+        result = {
+            keys[key]: {'is_online': True, 'last_seen': seen_at}
+            for key, seen_at in cached.items()
+        }
+
+        # Для остальных берем last_seen из базы одним запросом (без загрузки профилей)
+        missing = [user_id for user_id in keys.values() if user_id not in result]
+        if missing:
+            threshold = timezone.now() - settings.PRESENCE_ONLINE_WINDOW
+            rows = Profile.objects.filter(user_id__in=missing).values_list('user_id', 'last_seen')
+            for user_id, last_seen in rows:
+                result[user_id] = {
+                    'is_online': last_seen is not None and last_seen >= threshold,
+                    'last_seen': last_seen,
+                }
+        return result
+
+    def is_online(self, user_id):
+        state = self.get_many([user_id]).get(user_id)
+        return bool(state and state['is_online'])
+
+    async def ais_online(self, user_id):
+        """is_online для async-представлений"""
+        if await self.cache.aget(self.make_key(user_id)) is not None:
+            return True
+        last_seen = await Profile.objects.filter(user_id=user_id).values_list('last_seen', flat=True).afirst()
+        return last_seen is not None and last_seen >= timezone.now() - settings.PRESENCE_ONLINE_WINDOW
+
+
+presence_buffer = PresenceBuffer()
+presence_store = PresenceStore()
+
+
+def mark_seen(user_id):
+    """Отметить активность пользователя: сразу в кэше, в базе — отложенно"""
+    seen_at = timezone.now()
+    presence_store.touch(user_id, seen_at)
+    if presence_buffer.record(user_id, seen_at):
+        presence_buffer.flush()
+
+
+async def amark_seen(user_id):
+    """mark_seen для async-кода: в поток уходим, только когда буфер пора сбросить в базу"""
+    seen_at = timezone.now()
+    await presence_store.atouch(user_id, seen_at)
+    if presence_buffer.record(user_id, seen_at):
+        await sync_to_async(presence_buffer.flush)()
+
+
+# При обычной остановке сбрасываем остаток буфера. После SIGKILL теряется не больше
+# PRESENCE_MAX_STALENESS обновлений last_seen, статус онлайн при этом остается в кэше
+atexit.register(presence_buffer.flush)
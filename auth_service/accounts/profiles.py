@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import record_cache
+
+
+class ProfileCache:
+    """
+    Сериализованные профили в кэше с версией на пользователя.
+
+    Ключ записи содержит версию, а версия — время последнего изменения профиля
+    или пользователя (нс). Сброс меняет только версию (см. accounts.signals),
+    поэтому запоздавшая запись старых данных уходит под старый ключ и не читается.
+    Версия же служит Last-Modified для условных запросов.
+    """
+    key_prefix = 'profile:'
+    version_prefix = 'profile:version:'
+
+    @property
+    def cache(self):
+        return caches[settings.PROFILE_CACHE]
+
+    def version(self, user_id):
+        key = f'{self.version_prefix}{user_id}'
+        version = self.cache.get(key)
+        if version is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key) or time.time_ns()
+        return version
+
+    def get(self, user_id, variant, build):
+        """Вернуть (данные, время изменения); при промахе данные строит build()"""
+        version = self.version(user_id)
+        key = f'{self.key_prefix}{variant}:{user_id}:{version}'
+        data = self.cache.get(key)
+        record_cache('profile', hits=int(data is not None), misses=int(data is None))
+        if data is None:
+            data = dict(build())
+            self.cache.set(key, data, timeout=settings.PROFILE_CACHE_TTL.total_seconds())
+        return data, datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+    async def aversion(self, user_id):
+        key = f'{self.version_prefix}{user_id}'
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+            version = await self.cache.aget(key) or time.time_ns()
+        return version
+
+    async def aget(self, user_id, variant, build):
+        """get для async-представлений, build — корутинная функция"""
+        version = await self.aversion(user_id)
+        key = f'{self.key_prefix}{variant}:{user_id}:{version}'
+        data = await self.cache.aget(key)
+        record_cache('profile', hits=int(data is not None), misses=int(data is None))
+        if data is None:
+            data = dict(await build())
+            await self.cache.aset(key, data, timeout=settings.PROFILE_CACHE_TTL.total_seconds())
+        return data, datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+    def invalidate(self, *user_ids):
+        version = time.time_ns()
+        self.cache.set_many({f'{self.version_prefix}{user_id}': version for user_id in user_ids}, timeout=None)
+
+
+def host_variant(request, variant):
+    """Вариант записи с абсолютными ссылками (аватар): для каждого хоста свой"""
+    return f'{variant}:{request.build_absolute_uri("/")}'
+
+
+profile_cache = ProfileCache()
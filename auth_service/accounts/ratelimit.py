@@ -0,0 +1,298 @@
+"""
+Ограничение частоты запросов к эндпоинтам входа и регистрации по IP и по username.
+
+Скользящее окно из двух счетчиков: оценка = предыдущее окно * доля, которая еще
+попадает в скользящий интервал, + текущее окно. В Redis все счетчики запроса
+обновляются одним пайплайном — один round trip; без Redis используется счетчик
+в памяти процесса. Отказ дешевый: 429 возвращается в process_view, до парсинга
+в DRF, запросов к базе и хэширования пароля. Под ASGI проверка идет прямо в
+event loop (асинхронный клиент Redis), без перехода в синхронный поток.
+
+IP клиента — REMOTE_ADDR, а за прокси из RATE_LIMIT_TRUSTED_PROXIES — последний
+адрес X-Forwarded-For, добавленный не доверенным прокси. Заголовок от остальных
+клиентов игнорируется: иначе его подменой обходили бы лимит.
+"""
+import ipaddress
+import json
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+try:
+    import redis
+    import redis.asyncio
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Ошибки хранилища счетчиков, при которых запрос пропускается без проверки
+LIMITER_ERRORS = (redis.RedisError,) if redis else ()
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+SCOPES = ('ip', 'username')
+
+
+def parse_limit(value):
+    """'username:5/m' -> ('username', 5, 60)"""
+    try:
+        scope, rate = value.split(':')
+        count, period = rate.split('/')
+        # Только точные единицы: '5/min' или '5/month' не должны молча стать минутой
+        limit = scope, int(count), PERIODS[period]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f"Invalid rate limit {value!r}, expected '<scope>:<count>/<s|m|h|d>'.")
+    if scope not in SCOPES:
+        raise ImproperlyConfigured(f"Unknown rate limit scope {scope!r}, expected one of {SCOPES}.")
+    return limit
+
+
+def _estimate(previous, current, elapsed):
+    return previous * (1 - elapsed) + current
+
+
+class MemoryRateLimiter:
+    """Счетчики в памяти процесса: для локального запуска и тестов, у каждого воркера свои"""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MEMORY_KEYS
+        self._windows = {}  # key -> [номер окна, счетчик текущего, счетчик предыдущего]
+        self._lock = threading.Lock()
+
+    def hit(self, buckets, now=None):
+        """Учесть запрос в корзинах [(key, period), ...], вернуть оценки числа запросов за period"""
+        now = time.time() if now is None else now
+        estimates = []
+        with self._lock:
+            if len(self._windows) > self.max_keys:
+                self._evict(now)
+                if len(self._windows) > self.max_keys:
+                    # Все ключи активны: лучше забыть счетчики, чем расти без предела
+                    self._windows.clear()
+            for key, period in buckets:
+                window, elapsed = divmod(now / period, 1)
+                state = self._windows.get((key, period))
+                if state is None or state[0] < window - 1:
+                    state = self._windows[(key, period)] = [window, 0, 0]
+                elif state[0] == window - 1:
+                    state[:] = [window, 0, state[1]]
+                state[1] += 1
+                estimates.append(_estimate(state[2], state[1], elapsed))
+        return estimates
+
+    async def ahit(self, buckets, now=None):
+        # Только словарь в памяти под коротким локом: event loop не блокируется
+        return self.hit(buckets, now)
+
+    def _evict(self, now):
+        # Ключи, которые уже не влияют на оценку: их окна закончились раньше предыдущего
+        for (key, period), state in list(self._windows.items()):
+            if state[0] < now // period - 1:
+                del self._windows[(key, period)]
+
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+
+class RedisRateLimiter:
+    """Счетчики в Redis, общие для всех воркеров: INCR/EXPIRE текущего окна и GET предыдущего"""
+
+    def __init__(self, url=None):
+        if redis is None:
+            raise ImproperlyConfigured("RedisRateLimiter requires the redis package.")
+        self.client = redis.Redis.from_url(url or settings.REDIS_URL)
+        self.async_client = redis.asyncio.Redis.from_url(url or settings.REDIS_URL)
+
+    def _pipeline(self, pipeline, buckets, now):
+        elapsed = []
+        for key, period in buckets:
+            window, fraction = divmod(now / period, 1)
+            current = f'{settings.RATE_LIMIT_KEY_PREFIX}{key}:{period}:{int(window)}'
+            previous = f'{settings.RATE_LIMIT_KEY_PREFIX}{key}:{period}:{int(window) - 1}'
+            pipeline.incr(current)
+            pipeline.expire(current, 2 * period)
+            pipeline.get(previous)
+            elapsed.append(fraction)
+        return elapsed
+
+    @staticmethod
+    def _estimates(replies, elapsed):
+        return [
+            _estimate(int(replies[index * 3 + 2] or 0), replies[index * 3], fraction)
+            for index, fraction in enumerate(elapsed)
+        ]
+
+    def hit(self, buckets, now=None):
+        now = time.time() if now is None else now
+        pipeline = self.client.pipeline(transaction=False)
+        elapsed = self._pipeline(pipeline, buckets, now)
+        return self._estimates(pipeline.execute(), elapsed)
+
+    async def ahit(self, buckets, now=None):
+        now = time.time() if now is None else now
+        pipeline = self.async_client.pipeline(transaction=False)
+        elapsed = self._pipeline(pipeline, buckets, now)
+        return self._estimates(await pipeline.execute(), elapsed)
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{settings.RATE_LIMIT_KEY_PREFIX}*'):
+            self.client.delete(key)
+
+
+@lru_cache(maxsize=None)
+def rate_limiter():
+    return import_string(settings.RATE_LIMITER)()
+
+
+@receiver(setting_changed)
+def reset_rate_limiter(setting, **kwargs):
+    if setting == 'RATE_LIMITER':
+        rate_limiter.cache_clear()
+
+
+def route_limits(route):
+    return tuple(parse_limit(value) for value in settings.RATE_LIMITS.get(route, ()))
+
+
+@lru_cache(maxsize=None)
+def trusted_proxies():
+    return tuple(ipaddress.ip_network(value, strict=False) for value in settings.RATE_LIMIT_TRUSTED_PROXIES)
+
+
+@receiver(setting_changed)
+def reset_trusted_proxies(setting, **kwargs):
+    if setting == 'RATE_LIMIT_TRUSTED_PROXIES':
+        trusted_proxies.cache_clear()
+
+
+def _is_trusted(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies())
+
+
+def client_ip(request):
+    """Адрес клиента с учетом X-Forwarded-For от доверенных прокси"""
+    address = request.META.get('REMOTE_ADDR')
+    if not address or not _is_trusted(address):
+        return address
+    forwarded = [value.strip() for value in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if value.strip()]
+    # Справа налево: каждый доверенный прокси дописывает адрес того, кто к нему пришел
+    for hop in reversed(forwarded):
+        if not _is_trusted(hop):
+            return hop
+        address = hop
+    return address
+
+
+def request_username(request):
+    """username из тела запроса входа; тело читается один раз и остается доступным DRF"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    else:
+        data = request.POST
+    username = data.get('username') if hasattr(data, 'get') else None
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+def retry_after(estimate, count, period, now):
+    """Секунд до того, как оценка опустится ниже лимита при отсутствии новых запросов"""
+    elapsed = now % period
+    # Остаток текущего окна, затем доля следующего, за которую "вытечет" лишнее
+    return max(1, math.ceil(period - elapsed + period * max(0.0, 1 - count / estimate)))
+
+
+class RateLimitMiddleware:
+    """
+    Лимиты RATE_LIMITS по имени маршрута. Ставится до AuthenticationMiddleware и
+    сессий: решение принимается по IP и телу запроса, без обращений к базе.
+    Проверка в __call__, а не в process_view: синхронный process_view Django
+    под ASGI выполнял бы через sync_to_async в единственном синхронном потоке.
+    При недоступном Redis запросы пропускаются — доступность важнее лимита.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        route, checks = self.checks(request)
+        response = None
+        if checks:
+            now = time.time()
+            try:
+                estimates = rate_limiter().hit([(key, period) for key, _, period in checks], now)
+            except LIMITER_ERRORS:
+                logger.warning("Rate limiter is unavailable, request to %s is not limited", route, exc_info=True)
+            else:
+                response = self.verdict(checks, estimates, now)
+        return response if response is not None else self.get_response(request)
+
+    async def __acall__(self, request):
+        route, checks = self.checks(request)
+        response = None
+        if checks:
+            now = time.time()
+            try:
+                estimates = await rate_limiter().ahit([(key, period) for key, _, period in checks], now)
+            except LIMITER_ERRORS:
+                logger.warning("Rate limiter is unavailable, request to %s is not limited", route, exc_info=True)
+            else:
+                response = self.verdict(checks, estimates, now)
+        return response if response is not None else await self.get_response(request)
+
+    @staticmethod
+    def checks(request):
+        """(маршрут, [(ключ, лимит, период), ...]) — проверки, которые нужны запросу"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return None, []
+        try:
+            route = resolve(request.path_info, getattr(request, 'urlconf', None)).url_name
+        except Resolver404:
+            return None, []
+        limits = route_limits(route)
+        if not limits:
+            return route, []
+
+        values = {'ip': client_ip(request)}
+        if any(scope == 'username' for scope, _, _ in limits):
+            values['username'] = request_username(request)
+        checks = [(f'{route}:{scope}:{values[scope]}', count, period)
+                  for scope, count, period in limits if values.get(scope)]
+        return route, checks
+
+    @staticmethod
+    def verdict(checks, estimates, now):
+        """429 с Retry-After, если хотя бы один лимит превышен"""
+        exceeded = [
+            retry_after(estimate, count, period, now)
+            for (_, count, period), estimate in zip(checks, estimates) if estimate > count
+        ]
+        if not exceeded:
+            return None
+        response = JsonResponse({"detail": "Too many requests, retry later."}, status=429)
+        response['Retry-After'] = str(max(exceeded))
+        return response
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class RevocationList:
+    """
+    Отозванные refresh-токены (JTI) в памяти процесса.
+
+    Проверка токена не ходит в базу: отзывы из этого процесса попадают в набор сразу,
+    а отзывы из других воркеров подтягиваются из BlacklistedToken инкрементально
+    (по id) не реже чем раз в JWT_REVOCATION_SYNC_INTERVAL. Истекшие JTI выбрасываются.
+
+    id выдаются до коммита, поэтому строка с меньшим id может появиться позже
+    уже прочитанных. Курсор (_floor_id) сдвигается только за строки старше
+    JWT_REVOCATION_SYNC_OVERLAP, более свежие перечитываются при каждой синхронизации.
+    """
+    def __init__(self):
+        self._expires = {}
+        self._floor_id = 0
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expires)
+
+    def add(self, jti, exp):
+        """Добавить отозванный JTI, exp — время истечения токена (unix time)"""
+        with self._lock:
+            self._expires[jti] = exp
+
+    def contains(self, jti):
+        if self._synced_at is None or \
+                time.monotonic() - self._synced_at >= settings.JWT_REVOCATION_SYNC_INTERVAL.total_seconds():
+            self.sync()
+        return jti in self._expires
+
+    def sync(self):
+        """Подтянуть новые записи черного списка и выбросить истекшие JTI"""
+        now = timezone.now()
+        settled = now - settings.JWT_REVOCATION_SYNC_OVERLAP
+        rows = (
+            BlacklistedToken.objects
+            .filter(id__gt=self._floor_id)
+            .order_by('id')
+            .values_list('id', 'blacklisted_at', 'token__jti', 'token__expires_at')
+        )
+        with self._lock:
+            advancing = True
+            for row_id, blacklisted_at, jti, expires_at in rows.iterator(chunk_size=2000):
+                # Курсор идет только по непрерывному префиксу устоявшихся строк
+                if advancing and blacklisted_at < settled:
+                    self._floor_id = row_id
+                else:
+                    advancing = False
+                if expires_at > now:
+                    self._expires[jti] = expires_at.timestamp()
+            now_ts = now.timestamp()
+            self._expires = {jti: exp for jti, exp in self._expires.items() if exp > now_ts}
+            self._synced_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._expires = {}
+            self._floor_id = 0
+            self._synced_at = None
+
+
+revocation_list = RevocationList()
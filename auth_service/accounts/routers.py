@@ -0,0 +1,121 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import jwt
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_KEY_PREFIX = 'db:pin:'
+
+# Реплика, с которой читает текущий запрос, или None — читать с primary. ContextVar,
+# а не threading.local, чтобы значение не протекало между корутинами под ASGI
+_replica = ContextVar('replica', default=None)
+
+
+@contextmanager
+def read_from_replica(enabled=True):
+    """
+    Направить чтения внутри блока на реплики (вне запроса по умолчанию читаем с primary).
+    Реплика выбирается один раз на весь блок: все чтения запроса видят одно и то же
+    состояние и идут по одному соединению.
+    """
+    replica = random.choice(settings.DATABASE_REPLICAS) if enabled and settings.DATABASE_REPLICAS else None
+    token = _replica.set(replica)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Запись — в primary ('default'), чтение — на реплику, выбранную для запроса в
+    DatabaseRoutingMiddleware (безопасный метод и пользователь недавно ничего
+    не писал). Без реплик все идет в primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _replica.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему репликацией
+        return db == 'default'
+
+
+def _pin_cache():
+    return caches[settings.DATABASE_ROUTING_CACHE]
+
+
+def request_user_id(request):
+    """
+    id пользователя из JWT без проверки подписи: нужен только для выбора базы,
+    поддельный токен в худшем случае отправит чтения в primary.
+    """
+    header = request.META.get(api_settings.AUTH_HEADER_NAME, '').split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        payload = jwt.decode(header[1], options={'verify_signature': False})
+    except jwt.InvalidTokenError:
+        return None
+    return payload.get(api_settings.USER_ID_CLAIM)
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для GET/HEAD/OPTIONS. После успешной записи
+    пользователь DATABASE_READ_YOUR_WRITES читает только из primary, чтобы
+    видеть свои изменения, пока реплики догоняют.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        user_id = request_user_id(request)
+        use_replica = self.use_replica(request, user_id, pinned=lambda: _pin_cache().get(f'{PIN_KEY_PREFIX}{user_id}'))
+        with read_from_replica(use_replica):
+            response = self.get_response(request)
+        if self.should_pin(request, user_id, response):
+            _pin_cache().set(f'{PIN_KEY_PREFIX}{user_id}', True,
+                             timeout=settings.DATABASE_READ_YOUR_WRITES.total_seconds())
+        return response
+
+    async def __acall__(self, request):
+        user_id = request_user_id(request)
+        pinned = await _pin_cache().aget(f'{PIN_KEY_PREFIX}{user_id}') if user_id is not None else None
+        use_replica = self.use_replica(request, user_id, pinned=lambda: pinned)
+        with read_from_replica(use_replica):
+            response = await self.get_response(request)
+        if self.should_pin(request, user_id, response):
+            await _pin_cache().aset(f'{PIN_KEY_PREFIX}{user_id}', True,
+                                    timeout=settings.DATABASE_READ_YOUR_WRITES.total_seconds())
+        return response
+
+    def use_replica(self, request, user_id, pinned):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return False
+        return user_id is None or not pinned()
+
+    def should_pin(self, request, user_id, response):
+        return (settings.DATABASE_REPLICAS and user_id is not None
+                and request.method not in SAFE_METHODS and response.status_code < 400)
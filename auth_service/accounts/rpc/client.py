@@ -0,0 +1,91 @@
+import itertools
+import queue
+import socket
+import threading
+
+from . import protocol
+
+
+class RPCClient:
+    """
+    Клиент бинарного протокола auth_service с пулом постоянных соединений.
+    Потокобезопасен: каждый вызов берет свободное соединение из пула.
+    secret — общий секрет сервисов (SERVICE_TOKEN), отправляется при подключении.
+    Не зависит от Django.
+    """
+    def __init__(self, host, port, secret, pool_size=8, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.timeout = timeout
+        self._pool = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._ids = itertools.count(1)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            status, body = self._exchange(sock, 0, protocol.AUTH, {'secret': self.secret})
+        except Exception:
+            sock.close()
+            raise
+        if status != protocol.OK:
+            sock.close()
+            raise protocol.RPCError(body.get('error') if body else 'Authentication failed')
+        return sock
+
+    def _read_exactly(self, sock, size):
+        chunks = []
+        while size:
+            chunk = sock.recv(size)
+            if not chunk:
+                raise ConnectionError("RPC connection closed")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def _exchange(self, sock, request_id, method, payload):
+        sock.sendall(protocol.encode_frame(request_id, method, payload))
+        length, response_id, status = protocol.decode_header(self._read_exactly(sock, protocol.HEADER.size))
+        body = protocol.decode_body(self._read_exactly(sock, length))
+        if response_id != request_id:
+            raise protocol.ProtocolError("Response id does not match request id")
+        return status, body
+
+    def call(self, method, payload):
+        request_id = next(self._ids) % 2 ** 32
+        self._slots.acquire()
+        try:
+            try:
+                sock = self._pool.get_nowait()
+            except queue.Empty:
+                sock = self._connect()
+            try:
+                status, body = self._exchange(sock, request_id, method, payload)
+            except Exception:
+                sock.close()
+                raise
+            self._pool.put(sock)
+        finally:
+            self._slots.release()
+
+        if status != protocol.OK:
+            raise protocol.RPCError(body.get('error') if body else 'RPC error')
+        return body
+
+    def validate_token(self, token):
+        return self.call(protocol.VALIDATE_TOKEN, {'token': token})
+
+    def get_users(self, ids):
+        return self.call(protocol.GET_USERS, {'ids': list(ids)})
+
+    def check_connection(self, user_id, other_id):
+        return self.call(protocol.CHECK_CONNECTION, {'user_id': user_id, 'other_id': other_id})['connected']
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,50 @@
+"""
+Бинарный протокол внутренних вызовов auth_service.
+
+Кадр: заголовок !IIB (длина тела, id запроса, код метода или статуса) и тело в JSON.
+Первый кадр каждого соединения — AUTH с общим секретом сервисов {"secret": ...};
+без него сервер не выполняет вызовов и закрывает соединение.
+Модуль не зависит от Django, чтобы клиент можно было скопировать в другие сервисы.
+"""
+import json
+import struct
+
+HEADER = struct.Struct('!IIB')
+MAX_FRAME_SIZE = 4 * 1024 * 1024
+MAX_AUTH_FRAME_SIZE = 1024  # Неаутентифицированный клиент не может заставить читать большой кадр
+
+# Методы
+AUTH = 0
+VALIDATE_TOKEN = 1
+GET_USERS = 2
+CHECK_CONNECTION = 3
+
+# Статусы ответа
+OK = 0
+ERROR = 1
+
+
+class ProtocolError(Exception):
+    """Некорректный или слишком большой кадр"""
+
+
+class RPCError(Exception):
+    """Сервер вернул ошибку"""
+
+
+def encode_frame(request_id, code, payload):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    if len(body) > MAX_FRAME_SIZE:
+        raise ProtocolError("Frame is too large")
+    return HEADER.pack(len(body), request_id, code) + body
+
+
+def decode_header(header):
+    length, request_id, code = HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError("Frame is too large")
+    return length, request_id, code
+
+
+def decode_body(body):
+    return json.loads(body) if body else None
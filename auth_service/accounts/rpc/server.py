@@ -0,0 +1,141 @@
+import asyncio
+import hmac
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.directory import get_compact_users
+from accounts.graph import contact_graph
+from accounts.tokens import AccessToken
+
+from . import protocol
+
+logger = logging.getLogger(__name__)
+
+
+def validate_token(payload):
+    """Проверить access-токен и активность пользователя"""
+    try:
+        token = AccessToken(payload['token'])
+        user = CachedJWTAuthentication().get_user(token)
+    except (TokenError, AuthenticationFailed) as e:
+        return {'valid': False, 'detail': str(e)}
+    return {'valid': True, 'user_id': user.pk, 'exp': token['exp']}
+
+
+def get_users(payload):
+    ids = {int(user_id) for user_id in payload['ids']}
+    if len(ids) > settings.USERS_BATCH_LIMIT:
+        raise ValueError(f"No more than {settings.USERS_BATCH_LIMIT} users per request")
+    return {str(user_id): data for user_id, data in get_compact_users(ids).items()}
+
+
+def check_connection(payload):
+    return {'connected': contact_graph.is_connected(int(payload['user_id']), int(payload['other_id']))}
+
+
+HANDLERS = {
+    protocol.VALIDATE_TOKEN: validate_token,
+    protocol.GET_USERS: get_users,
+    protocol.CHECK_CONNECTION: check_connection,
+}
+
+
+def dispatch(method, payload):
+    """Вызвать обработчик метода, вернуть (статус, тело ответа)"""
+    handler = HANDLERS.get(method)
+    if handler is None:
+        return protocol.ERROR, {'error': f'Unknown method {method}'}
+    try:
+        return protocol.OK, handler(payload or {})
+    except (KeyError, TypeError, ValueError) as e:
+        return protocol.ERROR, {'error': f'Bad request: {e}'}
+    except Exception:
+        logger.exception("RPC method %s failed", method)
+        return protocol.ERROR, {'error': 'Internal error'}
+
+
+def handle_request(method, payload):
+    """dispatch в потоке пула: как и Django на каждый HTTP-запрос, закрываем устаревшие соединения с базой"""
+    close_old_connections()
+    try:
+        return dispatch(method, payload)
+    finally:
+        close_old_connections()
+
+
+class RPCServer:
+    """
+    asyncio-сервер бинарного протокола, работает рядом с Django-приложением.
+
+    Соединения долгоживущие, запросы в одном соединении можно слать конвейером:
+    ответы приходят по мере готовности с тем же id запроса. Обработчики с ORM
+    выполняются в пуле из RPC_WORKERS потоков. Каждое соединение сначала
+    проходит рукопожатие AUTH с SERVICE_TOKEN; порт — только для внутренней сети.
+    """
+    def __init__(self, workers=None, secret=None):
+        self.secret = secret or settings.SERVICE_TOKEN
+        if not self.secret:
+            raise ImproperlyConfigured("SERVICE_TOKEN must be set to run the RPC server.")
+        self.executor = ThreadPoolExecutor(max_workers=workers or settings.RPC_WORKERS,
+                                           thread_name_prefix='rpc')
+
+    async def start(self, host, port):
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def authenticate(self, reader, writer):
+        """Прочитать кадр AUTH и ответить на него, вернуть True, если секрет верный"""
+        timeout = settings.RPC_HANDSHAKE_TIMEOUT.total_seconds()
+        header = await asyncio.wait_for(reader.readexactly(protocol.HEADER.size), timeout)
+        length, request_id, method = protocol.decode_header(header)
+        if method != protocol.AUTH or length > protocol.MAX_AUTH_FRAME_SIZE:
+            writer.write(protocol.encode_frame(request_id, protocol.ERROR, {'error': 'Authentication required'}))
+            await writer.drain()
+            return False
+
+        payload = protocol.decode_body(await asyncio.wait_for(reader.readexactly(length), timeout))
+        secret = payload.get('secret') if isinstance(payload, dict) else None
+        valid = isinstance(secret, str) and hmac.compare_digest(secret.encode(), self.secret.encode())
+        if valid:
+            writer.write(protocol.encode_frame(request_id, protocol.OK, {}))
+        else:
+            logger.warning("Rejected RPC connection from %s: bad service secret", writer.get_extra_info('peername'))
+            writer.write(protocol.encode_frame(request_id, protocol.ERROR, {'error': 'Authentication failed'}))
+        await writer.drain()
+        return valid
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request_id, method, payload):
+            status, result = await loop.run_in_executor(self.executor, handle_request, method, payload)
+            async with write_lock:
+                writer.write(protocol.encode_frame(request_id, status, result))
+                await writer.drain()
+
+        try:
+            if not await self.authenticate(reader, writer):
+                return
+            while True:
+                header = await reader.readexactly(protocol.HEADER.size)
+                length, request_id, method = protocol.decode_header(header)
+                payload = protocol.decode_body(await reader.readexactly(length))
+                task = asyncio.create_task(respond(request_id, method, payload))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.TimeoutError):
+            pass
+        except (protocol.ProtocolError, ValueError):
+            logger.warning("Closing RPC connection after a malformed frame")
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
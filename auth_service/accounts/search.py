@@ -0,0 +1,57 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .cache import LRUCache
+from .models import CustomUser
+
+RESULT_FIELDS = ('id', 'username', 'first_name', 'last_name')
+SEARCH_FIELDS = ('username', 'first_name', 'last_name', 'email')
+MAX_TERMS = 5
+
+# Результаты популярных префиксов; короткий TTL, чтобы переименования быстро попадали в выдачу
+search_cache = LRUCache(settings.USER_SEARCH_CACHE_SIZE, settings.USER_SEARCH_CACHE_TTL.total_seconds(),
+                        name='user_search')
+
+
+def search_users(query, limit):
+    """
+    Поиск активных пользователей по началу username, имени, фамилии и email.
+    Каждое слово запроса должно быть началом хотя бы одного из полей; на SQLite
+    и PostgreSQL выдача одна и та же, по алфавиту username.
+    """
+    terms = tuple(re.findall(r'\w+', query.lower())[:MAX_TERMS])
+    if not terms:
+        return []
+
+    key = (terms, limit)
+    results = search_cache.get(key)
+    if results is None:
+        search = _search_fts5 if connection.vendor == 'sqlite' else _search_prefix
+        results = search(terms, limit)
+        search_cache.set(key, results)
+    return results
+
+
+def _search_fts5(terms, limit):
+    # Индекс accounts_user_search (миграции 0006 и 0010). ^ — первый токен колонки,
+    # то есть начало значения поля, как istartswith: домен email или вторая часть
+    # username не совпадают
+    match = ' '.join(f'^"{term}"*' for term in terms)
+    matched = RawSQL('SELECT rowid FROM accounts_user_search WHERE accounts_user_search MATCH %s', [match])
+    return _results(CustomUser.objects.filter(id__in=matched), limit)
+
+
+def _search_prefix(terms, limit):
+    # На PostgreSQL istartswith обслуживают триграммные индексы из той же миграции
+    condition = Q()
+    for term in terms:
+        condition &= Q(*(Q(**{f'{field}__istartswith': term}) for field in SEARCH_FIELDS), _connector=Q.OR)
+    return _results(CustomUser.objects.filter(condition), limit)
+
+
+def _results(queryset, limit):
+    return list(queryset.filter(is_active=True).order_by('username').values(*RESULT_FIELDS)[:limit])
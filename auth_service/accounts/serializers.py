@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from .models import CustomUser, Profile, Connections
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from .avatars import avatar_urls, store_avatar
+from .models import AccountDeletion, CustomUser, Profile, Connections
 from django.core.validators import RegexValidator
 from django.db import IntegrityError
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt import serializers as jwt_serializers
+from .tokens import RefreshToken
 
 
 class LoginSerializer(serializers.Serializer):
@@ -84,11 +88,25 @@ class UserSerializer(serializers.ModelSerializer):
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
     user = UserSerializer()
+    avatar_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ('user', 'status_message', 'bio', 'avatar', 'birthday', 'is_online', 'last_seen')
-    
+        fields = ('user', 'status_message', 'bio', 'avatar', 'avatar_thumbnails',
+                  'birthday', 'is_online', 'last_seen')
+
+    def get_avatar_thumbnails(self, obj):
+        return avatar_urls(obj.avatar.name)
+
+    def validate_avatar(self, value):
+        """Файл сохраняется в хранилище по хэшу содержимого, в профиль пишется только имя"""
+        if not value:
+            return None
+        try:
+            return store_avatar(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
     def update(self, instance, validated_data):
         # Извлечение данных пользователя
         user_data = validated_data.pop('user', None)
@@ -115,3 +133,114 @@ class ConnectionsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Connections
         fields = '__all__'
+
+
+class AccountDeletionSerializer(serializers.ModelSerializer):
+    """Прогресс отложенного удаления аккаунта"""
+
+    class Meta:
+        model = AccountDeletion
+        fields = ('id', 'status', 'connections_deleted', 'tokens_deleted', 'requested_at', 'started_at', 'completed_at')
+
+
+class CompactUserSerializer(serializers.ModelSerializer):
+    """Минимум данных пользователя для списков"""
+
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'first_name', 'last_name')
+
+
+class ContactSerializer(serializers.ModelSerializer):
+    """Связь вместе с краткими данными второго участника"""
+    contact = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Connections
+        fields = ('id', 'from_user', 'to_user', 'is_confirmed', 'created', 'contact')
+
+    def get_contact(self, obj):
+        other = obj.to_user if obj.from_user_id == self.context['request'].user.pk else obj.from_user
+        return CompactUserSerializer(other).data
+
+
+class ValuesSerializer:
+    """
+    Сериализатор только для чтения строк из queryset.values(): без ModelSerializer
+    и экземпляров моделей, вывод совпадает с соответствующим ModelSerializer.
+    """
+    values = ()  # Поля для queryset.values()
+
+    # Даты форматируются так же, как в полях DRF
+    datetime_field = serializers.DateTimeField()
+    date_field = serializers.DateField()
+
+    def __init__(self, instance, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def get_queryset(cls, queryset):
+        return queryset.values(*cls.values)
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+        return self.to_representation(self.instance)
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+
+class ProfileReadSerializer(ValuesSerializer):
+    """Профиль для чтения, вывод как у ProfileSerializer: с request в context ссылка на аватар абсолютная"""
+    values = ('id', 'user_id', 'bio', 'avatar', 'birthday', 'status_message', 'is_online', 'last_seen')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'user': row['user_id'],
+            'bio': row['bio'],
+            'avatar': self.avatar_url(row['avatar']) if row['avatar'] else None,
+            'birthday': self.date_field.to_representation(row['birthday']) if row['birthday'] else None,
+            'status_message': row['status_message'],
+            'is_online': row['is_online'],
+            'last_seen': self.datetime_field.to_representation(row['last_seen']),
+        }
+
+    def avatar_url(self, name):
+        # Как FileField в DRF: абсолютная ссылка, если известен запрос
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+
+class ContactReadSerializer(ValuesSerializer):
+    """Связь с краткими данными второго участника, вывод как у ContactSerializer"""
+    user_fields = ('id', 'username', 'first_name', 'last_name')
+    values = (
+        'id', 'from_user_id', 'to_user_id', 'is_confirmed', 'created',
+        *(f'from_user__{field}' for field in user_fields),
+        *(f'to_user__{field}' for field in user_fields),
+    )
+
+    def to_representation(self, row):
+        other = 'to_user' if row['from_user_id'] == self.context['request'].user.pk else 'from_user'
+        return {
+            'id': row['id'],
+            'from_user': row['from_user_id'],
+            'to_user': row['to_user_id'],
+            'is_confirmed': row['is_confirmed'],
+            'created': self.datetime_field.to_representation(row['created']),
+            'contact': {field: row[f'{other}__{field}'] for field in self.user_fields},
+        }
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = RefreshToken
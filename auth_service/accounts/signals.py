@@ -1,6 +1,13 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import CustomUser, Profile
+from .authentication import user_cache
+from .directory import invalidate_compact_users
+from .graph import contact_graph
+from .models import Connections, CustomUser, Profile
+from .outbox import (PROFILE_FIELDS, USER_FIELDS, connection_payload, emit,
+                     profile_payload, user_payload)
+from .profiles import profile_cache
 
 
 @receiver(post_save, sender=CustomUser)
@@ -11,4 +18,72 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=CustomUser)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+    # Профиль, который не загружали, никто не менял — лишний SELECT не нужен
+    if CustomUser.profile.is_cached(instance):
+        instance.profile.save()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk  # После удаления Django обнуляет pk у объекта
+    user_cache.invalidate(user_id)
+    # И еще раз после коммита: до него другой воркер мог закэшировать старые поля под новой версией
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
+    transaction.on_commit(lambda: invalidate_compact_users(user_id))
+    transaction.on_commit(lambda: profile_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_compact_profile(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_compact_users(instance.user_id))
+    transaction.on_commit(lambda: profile_cache.invalidate(instance.user_id))
+
+
+@receiver(post_save, sender=Connections)
+@receiver(post_delete, sender=Connections)
+def invalidate_contact_graph(sender, instance, **kwargs):
+    # Неподтвержденные запросы в графе не участвуют
+    if instance.is_confirmed:
+        # После коммита, иначе параллельный запрос успеет закэшировать старые данные
+        transaction.on_commit(lambda: contact_graph.invalidate(instance.from_user_id, instance.to_user_id))
+
+
+# События для других сервисов (accounts.outbox). post_save идет внутри транзакции
+# OutboxMixin.save(), post_delete — внутри транзакции удаления
+
+
+def _changed(update_fields, fields):
+    # update_fields=None — полное сохранение, считаем, что могло измениться все
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=CustomUser)
+def publish_user_saved(sender, instance, created, update_fields, **kwargs):
+    if created or _changed(update_fields, USER_FIELDS):
+        emit('user.created' if created else 'user.updated', instance.pk, instance.pk, user_payload(instance))
+
+
+@receiver(post_delete, sender=CustomUser)
+def publish_user_deleted(sender, instance, **kwargs):
+    emit('user.deleted', instance.pk, instance.pk, {'id': instance.pk})
+
+
+@receiver(post_save, sender=Profile)
+def publish_profile_saved(sender, instance, created, update_fields, **kwargs):
+    # Пустой профиль создается вместе с пользователем, его покрывает user.created
+    if not created and _changed(update_fields, PROFILE_FIELDS):
+        emit('profile.updated', instance.user_id, instance.user_id, profile_payload(instance))
+
+
+@receiver(post_save, sender=Connections)
+def publish_connection_saved(sender, instance, created, **kwargs):
+    event_type = 'connection.requested' if created else 'connection.confirmed' if instance.is_confirmed else None
+    if event_type:
+        emit(event_type, instance.from_user_id, instance.pk, connection_payload(instance))
+
+
+@receiver(post_delete, sender=Connections)
+def publish_connection_deleted(sender, instance, **kwargs):
+    emit('connection.deleted', instance.from_user_id, instance.pk, connection_payload(instance))
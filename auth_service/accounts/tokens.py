@@ -0,0 +1,75 @@
+import jwt
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .keys import get_keyring, get_verifying_key
+from .revocation import revocation_list
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    Бэкенд simplejwt с асимметричной подписью: токен подписывается активным
+    ключом и несет его kid, проверка идет по kid среди всех ключей набора.
+    """
+
+    def encode(self, payload):
+        key = get_keyring().active
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload['aud'] = self.audience
+        if self.issuer is not None:
+            jwt_payload['iss'] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            key.private_key,
+            algorithm=self.algorithm,
+            headers={'kid': key.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def get_verifying_key(self, token):
+        try:
+            kid = jwt.get_unverified_header(token).get('kid')
+        except jwt.InvalidTokenError as e:
+            raise TokenBackendError(_("Token is invalid")) from e
+
+        key = get_verifying_key(kid)
+        if key is None:
+            raise TokenBackendError(_("Token is invalid"))
+        return key.public_key
+
+
+token_backend = KeyRingTokenBackend(
+    api_settings.ALGORITHM,
+    audience=api_settings.AUDIENCE,
+    issuer=api_settings.ISSUER,
+    leeway=api_settings.LEEWAY,
+    json_encoder=api_settings.JSON_ENCODER,
+)
+
+
+class KeyRingTokenMixin:
+    def get_token_backend(self):
+        return token_backend
+
+
+class AccessToken(KeyRingTokenMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(KeyRingTokenMixin, tokens.RefreshToken):
+    access_token_class = AccessToken
+
+    def check_blacklist(self):
+        """Проверка по набору отозванных JTI в памяти вместо запроса к BlacklistedToken"""
+        if revocation_list.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        revocation_list.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return blacklisted
@@ -1,5 +1,10 @@
 from django.urls import path
-from .views import LoginView, LogoutView, RegisterView, DeleteView, ProfileUpdateView, ContactManagementView
+from .async_views import AsyncContactsView, AsyncLoginView, AsyncProfileView
+from .views import (
+    HashingMetricsView, LoginView, LogoutView, RegisterView, DeleteView, AccountDeletionView, ProfileUpdateView,
+    ProfileDetailView, AvatarUploadView, ContactManagementView, ContactBulkView, ContactCheckView,
+    ContactPairCheckView, MutualContactsView, ContactCountView, PresenceView, UserBatchView, UserSearchView,
+)
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -10,9 +15,25 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('login/async/', AsyncLoginView.as_view(), name='async_login'),
+    path('login/metrics/', HashingMetricsView.as_view(), name='login_metrics'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('delete-user/', DeleteView.as_view(), name='delete-user'),
+    path('delete-user/<uuid:pk>/', AccountDeletionView.as_view(), name='account_deletion'),
     path('update-user/', ProfileUpdateView.as_view(), name='update-user'),
+    path('profile/', ProfileDetailView.as_view(), name='profile'),
+    path('profile/async/', AsyncProfileView.as_view(), name='async_profile'),
+    path('update-user/avatar/', AvatarUploadView.as_view(), name='avatar_upload'),
     path('contacts/', ContactManagementView.as_view(), name='contact_management'),
     path('contacts/<int:pk>/', ContactManagementView.as_view(), name='contact_management_detail'),
+    path('contacts/async/', AsyncContactsView.as_view(), name='async_contacts'),
+    path('contacts/async/<int:pk>/', AsyncContactsView.as_view(), name='async_contacts_detail'),
+    path('contacts/bulk/', ContactBulkView.as_view(), name='contact_bulk'),
+    path('contacts/check/', ContactPairCheckView.as_view(), name='contact_pair_check'),
+    path('contacts/check/<int:user_id>/', ContactCheckView.as_view(), name='contact_check'),
+    path('contacts/mutual/<int:user_id>/', MutualContactsView.as_view(), name='contact_mutual'),
+    path('contacts/count/', ContactCountView.as_view(), name='contact_count'),
+    path('users/batch/', UserBatchView.as_view(), name='user_batch'),
+    path('users/search/', UserSearchView.as_view(), name='user_search'),
+    path('presence/', PresenceView.as_view(), name='presence'),
 ]
\ No newline at end of file
@@ -1,10 +1,33 @@
 from rest_framework import permissions, status, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import LoginSerializer, RegisterSerializer, ProfileUpdateSerializer, ProfileSerializer, ConnectionsSerializer
-from .models import Profile, Connections, CustomUser
+from .avatars import AVATAR_NAME, avatar_name, avatar_urls, ensure_thumbnail, store_avatar
+from .hashing import get_hashing_pool
+from .keys import get_keyring
+from .conditional import conditional_response
+from .deletion import request_deletion
+from .contacts import apply_contact_operations
+from .directory import get_compact_users
+from .graph import contact_graph
+from .pagination import KeysetPagination
+from .permissions import IsService
+from .serializers import (LoginSerializer, RegisterSerializer, ProfileUpdateSerializer, ProfileSerializer,
+                          ConnectionsSerializer, ContactReadSerializer, ProfileReadSerializer,
+                          AccountDeletionSerializer)
+from .models import AccountDeletion, Profile, Connections, CustomUser
+from .presence import presence_store
+from .profiles import host_variant, profile_cache
+from .search import search_users
+from .tokens import RefreshToken
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from django.urls import reverse
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import quote_etag
+from rest_framework.parsers import MultiPartParser
 
 
 class LoginView(APIView):
@@ -31,6 +54,14 @@ class LoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class HashingMetricsView(APIView):
+    """Загрузка пула хэширования паролей и задержка хэширования"""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_hashing_pool().stats(), status=status.HTTP_200_OK)
+
+
 class LogoutView(APIView):
     """Вью для выхода пользователя"""
     permission_classes = (permissions.IsAuthenticated,)
@@ -84,11 +115,27 @@ class DeleteView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def delete(self, request, *args, **kwargs):
-        """Удаление пользователя"""
-        user = request.user
-        user.delete()
+        """
+        Деактивировать пользователя и поставить удаление в очередь (accounts.deletion):
+        каскад по связям и токенам выполняет purge_accounts, а не запрос
+        """
+        job = request_deletion(request.user)
+        url = reverse('account_deletion', args=[job.pk])
+        return Response(
+            {**AccountDeletionSerializer(job).data, "progress_url": request.build_absolute_uri(url)},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url},
+        )
+
 
-        return Response({"message": "User deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
+class AccountDeletionView(generics.RetrieveAPIView):
+    """
+    Прогресс удаления аккаунта. Без аутентификации: пользователь уже деактивирован,
+    а доступ ограничивает неугадываемый UUID задачи
+    """
+    serializer_class = AccountDeletionSerializer
+    permission_classes = [permissions.AllowAny]
+    queryset = AccountDeletion.objects.all()
 
 
 class ProfileUpdateView(generics.RetrieveUpdateAPIView):
@@ -103,16 +150,62 @@ class ProfileUpdateView(generics.RetrieveUpdateAPIView):
             # Создаем профиль, если его нет
             Profile.objects.create(user=user)
         return user.profile
-    
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_profile_response(request, host_variant(request, 'update'),
+                                       lambda: self.get_serializer(self.get_object()).data)
+
 
 class ProfileDetailView(generics.RetrieveAPIView):
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def get_object(self):
-        profile = self.request.user.profile
-        profile.update_online_status()  # Обновляем статус перед возвратом профиля
-        return profile
+    def retrieve(self, request, *args, **kwargs):
+        def build():
+            row = ProfileReadSerializer.get_queryset(Profile.objects.filter(user_id=request.user.pk)).get()
+            return ProfileReadSerializer(row, context={'request': request}).data
+
+        return cached_profile_response(request, host_variant(request, 'detail'), build)
+
+
+def cached_profile_response(request, variant, build):
+    """
+    Профиль текущего пользователя из кэша (см. accounts.profiles) с ETag/Last-Modified.
+    Статус берем из кэша присутствия: в базу он пишется пачками без сигналов. last_seen
+    остается из закэшированной записи, иначе ETag менялся бы на каждом запросе.
+    """
+    data, modified = profile_cache.get(request.user.pk, variant, build)
+    data = {**data, 'is_online': presence_store.is_online(request.user.pk)}
+    return conditional_response(request, Response(data), last_modified=modified)
+
+
+class PresenceView(APIView):
+    """Статус онлайн для списка пользователей одним запросом"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """Статус пользователей из ?ids=1,2,3"""
+        raw_ids = request.query_params.get('ids', '')
+        return self.get_presence([value for value in raw_ids.split(',') if value])
+
+    def post(self, request, *args, **kwargs):
+        """Статус пользователей из тела запроса {"user_ids": [...]}"""
+        user_ids = request.data.get('user_ids')
+        if not isinstance(user_ids, list):
+            return Response({"detail": "user_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.get_presence(user_ids)
+
+    def get_presence(self, raw_ids):
+        try:
+            user_ids = {int(user_id) for user_id in raw_ids}
+        except (TypeError, ValueError):
+            return Response({"detail": "User ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(user_ids) > settings.PRESENCE_BULK_LIMIT:
+            return Response({"detail": f"No more than {settings.PRESENCE_BULK_LIMIT} users per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        presence = presence_store.get_many(user_ids)
+        return Response({str(user_id): state for user_id, state in presence.items()}, status=status.HTTP_200_OK)
 
 
 class ContactManagementView(APIView):
@@ -129,10 +222,12 @@ class ContactManagementView(APIView):
         except CustomUser.DoesNotExist:
             return Response({"detail": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if Connections.objects.filter(from_user=from_user, to_user=to_user).exists():
+        # Повторный запрос отсекает ограничение unique_connection, без отдельной проверки exists()
+        try:
+            with transaction.atomic():
+                connection = Connections.objects.create(from_user=from_user, to_user=to_user)
+        except IntegrityError:
             return Response({"detail": "Request already sent"}, status=status.HTTP_400_BAD_REQUEST)
-
-        connection = Connections.objects.create(from_user=from_user, to_user=to_user)
         return Response(ConnectionsSerializer(connection).data, status=status.HTTP_201_CREATED)
 
     def patch(self, request, *args, **kwargs):
@@ -161,13 +256,197 @@ class ContactManagementView(APIView):
         return Response({"detail": "Connection removed"}, status=status.HTTP_204_NO_CONTENT)
 
     def get(self, request, *args, **kwargs):
-        """Получить список всех подтвержденных контактов"""
+        """Получить страницу подтвержденных контактов (?cursor=...&limit=...)"""
         user = request.user
-        # Получаем все подтвержденные связи, где текущий пользователь участвует как from_user или to_user
-        confirmed_connections = Connections.objects.filter(
+        # Подтвержденные связи, где текущий пользователь участвует как from_user или to_user,
+        # данные обоих участников приходят тем же запросом через JOIN сразу словарями
+        confirmed_connections = ContactReadSerializer.get_queryset(Connections.objects.filter(
             Q(from_user=user) | Q(to_user=user),
             is_confirmed=True
-        )
+        ))
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(confirmed_connections, request, view=self)
+        serializer = ContactReadSerializer(page, many=True, context={'request': request})
+        return conditional_response(request, paginator.get_paginated_response(serializer.data))
+
+
+class JWKSView(APIView):
+    """Публичные ключи подписи JWT для проверки токенов в других сервисах"""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        response = Response(get_keyring().jwks, status=status.HTTP_200_OK)
+        response['Cache-Control'] = f'public, max-age={settings.JWKS_CACHE_MAX_AGE}'
+        return response
+
+
+class AvatarUploadView(APIView):
+    """Загрузка и удаление аватара текущего пользователя"""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def put(self, request, *args, **kwargs):
+        upload = request.FILES.get('avatar')
+        if upload is None:
+            return Response({"detail": "avatar file is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            name = store_avatar(upload)
+        except DjangoValidationError as e:
+            return Response({"avatar": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        profile = request.user.profile
+        profile.avatar = name
+        profile.save()
+        return Response({"avatar": avatar_urls(name)}, status=status.HTTP_200_OK)
+
+    post = put
 
-        serializer = ConnectionsSerializer(confirmed_connections, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def delete(self, request, *args, **kwargs):
+        # Файл не удаляем: по хэшу содержимого его могут использовать другие профили
+        profile = request.user.profile
+        profile.avatar = None
+        profile.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AvatarView(APIView):
+    """
+    Отдача аватаров и миниатюр. Имя файла — хэш содержимого, поэтому ответ
+    кэшируется навсегда; недостающая миниатюра строится при первом запросе.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, name, *args, **kwargs):
+        name = f'avatars/{name}'
+        match = AVATAR_NAME.match(name)
+        if not match or (match['size'] and int(match['size']) not in settings.AVATAR_THUMBNAIL_SIZES):
+            raise Http404
+
+        etag = quote_etag(f"{match['sha']}-{match['size'] or 'original'}")
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            if not default_storage.exists(name):
+                original = avatar_name(match['sha'], match['ext'])
+                if not match['size'] or not default_storage.exists(original):
+                    raise Http404
+                ensure_thumbnail(original, int(match['size']))
+            response = FileResponse(default_storage.open(name))
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.AVATAR_CACHE_MAX_AGE}, immutable'
+        return response
+
+
+class ContactBulkView(APIView):
+    """Пачка операций с контактами (отправка, подтверждение, удаление) одним запросом"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        operations = request.data.get('operations')
+        if not isinstance(operations, list):
+            return Response({"detail": "operations must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > settings.CONTACTS_BULK_LIMIT:
+            return Response({"detail": f"No more than {settings.CONTACTS_BULK_LIMIT} operations per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        results = apply_contact_operations(request.user, operations)
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class UserBatchView(APIView):
+    """
+    Краткие данные многих пользователей одним запросом для других сервисов.
+    Только по SERVICE_TOKEN: JWT-аутентификация не выполняется
+    """
+    authentication_classes = []
+    permission_classes = [IsService]
+
+    def get(self, request, *args, **kwargs):
+        """Пользователи из ?ids=1,2,3"""
+        raw_ids = request.query_params.get('ids', '')
+        return self.get_users([value for value in raw_ids.split(',') if value])
+
+    def post(self, request, *args, **kwargs):
+        """Пользователи из тела запроса {"ids": [...]}"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            return Response({"detail": "ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        return self.get_users(ids)
+
+    def get_users(self, raw_ids):
+        try:
+            user_ids = {int(user_id) for user_id in raw_ids}
+        except (TypeError, ValueError):
+            return Response({"detail": "User ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(user_ids) > settings.USERS_BATCH_LIMIT:
+            return Response({"detail": f"No more than {settings.USERS_BATCH_LIMIT} users per request"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        users = get_compact_users(user_ids)
+        return Response({str(user_id): data for user_id, data in users.items()}, status=status.HTTP_200_OK)
+
+
+class UserSearchView(APIView):
+    """Поиск пользователей по префиксу username, имени, фамилии или email (?q=...&limit=...)"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', settings.USER_SEARCH_LIMIT)),
+                        settings.USER_SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(query) < settings.USER_SEARCH_MIN_LENGTH or limit < 1:
+            return Response({"results": []}, status=status.HTTP_200_OK)
+        return Response({"results": search_users(query, limit)}, status=status.HTTP_200_OK)
+
+
+class ContactCheckView(APIView):
+    """Проверка, есть ли пользователь в подтвержденных контактах текущего"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, user_id, *args, **kwargs):
+        connected = contact_graph.is_connected(request.user.pk, user_id)
+        return Response({"user_id": user_id, "connected": connected}, status=status.HTTP_200_OK)
+
+
+class ContactPairCheckView(APIView):
+    """
+    Проверка связи произвольной пары ?user_id=&other_id= для других сервисов.
+    Только по SERVICE_TOKEN: JWT-аутентификация не выполняется
+    """
+    authentication_classes = []
+    permission_classes = [IsService]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            user_id = int(request.query_params['user_id'])
+            other_id = int(request.query_params['other_id'])
+        except (KeyError, ValueError):
+            return Response({"detail": "user_id and other_id must be integers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        connected = contact_graph.is_connected(user_id, other_id)
+        return Response({"user_id": user_id, "other_id": other_id, "connected": connected},
+                        status=status.HTTP_200_OK)
+
+
+class MutualContactsView(APIView):
+    """Общие подтвержденные контакты текущего пользователя и user_id"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, user_id, *args, **kwargs):
+        mutual = contact_graph.mutual(request.user.pk, user_id)
+        return Response({"count": len(mutual), "user_ids": sorted(mutual)}, status=status.HTTP_200_OK)
+
+
+class ContactCountView(APIView):
+    """Число подтвержденных контактов текущего пользователя"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"count": contact_graph.count(request.user.pk)}, status=status.HTTP_200_OK)
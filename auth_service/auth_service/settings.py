@@ -1,9 +1,15 @@
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код сервисов (common/) лежит в корне репозитория, в Docker — в /app/common
+sys.path.append(str(BASE_DIR.parent))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -31,10 +37,14 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'accounts',
+    'common',
 ]
 
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'accounts.routers.DatabaseRoutingMiddleware',
+    'accounts.ratelimit.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
   #  'django.middleware.csrf.CsrfViewMiddleware',
@@ -72,9 +82,47 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения вместо нового на каждый запрос. Это не пул: у каждого потока
+        # свое соединение. Пул на PostgreSQL — OPTIONS['pool'] (Django 5.1+, psycopg[pool])
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,     # Проверять переиспользуемое соединение перед первым запросом
     }
 }
 
+# Реплики только для чтения (accounts.routers): DATABASE_REPLICAS=/data/replica1.sqlite3,/data/replica2.sqlite3
+# создает алиасы replica_1, replica_2 с настройками primary. Без реплик все запросы идут в 'default'
+DATABASE_REPLICAS = []
+for number, name in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'NAME': name, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['accounts.routers.PrimaryReplicaRouter']
+DATABASE_READ_YOUR_WRITES = timedelta(seconds=5)  # Сколько пользователь читает из primary после своей записи
+DATABASE_ROUTING_CACHE = 'default'                # Алиас кэша для этих отметок
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Локально используется кэш в памяти процесса, в docker-compose — Redis
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            # По умолчанию 300 ключей: версии пользователей вытеснялись бы и сбрасывали кэши
+            'OPTIONS': {'MAX_ENTRIES': 100_000},
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -112,6 +160,12 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Загрузки больше этого размера пишутся во временный файл по частям, а не держатся в памяти
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -119,13 +173,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON через orjson (accounts.renderers), без orjson — стандартный json
+    'DEFAULT_RENDERER_CLASSES': [
+        'accounts.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'accounts.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# application/msgpack по Accept/Content-Type, если установлен msgpack
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'accounts.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'accounts.renderers.MessagePackParser')
+
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
 
@@ -134,7 +203,124 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),     # Длительность жизни refresh-токена
     'ROTATE_REFRESH_TOKENS': True,                  # Поворот refresh-токенов при обновлении
     'BLACKLIST_AFTER_ROTATION': True,               # Добавление старых токенов в черный список после их поворота
-    'ALGORITHM': 'HS256',                           # Алгоритм шифрования
-    'SIGNING_KEY': SECRET_KEY,                      # Ключ для подписи токенов
+    'ALGORITHM': 'RS256',                           # Асимметричная подпись, ключи — в JWT_KEYS_DIR
     'AUTH_HEADER_TYPES': ('Bearer',),               # Тип токена, который ожидает система (Bearer)
+    'AUTH_TOKEN_CLASSES': ('accounts.tokens.AccessToken',),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.TokenRefreshSerializer',
+}
+
+# Ключи подписи JWT: <kid>.pem, подписывает последний, создаются `manage.py rotate_jwt_keys`
+JWT_KEYS_DIR = Path(os.environ.get('JWT_KEYS_DIR', BASE_DIR / 'keys'))
+JWKS_CACHE_MAX_AGE = 300                        # Сколько секунд другие сервисы могут кэшировать JWKS
+JWT_REVOCATION_SYNC_INTERVAL = timedelta(seconds=5)  # Как часто подтягивать черный список из базы
+JWT_REVOCATION_SYNC_OVERLAP = timedelta(minutes=1)   # Сколько перечитывать свежие отзывы: дольше любой транзакции
+TOKEN_PRUNE_INTERVAL = timedelta(hours=1)        # Пауза prune_tokens --repeat между удалениями истекших токенов
+
+
+# Кэш пользователей для JWT-аутентификации (accounts.authentication)
+AUTH_USER_CACHE = 'default'                    # Алиас общего кэша версий пользователей
+AUTH_USER_CACHE_SIZE = 10000                   # Максимум пользователей в кэше процесса
+AUTH_USER_CACHE_TTL = timedelta(seconds=60)    # Страховочное время жизни записи в процессе
+
+
+# Асинхронный вход: пароли хэшируются в ограниченном пуле потоков (accounts.hashing)
+LOGIN_HASH_WORKERS = os.cpu_count() or 1        # Потоков хэширования
+LOGIN_HASH_QUEUE = 32                           # Сколько проверок может ждать свободный поток
+LOGIN_RETRY_AFTER = 1                           # Retry-After (сек) для 503 при переполнении пула
+
+
+# Список контактов: keyset-пагинация (accounts.pagination)
+CONTACTS_PAGE_SIZE = 100                        # Контактов на странице по умолчанию
+CONTACTS_MAX_PAGE_SIZE = 500                    # Максимальный ?limit=
+CONTACTS_BULK_LIMIT = 500                       # Максимум операций в /contacts/bulk/
+CONTACT_GRAPH_CACHE = 'default'                 # Алиас кэша графа контактов (accounts.graph)
+CONTACT_GRAPH_TTL = timedelta(hours=1)          # Страховочное время жизни множества контактов
+
+
+# Общий секрет внутренних сервисов: рукопожатие RPC, внутренние эндпоинты и /metrics.
+# Без него rpcserver не запускается
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN')
+
+
+# Бинарный протокол для внутренних вызовов (accounts.rpc, `manage.py rpcserver`)
+RPC_HOST = '0.0.0.0'                            # Внутри контейнера; наружу порт не публикуется
+RPC_PORT = 50051
+RPC_WORKERS = 16                                # Потоков для обработчиков с ORM
+RPC_HANDSHAKE_TIMEOUT = timedelta(seconds=5)    # Сколько ждать кадр AUTH от нового соединения
+
+
+# Поиск пользователей (accounts.search)
+USER_SEARCH_MIN_LENGTH = 2                      # Короче — пустой ответ без запроса к базе
+USER_SEARCH_LIMIT = 20                          # Результатов по умолчанию
+USER_SEARCH_MAX_LIMIT = 50                      # Максимальный ?limit=
+USER_SEARCH_CACHE_SIZE = 5000                   # Популярных запросов в LRU-кэше процесса
+USER_SEARCH_CACHE_TTL = timedelta(seconds=30)   # Время жизни закэшированной выдачи
+
+
+# Пакетное получение пользователей для других сервисов (accounts.directory)
+USERS_BATCH_LIMIT = 5000                        # Максимум пользователей в одном запросе
+USERS_BATCH_CACHE = 'default'                   # Алиас кэша кратких данных пользователей
+USERS_BATCH_CACHE_TTL = timedelta(minutes=10)   # Страховочное время жизни записи
+
+
+# Кэш сериализованных профилей (accounts.profiles)
+PROFILE_CACHE = 'default'                       # Алиас кэша профилей
+PROFILE_CACHE_TTL = timedelta(hours=1)          # Страховочное время жизни записи
+
+
+# Присутствие пользователей: last_seen/is_online пишутся в базу пачками
+PRESENCE_MAX_STALENESS = timedelta(seconds=30)  # Насколько last_seen в базе может отставать от реального
+PRESENCE_FLUSH_BATCH_SIZE = 500                 # Сбрасывать буфер досрочно при таком числе пользователей
+PRESENCE_FLUSH_IN_BACKGROUND = True             # Сбрасывать из фонового потока; иначе — в запросе, когда буфер полон
+PRESENCE_ONLINE_WINDOW = timedelta(minutes=5)   # Пользователь онлайн, если был активен за это время
+PRESENCE_CACHE = 'default'                      # Алиас кэша, в котором хранится присутствие
+PRESENCE_BULK_LIMIT = 5000                      # Максимум пользователей в одном запросе присутствия
+
+
+# Аватары (accounts.avatars)
+AVATAR_MAX_SIZE = 10 * 1024 * 1024              # Максимальный размер загружаемого файла, байт
+AVATAR_THUMBNAIL_SIZES = (64, 128, 256)         # Размеры миниатюр, px по большей стороне
+AVATAR_LIST_SIZE = 64                           # Миниатюра для списков контактов и пользователей
+AVATAR_WORKERS = 2                              # Потоков для генерации миниатюр
+AVATAR_CACHE_MAX_AGE = 365 * 24 * 60 * 60       # Файлы адресуются по хэшу и не меняются
+
+
+# Метрики запросов в формате Prometheus на /metrics (см. common.metrics), доступ по SERVICE_TOKEN
+METRICS_SLOW_REQUEST_MS = None                  # Логировать запросы дольше стольких мс вместе с SQL; None — выключено
+CACHE_METRICS_HOOK = 'common.metrics.record_cache'  # Куда accounts сообщает о попаданиях в кэши; None — никуда
+
+
+# Transactional outbox: события об изменениях для других сервисов (accounts.outbox, `manage.py dispatch_outbox`)
+OUTBOX_PUBLISHER = ('accounts.outbox.RedisStreamPublisher' if REDIS_URL
+                    else 'accounts.outbox.InMemoryPublisher')
+OUTBOX_STREAM = 'auth:events'                   # Redis Stream, в который публикуются события
+OUTBOX_STREAM_MAXLEN = 1_000_000                # Примерная длина стрима (XADD MAXLEN ~)
+OUTBOX_BATCH_SIZE = 500                         # Событий в одной публикации
+OUTBOX_POLL_INTERVAL = timedelta(seconds=1)     # Пауза диспетчера, когда новых событий нет
+OUTBOX_RETENTION = timedelta(days=7)            # Сколько хранить опубликованные события
+
+
+# Отложенное удаление аккаунтов (accounts.deletion, `manage.py purge_accounts`)
+ACCOUNT_DELETION_CHUNK_SIZE = 1000              # Строк связей/токенов в одной транзакции удаления
+ACCOUNT_DELETION_POLL_INTERVAL = timedelta(seconds=5)  # Пауза purge_accounts, когда очередь пуста
+ACCOUNT_DELETION_LEASE = timedelta(minutes=5)   # Задачу без новых пачек столько времени забирает другой purger
+ACCOUNT_DELETION_RETENTION = timedelta(days=30)  # Сколько хранить завершенные задачи (прогресс для клиента)
+
+
+# Ограничение частоты запросов ко входу и регистрации (accounts.ratelimit)
+RATE_LIMIT_ENABLED = True
+RATE_LIMITER = ('accounts.ratelimit.RedisRateLimiter' if REDIS_URL
+                else 'accounts.ratelimit.MemoryRateLimiter')
+RATE_LIMIT_KEY_PREFIX = 'ratelimit:'            # Префикс ключей счетчиков в Redis
+RATE_LIMIT_MEMORY_KEYS = 100_000                # Ключей в счетчике в памяти процесса
+# Адреса и сети прокси, чьему X-Forwarded-For верим: RATE_LIMIT_TRUSTED_PROXIES=10.0.0.0/8,127.0.0.1
+RATE_LIMIT_TRUSTED_PROXIES = list(filter(None, os.environ.get('RATE_LIMIT_TRUSTED_PROXIES', '').split(',')))
+# Лимиты по имени маршрута: '<ip|username>:<число>/<s|m|h|d>' за скользящее окно
+RATE_LIMITS = {
+    'login': ('ip:30/m', 'username:10/m'),
+    'async_login': ('ip:30/m', 'username:10/m'),
+    'token_obtain_pair': ('ip:30/m', 'username:10/m'),
+    'register': ('ip:10/m',),
+    'token_refresh': ('ip:60/m',),
 }
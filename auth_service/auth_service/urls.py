@@ -2,11 +2,16 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
+from accounts.views import AvatarView, JWKSView
+from common.metrics import metrics_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('accounts.urls')),
+    path('.well-known/jwks.json', JWKSView.as_view(), name='jwks'),
+    path('metrics', metrics_view, name='metrics'),
+    path(f"{settings.MEDIA_URL.lstrip('/')}avatars/<path:name>", AvatarView.as_view(), name='avatar'),
 ]
 
 if settings.DEBUG:
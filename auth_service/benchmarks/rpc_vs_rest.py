@@ -0,0 +1,77 @@
+"""
+Сравнение задержки и пропускной способности REST и бинарного протокола
+на одних и тех же вызовах: проверка токена и получение пользователей по id.
+
+Запуск против работающих сервисов (uvicorn из Dockerfile и `manage.py rpcserver`):
+
+    SERVICE_TOKEN=... python benchmarks/rpc_vs_rest.py --token <access> --ids 1,2,3 -n 2000 -c 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from accounts.rpc.client import RPCClient  # noqa: E402
+
+
+def rest_call(base_url, token, path, body):
+    request = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(body).encode(),
+        headers={'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def run(name, fn, requests, concurrency):
+    def timed(_):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<24} p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+          f"p99 {p99 * 1000:7.2f} ms  {requests / elapsed:8.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rest-url', default='http://localhost:8000/api/')
+    parser.add_argument('--rpc-host', default='localhost')
+    parser.add_argument('--rpc-port', type=int, default=50051)
+    parser.add_argument('--rpc-secret', default=os.environ.get('SERVICE_TOKEN'),
+                        help="Общий секрет сервисов, по умолчанию $SERVICE_TOKEN")
+    parser.add_argument('--token', required=True, help="Access-токен существующего пользователя")
+    parser.add_argument('--ids', required=True, help="id пользователей через запятую")
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    if not args.rpc_secret:
+        parser.error("--rpc-secret or SERVICE_TOKEN is required")
+
+    ids = [int(user_id) for user_id in args.ids.split(',')]
+    client = RPCClient(args.rpc_host, args.rpc_port, args.rpc_secret, pool_size=args.concurrency)
+
+    # users/batch/ — эндпоинт для сервисов, авторизуется тем же общим секретом
+    run("REST users/batch", lambda: rest_call(args.rest_url, args.rpc_secret, 'users/batch/', {'ids': ids}),
+        args.requests, args.concurrency)
+    run("RPC get_users", lambda: client.get_users(ids), args.requests, args.concurrency)
+    run("RPC validate_token", lambda: client.validate_token(args.token), args.requests, args.concurrency)
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
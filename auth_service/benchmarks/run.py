@@ -0,0 +1,145 @@
+"""
+Бенчмарк эндпоинтов auth_service: пропускная способность, p50/p99 и число запросов к базе.
+
+Запросы идут через тестовый клиент Django в процессе (без сети), на отдельной
+тестовой базе, наполненной seed(). Результат сравнивается с baseline.json:
+больше запросов к базе или p50/p99 хуже базовых больше чем на --tolerance — регрессия,
+команда завершается с кодом 1.
+
+    python benchmarks/run.py                                  # небольшой объем, сравнение с baseline.json
+    python benchmarks/run.py --users 1000000 --contacts 20 --keepdb
+    python benchmarks/run.py --save                           # записать новый baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auth_service.settings')
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+METRICS = ('p50_ms', 'p99_ms', 'queries')
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def measure(scenario, iterations, warmup=5):
+    """Прогнать сценарий, вернуть метрики; ответы с неожиданным статусом — ошибка"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    requests = scenario.prepare(warmup + iterations)
+    latencies, queries = [], []
+    try:
+        for number, (path, data, headers) in enumerate(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, scenario.method)(path, data, format='json', **headers)
+                elapsed = time.perf_counter() - started
+            if response.status_code != scenario.expected_status:
+                raise RuntimeError(f"{scenario.name}: expected {scenario.expected_status}, "
+                                   f"got {response.status_code}: {response.content[:200]!r}")
+            if number >= warmup:
+                latencies.append(elapsed)
+                queries.append(len(captured))
+    finally:
+        scenario.cleanup()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'rps': round(iterations / sum(latencies), 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        # Максимум, а не среднее: лишний запрос хотя бы в одной итерации — уже регрессия
+        'queries': max(queries),
+    }
+
+
+def compare(results, baseline, tolerance, check_latency=True):
+    """Список регрессий относительно baseline"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if metrics['queries'] > base['queries']:
+            regressions.append(f"{name}: {metrics['queries']} queries, baseline {base['queries']}")
+        if check_latency:
+            for metric in ('p50_ms', 'p99_ms'):
+                if metrics[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(f"{name}: {metric} {metrics[metric]}, baseline {base[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5000, help="Пользователей в базе")
+    parser.add_argument('--contacts', type=int, default=20, help="Подтвержденных контактов у каждого")
+    parser.add_argument('--iterations', type=int, default=100, help="Замеряемых запросов на сценарий")
+    parser.add_argument('--only', nargs='*', help="Запустить только эти сценарии")
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.3, help="Допустимое ухудшение p50/p99, доля")
+    parser.add_argument('--queries-only', action='store_true', help="Не сравнивать задержку (шумные CI-машины)")
+    parser.add_argument('--save', action='store_true', help="Записать результаты как новый baseline")
+    parser.add_argument('--keepdb', action='store_true', help="Сохранить наполненную базу для следующих запусков")
+    args = parser.parse_args()
+    if args.users <= 2 * (args.contacts + 3):
+        parser.error("--users must be greater than 2 * (--contacts + 3)")
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import seed
+
+    setup_test_environment()
+    # Фоновый сброс буфера присутствия конкурировал бы с замерами за базу
+    settings.PRESENCE_FLUSH_IN_BACKGROUND = False
+    # Сценарии входа и регистрации шлют сотни запросов с одного адреса
+    settings.RATE_LIMIT_ENABLED = False
+    if args.keepdb:
+        connection.settings_dict['TEST']['NAME'] = str(Path(__file__).resolve().parent / 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        ids = seed(args.users, args.contacts)
+        for cache in caches.all():
+            cache.clear()
+
+        results = {}
+        for scenario_class in SCENARIOS:
+            if args.only and scenario_class.name not in args.only:
+                continue
+            scenario = scenario_class(ids, args.contacts)
+            results[scenario.name] = measure(scenario, min(args.iterations, len(ids)))
+            metrics = results[scenario.name]
+            print(f"{scenario.name:<18} {metrics['rps']:>8} req/s  p50 {metrics['p50_ms']:>8} ms  "
+                  f"p99 {metrics['p99_ms']:>8} ms  {metrics['queries']:>3} queries")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance, check_latency=not args.queries_only)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
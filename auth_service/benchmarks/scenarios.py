@@ -0,0 +1,165 @@
+"""
+Сценарии бенчмарка. Каждый сценарий заранее (вне замера) готовит запросы
+и данные для них, а после прогона убирает за собой, чтобы повторный запуск
+на той же базе (--keepdb) давал те же результаты.
+"""
+import time
+
+from django.urls import reverse
+
+from accounts.models import Connections, CustomUser
+from accounts.tokens import AccessToken, RefreshToken
+
+from .seed import PASSWORD, USERNAME
+
+
+class Scenario:
+    name = None
+    method = 'get'
+    expected_status = 200
+
+    def __init__(self, ids, contacts_per_user):
+        self.ids = ids
+        self.contacts_per_user = contacts_per_user
+
+    def user_id(self, number):
+        return self.ids[number % len(self.ids)]
+
+    def other_id(self, number, offset):
+        return self.ids[(number + offset) % len(self.ids)]
+
+    def auth(self, user_id):
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(CustomUser(id=user_id))}'}
+
+    def prepare(self, iterations):
+        """Список (path, data, headers) на каждую итерацию"""
+        return [self.request(number) for number in range(iterations)]
+
+    def request(self, number):
+        raise NotImplementedError
+
+    def cleanup(self):
+        pass
+
+
+class Register(Scenario):
+    name = 'register'
+    method = 'post'
+    expected_status = 201
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.prefix = f'benchreg{time.time_ns()}_'
+
+    def request(self, number):
+        data = {'username': f'{self.prefix}{number}', 'email': f'{self.prefix}{number}@example.com',
+                'first_name': 'Bench', 'last_name': 'Register', 'password': PASSWORD}
+        return reverse('register'), data, {}
+
+    def cleanup(self):
+        CustomUser.objects.filter(username__startswith=self.prefix).delete()
+
+
+class Login(Scenario):
+    name = 'login'
+    method = 'post'
+
+    def request(self, number):
+        return reverse('login'), {'username': USERNAME.format(number % len(self.ids)), 'password': PASSWORD}, {}
+
+
+class TokenRefresh(Scenario):
+    name = 'token_refresh'
+    method = 'post'
+
+    def request(self, number):
+        refresh = RefreshToken.for_user(CustomUser(id=self.user_id(number)))
+        return reverse('token_refresh'), {'refresh': str(refresh)}, {}
+
+
+class Logout(Scenario):
+    name = 'logout'
+    method = 'post'
+    expected_status = 205
+
+    def request(self, number):
+        user_id = self.user_id(number)
+        refresh = RefreshToken.for_user(CustomUser(id=user_id))
+        return reverse('logout'), {'refresh_token': str(refresh)}, self.auth(user_id)
+
+
+class ContactsList(Scenario):
+    name = 'contacts_list'
+
+    def request(self, number):
+        return reverse('contact_management'), None, self.auth(self.user_id(number))
+
+
+class ContactsSend(Scenario):
+    name = 'contacts_send'
+    method = 'post'
+    expected_status = 201
+
+    def prepare(self, iterations):
+        # За пределами засеянных смещений 1..contacts_per_user связей еще нет
+        self.pairs = [(self.user_id(number), self.other_id(number, self.contacts_per_user + 1))
+                      for number in range(iterations)]
+        return [(reverse('contact_management'), {'to_user_id': to_id}, self.auth(from_id))
+                for from_id, to_id in self.pairs]
+
+    def cleanup(self):
+        for from_id, to_id in self.pairs:
+            Connections.objects.filter(from_user_id=from_id, to_user_id=to_id).delete()
+
+
+class ContactsConfirm(Scenario):
+    name = 'contacts_confirm'
+    method = 'patch'
+
+    def prepare(self, iterations):
+        self.connections = Connections.objects.bulk_create([
+            Connections(from_user_id=self.user_id(number),
+                        to_user_id=self.other_id(number, self.contacts_per_user + 2))
+            for number in range(iterations)
+        ])
+        return [(reverse('contact_management_detail', kwargs={'pk': connection.pk}), None,
+                 self.auth(connection.to_user_id))
+                for connection in self.connections]
+
+    def cleanup(self):
+        Connections.objects.filter(id__in=[connection.pk for connection in self.connections]).delete()
+
+
+class ContactsDelete(Scenario):
+    name = 'contacts_delete'
+    method = 'delete'
+    expected_status = 204
+
+    def prepare(self, iterations):
+        connections = Connections.objects.bulk_create([
+            Connections(from_user_id=self.user_id(number),
+                        to_user_id=self.other_id(number, self.contacts_per_user + 3), is_confirmed=True)
+            for number in range(iterations)
+        ])
+        return [(reverse('contact_management_detail', kwargs={'pk': connection.pk}), None,
+                 self.auth(connection.from_user_id))
+                for connection in connections]
+
+
+class ProfileRead(Scenario):
+    name = 'profile_read'
+
+    def request(self, number):
+        return reverse('profile'), None, self.auth(self.user_id(number))
+
+
+class ProfileUpdate(Scenario):
+    name = 'profile_update'
+    method = 'patch'
+
+    def request(self, number):
+        return reverse('update-user'), {'bio': f'bio {number}'}, self.auth(self.user_id(number))
+
+
+SCENARIOS = [Register, Login, TokenRefresh, Logout, ContactsList, ContactsSend, ContactsConfirm, ContactsDelete,
+             ProfileRead, ProfileUpdate]
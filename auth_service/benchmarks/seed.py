@@ -0,0 +1,53 @@
+"""Наполнение базы для бенчмарков: пользователи с профилями и граф подтвержденных контактов"""
+import itertools
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from accounts.models import Connections, CustomUser, Profile
+
+PASSWORD = 'benchmark-password'
+# Отдельный префикс: под 'bench' попали бы и пользователи сценария регистрации (benchreg...)
+PREFIX = 'bench-seed-'
+USERNAME = PREFIX + '{}'
+
+
+def seed(users, contacts_per_user, batch_size=10000, log=print):
+    """
+    Создать users пользователей bench-seed-0..bench-seed-N и по contacts_per_user исходящих
+    подтвержденных связей у каждого (user k -> k+1..k+contacts_per_user по кругу).
+    Пароль у всех один, хэш считается один раз. Сигналы не вызываются (bulk_create).
+    """
+    started = time.monotonic()
+    password = make_password(PASSWORD)
+    existing = CustomUser.objects.filter(username__startswith=PREFIX).count()
+    for start in range(existing, users, batch_size):
+        with transaction.atomic():
+            created = CustomUser.objects.bulk_create([
+                CustomUser(username=USERNAME.format(number), email=f'{USERNAME.format(number)}@example.com',
+                           first_name='Bench', last_name=str(number), password=password)
+                for number in range(start, min(start + batch_size, users))
+            ])
+            Profile.objects.bulk_create([Profile(user=user) for user in created])
+        log(f"users: {start + len(created)}/{users}")
+
+    ids = list(CustomUser.objects.filter(username__startswith=PREFIX).order_by('id').values_list('id', flat=True))
+    if Connections.objects.exists():
+        return ids
+    pairs = (
+        (ids[number], ids[(number + offset) % len(ids)])
+        for number in range(len(ids)) for offset in range(1, contacts_per_user + 1)
+    )
+    total = 0
+    while True:
+        batch = list(itertools.islice(pairs, batch_size))
+        if not batch:
+            break
+        Connections.objects.bulk_create([
+            Connections(from_user_id=from_id, to_user_id=to_id, is_confirmed=True) for from_id, to_id in batch
+        ])
+        total += len(batch)
+        log(f"connections: {total}")
+    log(f"seeded in {time.monotonic() - started:.1f}s")
+    return ids
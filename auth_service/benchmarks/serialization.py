@@ -0,0 +1,63 @@
+"""
+Микробенчмарк сериализации страницы контактов: ContactSerializer + JSONRenderer
+против ContactReadSerializer (строки из values()) + ORJSONRenderer. База не нужна.
+
+    python benchmarks/serialization.py --rows 500 --repeat 200
+"""
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auth_service.settings')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500, help="Связей на странице")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from types import SimpleNamespace
+
+    from django.utils import timezone
+    from rest_framework.renderers import JSONRenderer
+
+    from accounts.models import Connections, CustomUser
+    from accounts.renderers import ORJSONRenderer
+    from accounts.serializers import ContactReadSerializer, ContactSerializer
+
+    me = CustomUser(id=1, username='me', first_name='Me', last_name='Bench')
+    now = timezone.now()
+    instances, rows = [], []
+    for number in range(args.rows):
+        other = CustomUser(id=number + 2, username=f'user{number}', first_name='First', last_name=f'Last{number}')
+        instances.append(Connections(id=number + 1, from_user=me, to_user=other, is_confirmed=True, created=now))
+        rows.append({
+            'id': number + 1, 'from_user_id': me.pk, 'to_user_id': other.pk, 'is_confirmed': True, 'created': now,
+            **{f'from_user__{field}': getattr(me, field) for field in ContactReadSerializer.user_fields},
+            **{f'to_user__{field}': getattr(other, field) for field in ContactReadSerializer.user_fields},
+        })
+    context = {'request': SimpleNamespace(user=me)}
+
+    def model_serializer():
+        return JSONRenderer().render(ContactSerializer(instances, many=True, context=context).data)
+
+    def read_serializer():
+        return ORJSONRenderer().render(ContactReadSerializer(rows, many=True, context=context).data)
+
+    results = {}
+    for name, fn in (('ContactSerializer + JSONRenderer', model_serializer),
+                     ('ContactReadSerializer + ORJSONRenderer', read_serializer)):
+        results[name] = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        print(f"{name:<40} {results[name] * 1000:8.3f} ms per {args.rows} rows")
+    baseline, fast = results.values()
+    print(f"speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+from accounts.ratelimit import rate_limiter
+from accounts.tokens import AccessToken
+
+
+@pytest.fixture(scope='session', autouse=True)
+def jwt_keys_dir(tmp_path_factory):
+    """Вне DEBUG сервис не создает ключи подписи сам: один ключ на всю сессию"""
+    keys_dir = tmp_path_factory.mktemp('keys')
+    with override_settings(JWT_KEYS_DIR=keys_dir):
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        yield keys_dir
+
+
+@pytest.fixture(scope='session', autouse=True)
+def inline_presence_flush():
+    """Фоновый поток писал бы в базу посреди чужих тестов; сброс проверяется отдельно"""
+    with override_settings(PRESENCE_FLUSH_IN_BACKGROUND=False):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Лимиты считаются в памяти процесса: каждый тест начинает с нулевых счетчиков"""
+    rate_limiter().clear()
+
+
+@pytest.fixture
+def user():
+    """Пользователь с паролем password123; файлы, которым нужно больше, расширяют фикстуру"""
+    return CustomUser.objects.create_user(username="user", email="user@example.com", password="password123")
+
+
+@pytest.fixture
+def auth_client():
+    """
+    Фабрика APIClient от имени пользователя: force_authenticate, а с jwt=True —
+    настоящий access-токен, чтобы запрос прошел через JWT-аутентификацию
+    """
+    def make(user, jwt=False):
+        client = APIClient()
+        if jwt:
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        else:
+            client.force_authenticate(user=user)
+        return client
+    return make
+
+
+@pytest.fixture
+def service_client(settings):
+    """APIClient другого сервиса с общим секретом SERVICE_TOKEN"""
+    settings.SERVICE_TOKEN = 'internal-secret'
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Bearer internal-secret")
+    return client
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from accounts.deletion import claim_deletion, purge_account, purge_finished, request_deletion
+from accounts.graph import contact_graph
+from accounts.models import AccountDeletion, Connections, CustomUser, OutboxEvent, Profile
+from accounts.tokens import RefreshToken
+
+
+@pytest.fixture
+def friends(user):
+    others = [
+        CustomUser.objects.create_user(username=f"stays{i}", email=f"stays{i}@example.com", password="password123")
+        for i in range(5)
+    ]
+    for i, other in enumerate(others):
+        if i % 2:
+            Connections.objects.create(from_user=user, to_user=other, is_confirmed=True)
+        else:
+            Connections.objects.create(from_user=other, to_user=user, is_confirmed=i < 4)
+    return others
+
+
+@pytest.mark.django_db
+def test_delete_deactivates_and_queues_job(user, friends):
+    access = RefreshToken.for_user(user).access_token
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    response = client.delete(reverse('delete-user'))
+
+    assert response.status_code == 202
+    job = AccountDeletion.objects.get(user_id=user.pk)
+    assert response.data['status'] == 'pending'
+    assert response['Location'] == reverse('account_deletion', args=[job.pk])
+    user.refresh_from_db()
+    assert not user.is_active
+    assert Connections.objects.filter(from_user=user).exists()
+    assert client.delete(reverse('delete-user')).status_code == 401
+
+    progress = APIClient().get(response['Location'])
+    assert progress.status_code == 200
+    assert progress.data['id'] == str(job.pk)
+
+
+@pytest.mark.django_db
+def test_request_deletion_is_idempotent(user):
+    assert request_deletion(user) == request_deletion(user)
+    assert AccountDeletion.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_purge_removes_rows_in_chunks_and_emits_tombstone(user, friends, django_capture_on_commit_callbacks):
+    for _ in range(3):
+        RefreshToken.for_user(user)
+    friend = friends[0]
+    assert user.pk in contact_graph.contacts(friend.pk)
+    job = request_deletion(user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        purge_account(job, chunk_size=2)
+
+    job.refresh_from_db()
+    assert job.status == AccountDeletion.Status.DONE
+    assert job.completed_at is not None
+    assert (job.connections_deleted, job.tokens_deleted) == (5, 3)
+    assert not CustomUser.objects.filter(pk=user.pk).exists()
+    assert not Profile.objects.filter(user_id=user.pk).exists()
+    assert not OutstandingToken.objects.filter(user_id=user.pk).exists()
+    assert CustomUser.objects.count() == len(friends)
+    assert user.pk not in contact_graph.contacts(friend.pk)
+    assert OutboxEvent.objects.filter(event_type='user.deleted', user_id=user.pk).exists()
+    assert not OutboxEvent.objects.filter(event_type='connection.deleted').exists()
+
+
+@pytest.mark.django_db
+def test_purge_accounts_command(user, friends):
+    request_deletion(user)
+    out = StringIO()
+
+    call_command('purge_accounts', '--once', '--chunk-size', '3', stdout=out)
+
+    assert "Deleted 1 accounts" in out.getvalue()
+    assert not Connections.objects.exists()
+    assert not AccountDeletion.objects.exclude(status='done').exists()
+
+
+@pytest.mark.django_db
+def test_claimed_job_is_not_shared_until_lease_expires(user, friends, settings):
+    settings.ACCOUNT_DELETION_LEASE = timedelta(minutes=5)
+    job = request_deletion(user)
+
+    claimed = claim_deletion()
+    assert claimed.pk == job.pk
+    assert claimed.status == AccountDeletion.Status.RUNNING
+    # Второй purger задачу не получает, пока первый присылает пачки
+    assert claim_deletion() is None
+
+    AccountDeletion.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+    assert claim_deletion().pk == job.pk
+
+
+@pytest.mark.django_db
+def test_finished_jobs_are_purged_after_retention(user, friends):
+    job = purge_account(request_deletion(user))
+    assert purge_finished(timedelta(days=30)) == 0
+
+    AccountDeletion.objects.filter(pk=job.pk).update(completed_at=timezone.now() - timedelta(days=31))
+    assert purge_finished(timedelta(days=30)) == 1
+    assert not AccountDeletion.objects.exists()
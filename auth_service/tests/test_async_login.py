@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+from accounts import async_views
+from accounts.hashing import HashingPool, PoolSaturated
+
+
+@pytest.mark.django_db
+def test_async_login_returns_tokens(user):
+    response = Client().post(reverse('async_login'), {"username": user.username, "password": "password123"},
+                             content_type='application/json')
+
+    assert response.status_code == 200
+    assert {'access', 'refresh'} <= set(response.json())
+
+
+@pytest.mark.django_db
+def test_async_login_rejects_wrong_password(user):
+    response = Client().post(reverse('async_login'), {"username": user.username, "password": "wrong"},
+                             content_type='application/json')
+
+    assert response.status_code == 400
+
+
+def test_pool_rejects_when_saturated():
+    pool = HashingPool(workers=1, max_queue=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+
+    with pytest.raises(PoolSaturated):
+        pool.submit(release.wait)
+
+    release.set()
+    assert pool.stats()['rejected'] == 1
+
+
+def test_cancelled_queued_job_releases_slot():
+    pool = HashingPool(workers=1, max_queue=1)
+    release, finished = threading.Event(), threading.Event()
+    running = pool.submit(release.wait)
+
+    async def cancel_queued():
+        task = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # Колбэки future выполняются по порядку: этот — после освобождения слота пулом
+    running.add_done_callback(lambda future: finished.set())
+    try:
+        asyncio.run(cancel_queued())
+        assert pool.stats()['in_flight'] == 1
+    finally:
+        release.set()
+    assert finished.wait(5)
+
+    assert pool.stats()['in_flight'] == 0
+    assert pool.stats()['completed'] == 1
+
+
+@pytest.mark.django_db
+def test_async_login_sheds_load_with_503(user, monkeypatch):
+    pool = HashingPool(workers=1, max_queue=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+    monkeypatch.setattr(async_views, 'get_hashing_pool', lambda: pool)
+
+    response = Client().post(reverse('async_login'), {"username": user.username, "password": "password123"},
+                             content_type='application/json')
+
+    release.set()
+    assert response.status_code == 503
+    assert response['Retry-After']
@@ -0,0 +1,67 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+from accounts.models import Connections, CustomUser
+from accounts.presence import presence_buffer, presence_store
+from accounts.tokens import AccessToken
+
+
+@pytest.fixture
+def users():
+    cache.clear()
+    return [CustomUser.objects.create(username=f"async{i}", email=f"async{i}@example.com") for i in range(3)]
+
+
+def request(method, url, user=None, headers=None, **kwargs):
+    headers = dict(headers or {})
+    if user:
+        headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+    return async_to_sync(getattr(AsyncClient(), method))(url, headers=headers, **kwargs)
+
+
+@pytest.mark.django_db
+def test_requires_token():
+    assert request('get', reverse('async_contacts')).status_code == 401
+    assert request('get', reverse('async_profile'), headers={'Authorization': 'Bearer garbage'}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_contact_request_lifecycle(users):
+    first, second, _ = users
+
+    response = request('post', reverse('async_contacts'), first, data={"to_user_id": second.pk},
+                       content_type='application/json')
+    assert response.status_code == 201
+    connection_id = response.json()['id']
+
+    duplicate = request('post', reverse('async_contacts'), first, data={"to_user_id": second.pk},
+                        content_type='application/json')
+    assert duplicate.status_code == 400
+
+    detail = reverse('async_contacts_detail', kwargs={'pk': connection_id})
+    assert request('patch', detail, first).status_code == 404
+    assert request('patch', detail, second).json()['is_confirmed'] is True
+
+    page = request('get', reverse('async_contacts'), second)
+    assert page.status_code == 200
+    assert [item['contact']['username'] for item in page.json()['results']] == ["async0"]
+    assert request('get', reverse('async_contacts'), second, headers={'If-None-Match': page['ETag']}).status_code == 304
+
+    assert request('delete', detail, users[2]).status_code == 403
+    assert request('delete', detail, first).status_code == 204
+    assert not Connections.objects.filter(id=connection_id).exists()
+
+
+@pytest.mark.django_db
+def test_profile_and_presence(users):
+    user = users[0]
+    response = request('get', reverse('async_profile'), user)
+    assert response.status_code == 200
+    assert response.json()['user'] == user.pk
+    assert response['Last-Modified']
+
+    # Async-цепочка middleware отметила пользователя онлайн
+    assert async_to_sync(presence_store.ais_online)(user.pk) is True
+    assert user.pk in presence_buffer
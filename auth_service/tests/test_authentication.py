@@ -0,0 +1,44 @@
+import pytest
+from django.urls import reverse
+from accounts.authentication import UserCache, user_cache
+from accounts.models import CustomUser
+
+
+@pytest.fixture(autouse=True)
+def clean_user_cache():
+    user_cache.clear()
+
+
+@pytest.mark.django_db
+def test_cached_user_needs_no_queries(user, django_assert_num_queries, auth_client):
+    client = auth_client(user, jwt=True)
+    client.get(reverse('presence'))
+
+    with django_assert_num_queries(0):
+        response = client.get(reverse('presence'))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_user_save_invalidates_cache(user, auth_client):
+    client = auth_client(user, jwt=True)
+    client.get(reverse('presence'))
+
+    user.is_active = False
+    user.save()
+
+    response = client.get(reverse('presence'))
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_deactivation_in_other_worker_is_seen(user, auth_client):
+    client = auth_client(user, jwt=True)
+    assert client.get(reverse('presence')).status_code == 200
+
+    # Другой воркер деактивировал пользователя: его сброс меняет только общую версию
+    CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+    UserCache().invalidate(user.pk)
+
+    assert client.get(reverse('presence')).status_code == 401
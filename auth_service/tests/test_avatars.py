@@ -0,0 +1,112 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts import avatars
+from accounts.models import CustomUser
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(avatars, '_executor', executor)
+    yield tmp_path
+    executor.shutdown(wait=True)
+
+
+def image_upload(color='red', size=(600, 400), fmt='PNG', name='avatar.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+@pytest.mark.django_db
+def test_upload_is_content_addressed_and_deduplicated(user, auth_client):
+    first = user
+    second = CustomUser.objects.create(username="avatar2", email="avatar2@example.com")
+
+    response = auth_client(first).put(reverse('avatar_upload'), {"avatar": image_upload()}, format='multipart')
+    assert response.status_code == 200
+    auth_client(second).put(reverse('avatar_upload'), {"avatar": image_upload(name='other.png')},
+                            format='multipart')
+
+    first.profile.refresh_from_db()
+    second.profile.refresh_from_db()
+    assert first.profile.avatar.name == second.profile.avatar.name
+    match = avatars.AVATAR_NAME.match(first.profile.avatar.name)
+    assert match and match['ext'] == 'png'
+    assert len(default_storage.listdir(f"avatars/{match['prefix']}")[1]) >= 1
+    assert set(response.data['avatar']) == {'64', '128', '256', 'original'}
+
+
+@pytest.mark.django_db
+def test_thumbnails_are_generated_in_background():
+    name = avatars.store_avatar(image_upload())
+    avatars.get_executor().shutdown(wait=True)
+
+    for size in (64, 128, 256):
+        thumbnail = avatars.avatar_name(avatars.AVATAR_NAME.match(name)['sha'], 'png', size)
+        with default_storage.open(thumbnail) as f, Image.open(f) as image:
+            assert max(image.size) == size
+
+
+def test_concurrently_saved_avatar_keeps_hash_name(monkeypatch):
+    upload = image_upload()
+    name = avatars.avatar_name(avatars.content_hash(upload), 'png')
+    real_exists = default_storage.exists
+    checked = []
+
+    def exists(path):
+        # Другой воркер записывает тот же файл между проверкой и save(): storage выберет свободное имя
+        if path == name and not checked:
+            checked.append(path)
+            return False
+        return real_exists(path)
+
+    monkeypatch.setattr(default_storage, 'exists', exists)
+    default_storage.save(name, image_upload())
+
+    assert avatars.store_avatar(upload) == name
+    assert default_storage.listdir(name.rsplit('/', 1)[0])[1] == [name.rsplit('/', 1)[1]]
+
+
+def test_thumbnail_errors_are_logged(monkeypatch, caplog):
+    name = avatars.store_avatar(image_upload())
+    avatars.get_executor().shutdown(wait=True)
+    monkeypatch.setattr(default_storage, 'exists', lambda path: False)
+    monkeypatch.setattr(default_storage, 'open', lambda path: io.BytesIO(b'broken'))
+
+    avatars.generate_thumbnails(name)
+
+    assert f"Failed to generate 64px thumbnail for {name}" in caplog.text
+
+
+@pytest.mark.django_db
+def test_invalid_upload_is_rejected(user, auth_client):
+    upload = SimpleUploadedFile('avatar.png', b'not an image', content_type='image/png')
+    response = auth_client(user).put(reverse('avatar_upload'), {"avatar": upload}, format='multipart')
+    assert response.status_code == 400
+
+
+def test_avatar_is_served_with_immutable_cache_headers():
+    name = avatars.store_avatar(image_upload(fmt='JPEG', name='avatar.jpg'))
+    thumbnail_url = avatars.avatar_url(name, 64)
+
+    response = APIClient().get('/' + thumbnail_url.lstrip('/'))
+    assert response.status_code == 200
+    assert response['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert b''.join(response.streaming_content)
+
+    response = APIClient().get('/' + thumbnail_url.lstrip('/'), HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+    assert APIClient().get('/media/avatars/../settings.py').status_code == 404
+    missing = avatars.avatar_name('0' * 64, 'png', 64)
+    assert APIClient().get(f'/media/{missing}').status_code == 404
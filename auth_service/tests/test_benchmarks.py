@@ -0,0 +1,39 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.models import CustomUser
+from accounts.tokens import AccessToken
+from benchmarks.run import BASELINE, compare, measure
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import seed
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('scenario_class', SCENARIOS, ids=lambda scenario: scenario.name)
+def test_scenario_within_query_baseline(scenario_class, settings):
+    """Сценарии бенчмарка рабочие и не превышают число запросов из baseline.json"""
+    settings.PRESENCE_MAX_STALENESS = timedelta(days=1)
+    cache.clear()
+    ids = seed(20, 2, log=lambda message: None)
+    # В run.py пользователей для JWT успевают закэшировать предыдущие сценарии
+    authentication = CachedJWTAuthentication()
+    for user_id in ids:
+        authentication.get_user(AccessToken.for_user(CustomUser(id=user_id)))
+
+    metrics = measure(scenario_class(ids, 2), iterations=2, warmup=1)
+
+    baseline = json.loads(BASELINE.read_text())
+    assert compare({scenario_class.name: metrics}, baseline, tolerance=0, check_latency=False) == []
+
+
+def test_compare_reports_regressions():
+    baseline = {'login': {'p50_ms': 10, 'p99_ms': 20, 'queries': 2}}
+    assert compare({'login': {'p50_ms': 12, 'p99_ms': 21, 'queries': 2}}, baseline, tolerance=0.3) == []
+    assert compare({'login': {'p50_ms': 14, 'p99_ms': 21, 'queries': 3}}, baseline, tolerance=0.3) == [
+        "login: 3 queries, baseline 2",
+        "login: p50_ms 14, baseline 10",
+    ]
@@ -0,0 +1,148 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from accounts.graph import contact_graph
+from accounts.models import Connections, CustomUser
+
+
+@pytest.fixture
+def contacts(user):
+    others = [
+        CustomUser.objects.create_user(username=f"friend{i}", email=f"friend{i}@example.com", password="password123")
+        for i in range(5)
+    ]
+    for i, other in enumerate(others):
+        if i % 2:
+            Connections.objects.create(from_user=user, to_user=other, is_confirmed=True)
+        else:
+            Connections.objects.create(from_user=other, to_user=user, is_confirmed=True)
+    # Одинаковое время создания у всех: порядок держится на id
+    Connections.objects.update(created=timezone.now())
+    return others
+
+
+@pytest.mark.django_db
+def test_contacts_are_paginated_by_cursor(user, contacts, django_assert_max_num_queries, auth_client):
+    client = auth_client(user)
+    seen = []
+    url = reverse('contact_management') + '?limit=2'
+    while url:
+        with django_assert_max_num_queries(1):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.data['results']) <= 2
+        seen += [item['contact']['username'] for item in response.data['results']]
+        url = response.data['next']
+
+    assert sorted(seen) == sorted(other.username for other in contacts)
+
+
+@pytest.mark.django_db
+def test_contacts_support_if_none_match(user, contacts, auth_client):
+    client = auth_client(user)
+    response = client.get(reverse('contact_management'))
+
+    cached = client.get(reverse('contact_management'), HTTP_IF_NONE_MATCH=response['ETag'])
+
+    assert cached.status_code == 304
+    assert not cached.content
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(user, auth_client):
+    response = auth_client(user).get(reverse('contact_management') + '?cursor=broken')
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_contact_graph_endpoints(user, contacts, django_assert_num_queries, auth_client):
+    cache.clear()
+    client = auth_client(user)
+    friend = contacts[0]
+    Connections.objects.create(from_user=friend, to_user=contacts[1], is_confirmed=True)
+
+    assert client.get(reverse('contact_count')).data == {"count": 5}
+    with django_assert_num_queries(0):
+        assert client.get(reverse('contact_check', args=[friend.pk])).data["connected"] is True
+    assert client.get(reverse('contact_mutual', args=[friend.pk])).data["user_ids"] == [contacts[1].pk]
+
+
+@pytest.mark.django_db
+def test_stale_graph_fill_does_not_override_invalidation(user, contacts):
+    cache.clear()
+    friend = contacts[0]
+    # Заполнение прочитало версию и связи до удаления, а записало кэш после сброса
+    versions = contact_graph.versions([user.pk])
+    Connections.objects.filter(from_user=user, to_user=friend).delete()
+    Connections.objects.filter(from_user=friend, to_user=user).delete()
+    contact_graph.invalidate(user.pk, friend.pk)
+    stale = {contact_graph.make_key(user.pk, versions[user.pk]): frozenset(c.pk for c in contacts)}
+    cache.set_many(stale)
+
+    assert friend.pk not in contact_graph.contacts(user.pk)
+
+
+@pytest.mark.django_db
+def test_pair_check_requires_service_token(user, contacts, auth_client, service_client):
+    cache.clear()
+    url = reverse('contact_pair_check')
+    params = {"user_id": user.pk, "other_id": contacts[0].pk}
+
+    assert auth_client(user).get(url, params).status_code == 403
+    response = service_client.get(url, params)
+    assert response.status_code == 200
+    assert response.data == {"user_id": user.pk, "other_id": contacts[0].pk, "connected": True}
+    assert service_client.get(url, {"user_id": "x"}).status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_contact_graph_follows_confirm_and_delete(user, auth_client):
+    cache.clear()
+    other = CustomUser.objects.create_user(username="pending", email="pending@example.com", password="password123")
+    connection = Connections.objects.create(from_user=other, to_user=user)
+    client = auth_client(user)
+    assert client.get(reverse('contact_check', args=[other.pk])).data["connected"] is False
+
+    client.patch(reverse('contact_management_detail', args=[connection.pk]))
+    assert client.get(reverse('contact_check', args=[other.pk])).data["connected"] is True
+
+    client.delete(reverse('contact_management_detail', args=[connection.pk]))
+    assert client.get(reverse('contact_check', args=[other.pk])).data["connected"] is False
+
+
+@pytest.mark.django_db
+def test_bulk_contact_operations(user, django_assert_max_num_queries, auth_client):
+    others = [
+        CustomUser.objects.create_user(username=f"bulk{i}", email=f"bulk{i}@example.com", password="password123")
+        for i in range(3)
+    ]
+    incoming = Connections.objects.create(from_user=others[0], to_user=user)
+    outgoing = Connections.objects.create(from_user=user, to_user=others[1])
+    operations = [
+        {"op": "send", "to_user_id": others[2].pk},
+        {"op": "send", "to_user_id": others[1].pk},
+        {"op": "send", "to_user_id": 999999},
+        {"op": "confirm", "id": incoming.pk},
+        {"op": "delete", "id": outgoing.pk},
+        {"op": "unknown", "id": 1},
+    ]
+
+    with django_assert_max_num_queries(17):
+        response = auth_client(user).post(reverse('contact_bulk'), {"operations": operations}, format='json')
+
+    statuses = [item["status"] for item in response.data["results"]]
+    assert statuses == ["sent", "already_sent", "not_found", "confirmed", "deleted", "invalid"]
+    assert Connections.objects.get(pk=incoming.pk).is_confirmed
+    assert not Connections.objects.filter(pk=outgoing.pk).exists()
+    assert Connections.objects.filter(from_user=user, to_user=others[2]).exists()
+
+
+@pytest.mark.django_db
+def test_duplicate_contact_request(user, contacts, auth_client):
+    stranger = CustomUser.objects.create_user(username="stranger", email="stranger@example.com", password="password123")
+    client = auth_client(user)
+
+    assert client.post(reverse('contact_management'), {"to_user_id": stranger.pk}).status_code == 201
+    assert client.post(reverse('contact_management'), {"to_user_id": stranger.pk}).status_code == 400
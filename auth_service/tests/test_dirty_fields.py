@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import CustomUser, Profile
+
+
+@pytest.mark.django_db
+def test_save_without_changes_skips_write(user, django_assert_num_queries):
+    profile = Profile.objects.get(user=user)
+
+    with django_assert_num_queries(0):
+        profile.save()
+
+
+@pytest.mark.django_db
+def test_save_writes_only_changed_columns(user):
+    profile = Profile.objects.get(user=user)
+    profile.bio = "Hello"
+
+    with CaptureQueriesContext(connection) as queries:
+        profile.save()
+
+    # Остальные запросы — номер и само событие outbox
+    writes = [query['sql'] for query in queries if 'accounts_outbox' not in query['sql']]
+    assert len(writes) == 1
+    sql = writes[0]
+    assert '"bio"' in sql
+    assert '"status_message"' not in sql
+    assert Profile.objects.get(user=user).bio == "Hello"
+
+
+@pytest.mark.django_db
+def test_user_save_does_not_resave_profile(user, django_assert_num_queries):
+    user = CustomUser.objects.get(pk=user.pk)
+    user.first_name = "Changed"
+
+    # UPDATE пользователя, номер и событие outbox, без UPDATE профиля
+    with django_assert_num_queries(3):
+        user.save()
+
+
+@pytest.mark.django_db
+def test_profile_update_writes_only_profile(user, settings):
+    # Иначе буфер присутствия может сброситься посреди запроса и добавить свой UPDATE
+    settings.PRESENCE_MAX_STALENESS = timedelta(hours=1)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(reverse('update-user'), {"bio": "New bio"}, format='json')
+
+    assert response.status_code == 200
+    updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert 'accounts_profile' in updates[0]
@@ -0,0 +1,87 @@
+import json
+import pytest
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from accounts.models import CustomUser, Profile
+
+
+@pytest.mark.django_db
+def test_import_users_from_csv(tmp_path):
+    CustomUser.objects.create_user(username="existing", email="existing@example.com", password="password123")
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "username,email,first_name,last_name,password\n"
+        "alice,alice@example.com,Alice,A,password123\n"
+        "existing,other@example.com,Ex,Isting,password123\n"
+        "bob,bob@example.com,Bob,B,password123\n"
+    )
+
+    call_command('import_users', str(path), '--workers', '0', '--batch-size', '2', stdout=StringIO())
+
+    alice = CustomUser.objects.get(username="alice")
+    assert alice.check_password("password123")
+    assert alice.first_name == "Alice"
+    assert CustomUser.objects.count() == 3
+    assert Profile.objects.count() == 3
+    assert (tmp_path / "users.csv.checkpoint").read_text() == "3"
+
+
+@pytest.mark.django_db
+def test_import_users_resumes_from_checkpoint(tmp_path):
+    path = tmp_path / "users.jsonl"
+    records = [
+        {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": make_password(None)}
+        for i in range(4)
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    (tmp_path / "users.jsonl.checkpoint").write_text("2")
+
+    call_command('import_users', str(path), '--workers', '0', stdout=StringIO())
+
+    assert sorted(CustomUser.objects.values_list('username', flat=True)) == ["user2", "user3"]
+    assert Profile.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_import_users_normalizes_emails_like_create_user(tmp_path):
+    CustomUser.objects.create_user(username="existing", email="existing@Example.com", password="password123")
+    path = tmp_path / "users.jsonl"
+    records = [
+        {"username": "dup", "email": "existing@EXAMPLE.com", "password": "password123"},
+        {"username": "carol", "email": "carol@Example.COM", "password": "password123"},
+        {"username": "carol2", "email": "carol@example.com", "password": "password123"},
+        # username одного пользователя совпадает с email другого — это не дубликат
+        {"username": "eve@example.com", "email": "eve.work@example.com", "password": "password123"},
+        {"username": "eve", "email": "eve@example.com", "password": "password123"},
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records))
+
+    call_command('import_users', str(path), '--workers', '0', stdout=StringIO())
+
+    assert sorted(CustomUser.objects.values_list('username', 'email')) == [
+        ("carol", "carol@example.com"), ("eve", "eve@example.com"), ("eve@example.com", "eve.work@example.com"),
+        ("existing", "existing@example.com"),
+    ]
+
+
+@pytest.mark.django_db
+def test_import_users_rejects_invalid_records(tmp_path):
+    path = tmp_path / "users.jsonl"
+    records = [
+        {"username": "u" * 151, "email": "long@example.com", "password": "password123"},
+        {"username": "bad name", "email": "bad@example.com", "password": "password123"},
+        {"username": "noemail", "email": "not-an-email", "password": "password123"},
+        {"username": "hash", "email": "hash@example.com", "password_hash": "x" * 129},
+        {"username": 42, "email": "number@example.com", "password": "password123"},
+        {"username": "frank", "email": "frank@example.com", "first_name": "Frank", "password": "password123"},
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    err = StringIO()
+
+    call_command('import_users', str(path), '--workers', '0', stdout=StringIO(), stderr=err)
+
+    assert list(CustomUser.objects.values_list('username', flat=True)) == ["frank"]
+    assert [line.split(' rejected')[0] for line in err.getvalue().splitlines()] == [
+        f"Record {number}" for number in range(1, 6)
+    ]
@@ -0,0 +1,84 @@
+import jwt
+import pytest
+from io import StringIO
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.keys import get_keyring, load_keys
+from accounts.models import CustomUser
+from accounts.tokens import AccessToken
+
+
+def test_jwks_verifies_issued_tokens():
+    user = CustomUser(id=1, username="jwks")
+    token = str(AccessToken.for_user(user))
+
+    response = APIClient().get(reverse('jwks'))
+
+    assert response.status_code == 200
+    assert 'max-age' in response['Cache-Control']
+    kid = jwt.get_unverified_header(token)['kid']
+    jwk = next(key for key in response.json()['keys'] if key['kid'] == kid)
+    assert 'd' not in jwk
+    payload = jwt.decode(token, jwt.PyJWK(jwk).key, algorithms=[jwk['alg']])
+    assert payload['user_id'] == '1'
+
+
+def test_rotation_keeps_old_tokens_valid(tmp_path):
+    user = CustomUser(id=1, username="jwks")
+    with override_settings(JWT_KEYS_DIR=tmp_path):
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        old_token = str(AccessToken.for_user(user))
+
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        get_keyring.cache_clear()
+        new_token = str(AccessToken.for_user(user))
+
+        assert len(get_keyring().keys) == 2
+        assert jwt.get_unverified_header(new_token)['kid'] != jwt.get_unverified_header(old_token)['kid']
+        assert AccessToken(old_token)['user_id'] == '1'
+        assert AccessToken(new_token)['user_id'] == '1'
+
+
+def test_worker_verifies_key_rotated_without_restart(tmp_path):
+    with override_settings(JWT_KEYS_DIR=tmp_path):
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        old_token = AccessToken.for_user(CustomUser(id=1, username="jwks"))
+        str(old_token)  # воркер подписал токен и закэшировал набор ключей
+
+        # Новый ключ выпустил другой процесс, этот воркер держит старый набор
+        call_command('rotate_jwt_keys', stdout=StringIO())
+        new_key = load_keys(tmp_path)[-1]
+        assert get_keyring().get(new_key.kid) is None
+        token = jwt.encode(old_token.payload, new_key.private_key, algorithm='RS256', headers={'kid': new_key.kid})
+
+        assert AccessToken(token)['user_id'] == '1'
+        assert get_keyring().active.kid == new_key.kid
+
+
+@pytest.mark.django_db
+def test_login_returns_rs256_tokens():
+    CustomUser.objects.create_user(username="signed", email="signed@example.com", password="password123")
+
+    response = APIClient().post(reverse('login'), {"username": "signed", "password": "password123"}, format='json')
+
+    assert response.status_code == 200
+    assert jwt.get_unverified_header(response.data['access'])['alg'] == 'RS256'
+
+
+def test_missing_keys_fail_outside_debug(tmp_path):
+    with override_settings(JWT_KEYS_DIR=tmp_path / 'keys', DEBUG=False):
+        with pytest.raises(ImproperlyConfigured):
+            get_keyring()
+
+
+def test_debug_key_is_persisted_for_other_workers(tmp_path):
+    keys_dir = tmp_path / 'keys'
+    with override_settings(JWT_KEYS_DIR=keys_dir, DEBUG=True):
+        kid = get_keyring().active.kid
+        # Другой процесс с пустым кэшем читает тот же ключ
+        get_keyring.cache_clear()
+        assert get_keyring().active.kid == kid
+        assert [path.stem for path in keys_dir.glob('*.pem')] == [kid]
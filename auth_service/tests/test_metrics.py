@@ -0,0 +1,79 @@
+import logging
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from common import metrics
+from common.metrics import Histogram
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics(settings):
+    settings.SERVICE_TOKEN = 'metrics-secret'
+    for metric in metrics.REGISTRY:
+        metric.clear()
+    cache.clear()
+
+
+def scrape(token='metrics-secret'):
+    client = APIClient()
+    if token:
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client.get(reverse('metrics'))
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('latency', 'Latency.', ('route',), buckets=(0.1, 1))
+    histogram.observe(('api/',), 0.05)
+    histogram.observe(('api/',), 0.5)
+
+    assert histogram.render().splitlines() == [
+        '# HELP latency Latency.',
+        '# TYPE latency histogram',
+        'latency_bucket{route="api/",le="0.1"} 1',
+        'latency_bucket{route="api/",le="1"} 2',
+        'latency_bucket{route="api/",le="+Inf"} 2',
+        'latency_sum{route="api/"} 0.55',
+        'latency_count{route="api/"} 2',
+    ]
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_per_route():
+    user = CustomUser.objects.create(username="metrics", email="metrics@example.com")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.get(reverse('contact_count'))
+    client.get(reverse('contact_count'))
+
+    body = scrape().content.decode()
+    assert 'http_requests_total{method="GET",route="api/contacts/count/",status="200"} 2' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="api/contacts/count/"} 2' in body
+    assert 'db_queries_per_request_count{route="api/contacts/count/"} 2' in body
+    assert 'cache_requests_total{cache="contact_graph",result="miss"} 1' in body
+    assert 'cache_requests_total{cache="contact_graph",result="hit"} 1' in body
+
+
+@pytest.mark.django_db
+def test_slow_requests_are_logged_with_sql(settings, caplog):
+    settings.METRICS_SLOW_REQUEST_MS = 0
+    user = CustomUser.objects.create(username="slow", email="slow@example.com")
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    with caplog.at_level(logging.WARNING, logger='common.metrics'):
+        client.get(reverse('contact_count'))
+
+    [record] = [record for record in caplog.records if record.name == 'common.metrics']
+    assert 'Slow request GET /api/contacts/count/' in record.getMessage()
+    assert 'accounts_connections' in record.getMessage()
+
+
+@pytest.mark.django_db
+def test_metrics_require_service_token():
+    assert scrape(token=None).status_code == 403
+    assert scrape(token='wrong').status_code == 403
+    assert scrape().status_code == 200
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import Connections, CustomUser, OutboxEvent, Profile
+from accounts.outbox import InMemoryPublisher, dispatch, purge_published
+
+
+@pytest.fixture
+def users():
+    return [
+        CustomUser.objects.create_user(username=f"outbox{i}", email=f"outbox{i}@example.com", password="password123")
+        for i in range(2)
+    ]
+
+
+def event_types():
+    return list(OutboxEvent.objects.order_by('id').values_list('event_type', flat=True))
+
+
+@pytest.mark.django_db
+def test_user_and_profile_changes_emit_events(users):
+    user = users[0]
+    created = OutboxEvent.objects.get(event_type='user.created', user_id=user.pk)
+    assert created.payload['username'] == "outbox0"
+    assert 'password' not in created.payload
+    OutboxEvent.objects.all().delete()
+
+    user.first_name = "Changed"
+    user.save()
+    user.last_login = timezone.now()
+    user.save(update_fields=['last_login'])
+
+    profile = Profile.objects.get(user=user)
+    profile.last_seen = timezone.now()
+    profile.save()
+    profile.birthday = "2000-01-02"
+    profile.save()
+
+    assert event_types() == ['user.updated', 'profile.updated']
+    assert OutboxEvent.objects.get(event_type='profile.updated').payload['birthday'] == "2000-01-02"
+
+
+@pytest.mark.django_db
+def test_connection_lifecycle_emits_ordered_events(users, auth_client):
+    sender, receiver = users
+    OutboxEvent.objects.all().delete()
+
+    response = auth_client(sender).post(reverse('contact_management'), {"to_user_id": receiver.pk})
+    connection_id = response.data['id']
+    auth_client(receiver).patch(reverse('contact_management_detail', args=[connection_id]))
+    auth_client(receiver).delete(reverse('contact_management_detail', args=[connection_id]))
+
+    assert event_types() == ['connection.requested', 'connection.confirmed', 'connection.deleted']
+    assert set(OutboxEvent.objects.values_list('user_id', 'aggregate_id')) == {(sender.pk, connection_id)}
+
+
+@pytest.mark.django_db
+def test_bulk_contact_operations_emit_events(users, auth_client):
+    sender, receiver = users
+    OutboxEvent.objects.all().delete()
+
+    auth_client(sender).post(reverse('contact_bulk'), {"operations": [
+        {"op": "send", "to_user_id": receiver.pk},
+    ]}, format='json')
+    connection = Connections.objects.get(from_user=sender, to_user=receiver)
+    auth_client(receiver).post(reverse('contact_bulk'), {"operations": [
+        {"op": "confirm", "id": connection.pk},
+    ]}, format='json')
+
+    assert event_types() == ['connection.requested', 'connection.confirmed']
+    assert OutboxEvent.objects.last().payload == {
+        'id': connection.pk, 'from_user_id': sender.pk, 'to_user_id': receiver.pk, 'is_confirmed': True,
+    }
+
+
+@pytest.mark.django_db
+def test_rolled_back_change_leaves_no_event(users):
+    OutboxEvent.objects.all().delete()
+
+    with pytest.raises(RuntimeError), transaction.atomic():
+        users[0].first_name = "Rolled back"
+        users[0].save()
+        raise RuntimeError
+
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_events_are_numbered_per_user(users, auth_client):
+    sender, receiver = users
+    OutboxEvent.objects.all().delete()
+
+    sender.first_name = "Numbered"
+    sender.save()
+    auth_client(sender).post(reverse('contact_bulk'), {"operations": [
+        {"op": "send", "to_user_id": receiver.pk},
+    ]}, format='json')
+    receiver.first_name = "Other"
+    receiver.save()
+
+    sequences = OutboxEvent.objects.order_by('id').values_list('user_id', 'sequence')
+    # user.created уже занял номер 1 у каждого пользователя
+    assert list(sequences) == [(sender.pk, 2), (sender.pk, 3), (receiver.pk, 2)]
+    publisher = InMemoryPublisher()
+    dispatch(publisher)
+    assert [message['sequence'] for message in publisher.messages] == [2, 3, 2]
+
+
+class FailingPublisher:
+    def publish(self, messages):
+        raise ConnectionError("broker is down")
+
+
+@pytest.mark.django_db
+def test_dispatch_publishes_in_order_at_least_once(users):
+    pending = list(OutboxEvent.objects.order_by('id').values_list('id', flat=True))
+
+    with pytest.raises(ConnectionError):
+        dispatch(FailingPublisher())
+    assert OutboxEvent.objects.filter(published_at__isnull=True).count() == len(pending)
+
+    publisher = InMemoryPublisher()
+    assert dispatch(publisher, batch_size=1) == 1
+    assert dispatch(publisher) == len(pending) - 1
+    assert dispatch(publisher) == 0
+
+    assert [message['id'] for message in publisher.messages] == pending
+    assert publisher.messages[0]['type'] == 'user.created'
+    assert not OutboxEvent.objects.filter(published_at__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_dispatch_command_and_purge(users, settings):
+    settings.OUTBOX_PUBLISHER = 'accounts.outbox.InMemoryPublisher'
+    out = StringIO()
+
+    call_command('dispatch_outbox', '--once', stdout=out)
+
+    assert "Published 2 events" in out.getvalue()
+    OutboxEvent.objects.filter(user_id=users[0].pk).update(published_at=timezone.now() - timedelta(days=30))
+    assert purge_published(timedelta(days=7)) == 1
+    assert OutboxEvent.objects.count() == 1
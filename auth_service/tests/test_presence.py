@@ -0,0 +1,113 @@
+import time
+
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import CustomUser, Profile
+from accounts.presence import mark_seen, presence_buffer, presence_store
+
+
+@pytest.fixture(autouse=True)
+def clean_presence():
+    presence_buffer.flush()
+    cache.clear()
+
+
+@pytest.mark.django_db
+@override_settings(PRESENCE_MAX_STALENESS=timedelta(hours=1))
+def test_request_is_buffered_without_profile_write(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    client.get(reverse('update-user'))
+
+    assert len(presence_buffer) == 1
+    assert Profile.objects.get(user=user).last_seen is None
+
+
+@pytest.mark.django_db
+@override_settings(PRESENCE_MAX_STALENESS=timedelta(hours=1))
+def test_flush_writes_pending_presence(user, django_assert_num_queries):
+    presence_buffer.record(user.pk)
+
+    with django_assert_num_queries(2):
+        assert presence_buffer.flush() == 1
+
+    profile = Profile.objects.get(user=user)
+    assert profile.is_online
+    assert profile.last_seen is not None
+    assert len(presence_buffer) == 0
+
+
+@pytest.mark.django_db
+@override_settings(PRESENCE_FLUSH_BATCH_SIZE=1)
+def test_full_buffer_is_flushed(user):
+    mark_seen(user.pk)
+
+    assert len(presence_buffer) == 0
+    assert Profile.objects.get(user=user).last_seen is not None
+
+
+@pytest.mark.django_db
+def test_failed_flush_keeps_pending_presence(user, monkeypatch, caplog):
+    presence_buffer.record(user.pk)
+
+    def fail(*args, **kwargs):
+        raise DatabaseError("database is locked")
+
+    monkeypatch.setattr(Profile.objects, 'bulk_update', fail)
+    assert presence_buffer.flush() == 0
+    assert len(presence_buffer) == 1
+    assert "Failed to flush presence" in caplog.text
+
+    monkeypatch.undo()
+    assert presence_buffer.flush() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(PRESENCE_FLUSH_IN_BACKGROUND=True, PRESENCE_MAX_STALENESS=timedelta(milliseconds=50))
+def test_background_thread_flushes_idle_buffer(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    client.get(reverse('update-user'))
+
+    # Запросов больше нет, буфер сбрасывает поток по таймеру
+    deadline = time.monotonic() + 5
+    while Profile.objects.get(user=user).last_seen is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert Profile.objects.get(user=user).last_seen is not None
+    assert len(presence_buffer) == 0
+
+
+@pytest.mark.django_db
+@override_settings(PRESENCE_MAX_STALENESS=timedelta(hours=1))
+def test_bulk_presence_reads_cache_without_writes(user, django_assert_num_queries):
+    other = CustomUser.objects.create_user(
+        username="offline", email="offline@example.com", password="password123"
+    )
+    presence_store.touch(user.pk)
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    with django_assert_num_queries(1):
+        response = client.post(reverse('presence'), {"user_ids": [user.pk, other.pk]}, format='json')
+
+    assert response.status_code == 200
+    assert response.data[str(user.pk)]["is_online"] is True
+    assert response.data[str(other.pk)]["is_online"] is False
+
+
+@pytest.mark.django_db
+@override_settings(PRESENCE_BULK_LIMIT=2)
+def test_bulk_presence_limit(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get(reverse('presence'), {"ids": "1,2,3"})
+
+    assert response.status_code == 400
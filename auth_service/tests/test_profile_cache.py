@@ -0,0 +1,73 @@
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from accounts.presence import presence_store
+
+
+@pytest.fixture
+def user(user, settings):
+    """Пользователь уже онлайн: присутствие берется из кэша, а не из базы"""
+    settings.PRESENCE_MAX_STALENESS = timedelta(hours=1)
+    cache.clear()
+    presence_store.touch(user.pk)
+    return user
+
+
+@pytest.mark.django_db
+def test_profile_is_served_from_cache(user, django_assert_num_queries, auth_client):
+    client = auth_client(user)
+    first = client.get(reverse('profile'))
+    assert first.status_code == 200
+    assert first.data['is_online'] is True
+    assert first['ETag'] and first['Last-Modified']
+
+    with django_assert_num_queries(0):
+        second = client.get(reverse('profile'))
+    assert second.data == first.data
+
+
+@pytest.mark.django_db
+def test_conditional_get_returns_304(user, auth_client):
+    client = auth_client(user)
+    etag = client.get(reverse('update-user'))['ETag']
+
+    response = client.get(reverse('update-user'), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+@pytest.mark.django_db
+def test_update_invalidates_cached_profile(user, django_capture_on_commit_callbacks, auth_client):
+    client = auth_client(user)
+    before = client.get(reverse('update-user'))
+    detail_etag = client.get(reverse('profile'))['ETag']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.patch(reverse('update-user'), {"bio": "new bio", "user": {"first_name": "Renamed"}},
+                                format='json')
+    assert response.status_code == 200
+
+    after = client.get(reverse('update-user'), HTTP_IF_NONE_MATCH=before['ETag'])
+    assert after.status_code == 200
+    assert after.data['bio'] == "new bio"
+    assert after.data['user']['first_name'] == "Renamed"
+
+    detail = client.get(reverse('profile'), HTTP_IF_NONE_MATCH=detail_etag)
+    assert detail.status_code == 200
+    assert detail.data['bio'] == "new bio"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('route', ['profile', 'update-user'])
+def test_cached_avatar_url_matches_request_host(user, route, settings, auth_client):
+    settings.ALLOWED_HOSTS = ['testserver', 'other.example.com']
+    user.profile.avatar = "avatars/ab/abc.png"
+    user.profile.save()
+    client = auth_client(user)
+
+    first = client.get(reverse(route))
+    second = client.get(reverse(route), HTTP_HOST='other.example.com')
+
+    assert first.data['avatar'].startswith('http://testserver/')
+    assert second.data['avatar'].startswith('http://other.example.com/')
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.urls import reverse
+from accounts.models import Connections, CustomUser, Profile
+
+CONTACTS = 40
+PENDING = 10
+
+
+@pytest.fixture
+def seeded():
+    """Пользователь с подтвержденными контактами и входящими запросами поверх фоновых связей"""
+    cache.clear()
+    password = make_password("password123")
+    users = CustomUser.objects.bulk_create([
+        CustomUser(username=f"seed{i}", email=f"seed{i}@example.com", password=password)
+        for i in range(CONTACTS + PENDING + 20)
+    ])
+    Profile.objects.bulk_create([Profile(user=user) for user in users])
+    owner, contacts, pending, background = users[0], users[1:CONTACTS + 1], users[CONTACTS + 1:-20], users[-20:]
+    Connections.objects.bulk_create(
+        [Connections(from_user=owner, to_user=user, is_confirmed=True) for user in contacts[::2]]
+        + [Connections(from_user=user, to_user=owner, is_confirmed=True) for user in contacts[1::2]]
+        + [Connections(from_user=user, to_user=owner) for user in pending]
+        + [Connections(from_user=a, to_user=b, is_confirmed=True) for a in background for b in background if a != b]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return owner
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('limit', [5, CONTACTS])
+def test_contacts_list_budget_does_not_grow_with_page(seeded, limit, django_assert_num_queries, auth_client):
+    with django_assert_num_queries(1):
+        response = auth_client(seeded).get(reverse('contact_management'), {"limit": limit})
+    assert len(response.data['results']) == min(limit, CONTACTS)
+
+
+@pytest.mark.django_db
+def test_contact_send_budget(seeded, django_assert_max_num_queries, auth_client):
+    stranger = CustomUser.objects.create(username="stranger", email="stranger@example.com")
+    # Включая номер и INSERT события outbox
+    with django_assert_max_num_queries(6):
+        response = auth_client(seeded).post(reverse('contact_management'), {"to_user_id": stranger.pk})
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+def test_contact_confirm_and_delete_budget(seeded, django_assert_max_num_queries, auth_client):
+    request = Connections.objects.filter(to_user=seeded, is_confirmed=False).first()
+    client = auth_client(seeded)
+
+    with django_assert_max_num_queries(4):
+        assert client.patch(reverse('contact_management_detail', args=[request.pk])).status_code == 200
+    with django_assert_max_num_queries(5):
+        assert client.delete(reverse('contact_management_detail', args=[request.pk])).status_code == 204
+
+
+@pytest.mark.django_db
+def test_contact_bulk_budget_does_not_grow_with_batch(seeded, django_assert_max_num_queries, auth_client):
+    pending = Connections.objects.filter(to_user=seeded, is_confirmed=False).values_list('id', flat=True)
+    operations = [{"op": "confirm", "id": pk} for pk in pending]
+    with django_assert_max_num_queries(6):
+        response = auth_client(seeded).post(reverse('contact_bulk'), {"operations": operations}, format='json')
+    assert {item["status"] for item in response.data["results"]} == {"confirmed"}
+
+
+@pytest.mark.django_db
+def test_profile_and_presence_budget(seeded, django_assert_max_num_queries, auth_client):
+    client = auth_client(seeded)
+    ids = ",".join(str(pk) for pk in CustomUser.objects.values_list('id', flat=True))
+
+    with django_assert_max_num_queries(1):
+        assert client.get(reverse('update-user')).status_code == 200
+    with django_assert_max_num_queries(3):
+        assert client.patch(reverse('update-user'), {"bio": "bio"}, format='json').status_code == 200
+    with django_assert_max_num_queries(1):
+        assert client.get(reverse('presence'), {"ids": ids}).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('build', [
+    lambda user: Connections.objects.filter(Q(from_user=user) | Q(to_user=user), is_confirmed=True)
+    .order_by('-created', '-id')[:100],
+    lambda user: Connections.objects.filter(to_user=user, is_confirmed=False),
+    lambda user: Connections.objects.filter(from_user=user, to_user_id=1),
+    lambda user: Connections.objects.filter(Q(from_user_id__in=[user.pk]) | Q(to_user_id__in=[user.pk]),
+                                            is_confirmed=True),
+])
+def test_hot_connection_queries_use_indexes(seeded, build):
+    if connection.vendor != 'sqlite':
+        pytest.skip("Plan format is checked for SQLite only")
+    plan = build(seeded).explain()
+
+    assert 'USING' in plan and 'INDEX' in plan
+    assert 'SCAN accounts_connections' not in plan
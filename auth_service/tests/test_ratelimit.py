@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts import ratelimit
+from accounts.ratelimit import MemoryRateLimiter, client_ip, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit('username:5/m') == ('username', 5, 60)
+    assert parse_limit('ip:100/h') == ('ip', 100, 3600)
+    for value in ('username:5/min', 'ip:5/month', 'ip:5/', 'ip:5', 'host:5/m'):
+        with pytest.raises(ImproperlyConfigured):
+            parse_limit(value)
+
+
+def test_client_ip_trusts_forwarded_for_only_from_proxies(settings):
+    settings.RATE_LIMIT_TRUSTED_PROXIES = ['10.0.0.0/8']
+    factory = RequestFactory()
+
+    def ip(remote, forwarded=None):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded} if forwarded else {}
+        return client_ip(factory.get('/', REMOTE_ADDR=remote, **extra))
+
+    assert ip('203.0.113.5') == '203.0.113.5'
+    # Клиент не может подставить себе адрес заголовком
+    assert ip('203.0.113.5', '198.51.100.1') == '203.0.113.5'
+    # Левые значения мог дописать сам клиент, берем последний недоверенный
+    assert ip('10.0.0.2', '198.51.100.1, 203.0.113.5, 10.0.0.3') == '203.0.113.5'
+    assert ip('10.0.0.2') == '10.0.0.2'
+
+
+def test_sliding_window_counts_part_of_previous_window(settings):
+    limiter = MemoryRateLimiter()
+    for _ in range(10):
+        limiter.hit([('key', 60)], now=60 * 100 + 30)
+
+    # Половина следующего окна прошла: учитывается половина прошлых запросов
+    assert limiter.hit([('key', 60)], now=60 * 101 + 30) == [6]
+    # Через окно прошлые запросы уже не влияют
+    assert limiter.hit([('key', 60)], now=60 * 103) == [1]
+
+
+@pytest.mark.django_db
+def test_login_is_limited_per_username_before_hashing(user, settings, django_assert_num_queries, monkeypatch):
+    settings.RATE_LIMITS = {'login': ('ip:100/m', 'username:3/m')}
+    client = APIClient()
+    for _ in range(3):
+        response = client.post(reverse('login'), {"username": user.username.upper(), "password": "wrong"}, format='json')
+        assert response.status_code == 400
+
+    monkeypatch.setattr('accounts.serializers.authenticate', lambda **kwargs: pytest.fail("password was checked"))
+    with django_assert_num_queries(0):
+        response = client.post(reverse('login'), {"username": user.username, "password": "password123"}, format='json')
+
+    assert response.status_code == 429
+    assert 1 <= int(response['Retry-After']) <= 120
+    monkeypatch.undo()
+    # Другой пользователь с того же адреса проходит
+    response = client.post(reverse('login'), {"username": "other", "password": "x"}, format='json')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_register_is_limited_per_ip(settings):
+    settings.RATE_LIMITS = {'register': ('ip:2/m',)}
+    client = APIClient()
+    statuses = [
+        client.post(reverse('register'), {"username": f"new{i}", "email": f"new{i}@example.com"},
+                    format='json', REMOTE_ADDR='10.0.0.1').status_code
+        for i in range(3)
+    ]
+    assert statuses[-1] == 429 and 429 not in statuses[:-1]
+    assert client.post(reverse('register'), {}, format='json', REMOTE_ADDR='10.0.0.2').status_code == 400
+
+
+@pytest.mark.django_db
+def test_disabled_or_unlisted_routes_are_not_limited(user, settings):
+    settings.RATE_LIMITS = {'login': ('ip:1/m',)}
+    settings.RATE_LIMIT_ENABLED = False
+    client = APIClient()
+    for _ in range(3):
+        assert client.post(reverse('login'), {"username": user.username, "password": "wrong"}).status_code == 400
+    settings.RATE_LIMIT_ENABLED = True
+    assert client.get(reverse('presence'), {"ids": "1"}).status_code != 429
+    assert ratelimit.route_limits('presence') == ()
+
+
+@pytest.mark.django_db
+def test_async_chain_checks_limit_in_event_loop(settings, monkeypatch):
+    settings.RATE_LIMITS = {'async_login': ('ip:1/m',)}
+    limiter = MemoryRateLimiter()
+    hits = []
+
+    async def ahit(buckets, now=None):
+        # Вызов из event loop, а не из потока sync_to_async
+        hits.append(asyncio.get_running_loop())
+        return limiter.hit(buckets, now)
+
+    monkeypatch.setattr(limiter, 'ahit', ahit)
+    monkeypatch.setattr(ratelimit, 'rate_limiter', lambda: limiter)
+    post = async_to_sync(AsyncClient().post)
+    data = {"username": "nobody", "password": "wrong"}
+
+    assert post(reverse('async_login'), data, content_type='application/json').status_code == 400
+    response = post(reverse('async_login'), data, content_type='application/json')
+    assert response.status_code == 429
+    assert len(hits) == 2
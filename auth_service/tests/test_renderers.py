@@ -0,0 +1,69 @@
+import datetime
+import decimal
+import io
+import json
+import uuid
+
+import pytest
+from django.utils import timezone
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Connections, CustomUser, Profile
+from accounts.renderers import ORJSONParser, ORJSONRenderer
+from accounts.serializers import ContactReadSerializer, ContactSerializer, ProfileReadSerializer, ProfileSerializer
+
+
+def test_orjson_renderer_matches_json_renderer():
+    data = {
+        'created': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'birthday': datetime.date(1990, 1, 2),
+        'amount': decimal.Decimal('1.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'error': ErrorDetail('invalid', code='invalid'),
+        'items': [{'id': 1, 'name': 'Имя'}],
+        'empty': None,
+    }
+    assert json.loads(ORJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+    assert ORJSONRenderer().render(None) == b''
+
+
+def test_orjson_parser():
+    assert ORJSONParser().parse(io.BytesIO('{"name": "Имя", "ids": [1, 2]}'.encode())) == {
+        'name': 'Имя', 'ids': [1, 2]
+    }
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b'{broken'))
+
+
+def test_msgpack_roundtrip():
+    msgpack = pytest.importorskip('msgpack')
+    from accounts.renderers import MessagePackParser, MessagePackRenderer
+
+    payload = MessagePackRenderer().render({'ids': [1, 2], 'when': datetime.date(2024, 1, 1)})
+    assert msgpack.unpackb(payload) == {'ids': [1, 2], 'when': '2024-01-01'}
+    assert MessagePackParser().parse(io.BytesIO(payload)) == {'ids': [1, 2], 'when': '2024-01-01'}
+
+
+@pytest.mark.django_db
+def test_read_serializers_match_model_serializers():
+    user = CustomUser.objects.create(username="reader", email="reader@example.com", first_name="Read")
+    other = CustomUser.objects.create(username="other", email="other@example.com", last_name="Other")
+    Connections.objects.create(from_user=user, to_user=other, is_confirmed=True)
+    Connections.objects.create(from_user=other, to_user=user, is_confirmed=True)
+    Profile.objects.filter(user=user).update(
+        bio="bio", avatar="avatars/ab/abc.png", birthday=datetime.date(1990, 1, 2), last_seen=timezone.now()
+    )
+
+    request = APIRequestFactory().get('/')
+    request.user = user
+    connections = Connections.objects.order_by('id')
+    assert ContactReadSerializer(
+        ContactReadSerializer.get_queryset(connections), many=True, context={'request': request}
+    ).data == ContactSerializer(connections, many=True, context={'request': request}).data
+
+    row = ProfileReadSerializer.get_queryset(Profile.objects.filter(user=user)).get()
+    data = ProfileReadSerializer(row, context={'request': request}).data
+    assert data == ProfileSerializer(Profile.objects.get(user=user), context={'request': request}).data
+    assert data['avatar'].startswith('http://testserver/')
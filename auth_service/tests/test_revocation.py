@@ -0,0 +1,72 @@
+import pytest
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from accounts.revocation import revocation_list
+from accounts.tokens import RefreshToken
+
+
+@pytest.fixture(autouse=True)
+def clean_revocation_list():
+    revocation_list.clear()
+
+
+@pytest.mark.django_db
+def test_blacklist_check_skips_database(user, django_assert_num_queries):
+    refresh = str(RefreshToken.for_user(user))
+    RefreshToken(refresh).blacklist()
+
+    with django_assert_num_queries(0):
+        with pytest.raises(TokenError):
+            RefreshToken(refresh)
+
+
+@pytest.mark.django_db
+def test_revocations_from_other_workers_are_synced(user):
+    refresh = RefreshToken.for_user(user)
+    revocation_list.sync()
+    BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+
+    revocation_list.sync()
+
+    assert revocation_list.contains(refresh['jti'])
+
+
+@pytest.mark.django_db
+def test_late_committed_revocation_with_lower_id_is_synced(user):
+    early, late = RefreshToken.for_user(user), RefreshToken.for_user(user)
+    # Строка с большим id закоммичена и прочитана раньше, чем строка с меньшим
+    BlacklistedToken.objects.create(id=100, token=OutstandingToken.objects.get(jti=early['jti']))
+    revocation_list.sync()
+    BlacklistedToken.objects.create(id=50, token=OutstandingToken.objects.get(jti=late['jti']))
+
+    revocation_list.sync()
+
+    assert revocation_list.contains(late['jti'])
+
+
+@pytest.mark.django_db
+def test_rotated_refresh_token_is_rejected(user):
+    client = APIClient()
+    refresh = str(RefreshToken.for_user(user))
+
+    assert client.post(reverse('token_refresh'), {"refresh": refresh}, format='json').status_code == 200
+    assert client.post(reverse('token_refresh'), {"refresh": refresh}, format='json').status_code == 401
+
+
+@pytest.mark.django_db
+def test_prune_tokens_deletes_only_expired(user):
+    now = timezone.now()
+    expired = OutstandingToken.objects.create(user=user, jti="expired", token="x", expires_at=now - timedelta(days=1))
+    BlacklistedToken.objects.create(token=expired)
+    OutstandingToken.objects.create(user=user, jti="alive", token="y", expires_at=now + timedelta(days=1))
+
+    call_command('prune_tokens', '--chunk-size', '1', stdout=StringIO())
+
+    assert list(OutstandingToken.objects.values_list('jti', flat=True)) == ["alive"]
+    assert not BlacklistedToken.objects.exists()
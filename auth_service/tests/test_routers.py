@@ -0,0 +1,66 @@
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from accounts.models import CustomUser
+from accounts.routers import DatabaseRoutingMiddleware, PrimaryReplicaRouter, read_from_replica
+from accounts.tokens import AccessToken
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = REPLICAS
+    cache.clear()
+
+
+def routed_read(request, status=200):
+    """Прогнать запрос через middleware и вернуть базу, которую роутер выбрал для чтения внутри него"""
+    chosen = []
+
+    def view(request):
+        router = PrimaryReplicaRouter()
+        chosen.extend(router.db_for_read(CustomUser) for _ in range(20))
+        return HttpResponse(status=status)
+
+    DatabaseRoutingMiddleware(view)(request)
+    # Все чтения одного запроса идут в одну базу
+    assert len(set(chosen)) == 1
+    return chosen[0]
+
+
+def bearer(user_id):
+    return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(CustomUser(id=user_id))}'}
+
+
+def test_reads_go_to_primary_outside_requests():
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(CustomUser) == 'default'
+    assert router.db_for_write(CustomUser) == 'default'
+    with read_from_replica():
+        assert router.db_for_read(CustomUser) in REPLICAS
+        assert router.db_for_write(CustomUser) == 'default'
+    assert router.allow_migrate('default', 'accounts') and not router.allow_migrate('replica_1', 'accounts')
+
+
+def test_safe_methods_read_from_replicas():
+    factory = RequestFactory()
+    assert routed_read(factory.get('/api/contacts/', **bearer(1))) in REPLICAS
+    assert routed_read(factory.post('/api/contacts/', **bearer(1))) == 'default'
+
+
+def test_read_your_writes_after_successful_write():
+    factory = RequestFactory()
+    routed_read(factory.post('/api/contacts/', **bearer(1)), status=400)
+    assert routed_read(factory.get('/api/contacts/', **bearer(1))) in REPLICAS
+
+    routed_read(factory.post('/api/contacts/', **bearer(1)), status=201)
+    assert routed_read(factory.get('/api/contacts/', **bearer(1))) == 'default'
+    # Другие пользователи по-прежнему читают с реплик
+    assert routed_read(factory.get('/api/contacts/', **bearer(2))) in REPLICAS
+
+
+def test_without_replicas_everything_uses_primary(settings):
+    settings.DATABASE_REPLICAS = []
+    assert routed_read(RequestFactory().get('/api/contacts/', **bearer(1))) == 'default'
@@ -0,0 +1,117 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from accounts.models import Connections, CustomUser
+from accounts.rpc import protocol
+from accounts.rpc.client import RPCClient
+from accounts.rpc.server import RPCServer, dispatch
+from accounts.tokens import AccessToken
+
+SECRET = "test-service-secret"
+
+
+@pytest.fixture
+def rpc_address():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(RPCServer(workers=2, secret=SECRET).start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield '127.0.0.1', server.sockets[0].getsockname()[1]
+
+    async def shutdown():
+        server.close()
+        await server.wait_closed()
+        # Дожидаемся обработчиков соединений, которые клиент только что закрыл
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+@pytest.fixture
+def rpc_server(rpc_address):
+    client = RPCClient(*rpc_address, SECRET, pool_size=2)
+    yield client
+    client.close()
+
+
+def test_frame_roundtrip():
+    frame = protocol.encode_frame(7, protocol.GET_USERS, {"ids": [1, 2]})
+    length, request_id, code = protocol.decode_header(frame[:protocol.HEADER.size])
+    assert (request_id, code) == (7, protocol.GET_USERS)
+    assert protocol.decode_body(frame[protocol.HEADER.size:protocol.HEADER.size + length]) == {"ids": [1, 2]}
+
+
+def test_oversized_frame_is_rejected():
+    header = protocol.HEADER.pack(protocol.MAX_FRAME_SIZE + 1, 1, protocol.GET_USERS)
+    with pytest.raises(protocol.ProtocolError):
+        protocol.decode_header(header)
+
+
+def test_dispatch_reports_bad_requests():
+    assert dispatch(99, {}) == (protocol.ERROR, {"error": "Unknown method 99"})
+    status, body = dispatch(protocol.CHECK_CONNECTION, {"user_id": 1})
+    assert status == protocol.ERROR
+
+
+@pytest.mark.django_db
+def test_validate_token():
+    cache.clear()
+    user = CustomUser.objects.create(username="rpc", email="rpc@example.com")
+    token = AccessToken.for_user(user)
+
+    status, body = dispatch(protocol.VALIDATE_TOKEN, {"token": str(token)})
+    assert status == protocol.OK
+    assert body == {"valid": True, "user_id": user.pk, "exp": token["exp"]}
+
+    status, body = dispatch(protocol.VALIDATE_TOKEN, {"token": "garbage"})
+    assert status == protocol.OK
+    assert body["valid"] is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_client_server_roundtrip(rpc_server):
+    cache.clear()
+    first = CustomUser.objects.create(username="rpc1", email="rpc1@example.com", first_name="First")
+    second = CustomUser.objects.create(username="rpc2", email="rpc2@example.com")
+    Connections.objects.create(from_user=first, to_user=second, is_confirmed=True)
+
+    users = rpc_server.get_users([first.pk, second.pk, 999999])
+    assert set(users) == {str(first.pk), str(second.pk)}
+    assert users[str(first.pk)]["first_name"] == "First"
+
+    assert rpc_server.check_connection(first.pk, second.pk) is True
+    assert rpc_server.validate_token(str(AccessToken.for_user(first)))["user_id"] == first.pk
+
+    with pytest.raises(protocol.RPCError):
+        rpc_server.call(protocol.GET_USERS, {})
+
+
+def test_server_requires_service_secret(settings):
+    settings.SERVICE_TOKEN = None
+    with pytest.raises(ImproperlyConfigured):
+        RPCServer(workers=1)
+
+
+def test_connection_without_auth_is_rejected(rpc_address):
+    with socket.create_connection(rpc_address, timeout=2) as sock:
+        sock.sendall(protocol.encode_frame(1, protocol.GET_USERS, {"ids": [1]}))
+        header = sock.recv(protocol.HEADER.size)
+        length, request_id, status = protocol.decode_header(header)
+        assert status == protocol.ERROR
+        sock.recv(length)
+        # После отказа сервер закрывает соединение
+        assert sock.recv(1) == b''
+
+
+def test_wrong_secret_is_rejected(rpc_address):
+    client = RPCClient(*rpc_address, "wrong", pool_size=1)
+    with pytest.raises(protocol.RPCError, match="Authentication failed"):
+        client.get_users([1])
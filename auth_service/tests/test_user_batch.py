@@ -0,0 +1,52 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+
+
+@pytest.fixture
+def users():
+    cache.clear()
+    return [
+        CustomUser.objects.create(username=f"batch{i}", email=f"batch{i}@example.com", first_name=f"User{i}")
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+def test_batch_resolves_users_in_one_query(users, service_client, django_assert_num_queries):
+    ids = [user.pk for user in users] + [999999]
+
+    with django_assert_num_queries(1):
+        response = service_client.post(reverse('user_batch'), {"ids": ids}, format='json')
+
+    assert response.status_code == 200
+    assert set(response.data) == {str(user.pk) for user in users}
+    assert response.data[str(users[1].pk)] == {
+        "id": users[1].pk, "username": "batch1", "first_name": "User1", "last_name": "", "avatar": None,
+    }
+
+    with django_assert_num_queries(0):
+        service_client.get(reverse('user_batch'), {"ids": ",".join(str(user.pk) for user in users[:3])})
+
+
+@pytest.mark.django_db
+def test_batch_cache_is_invalidated_on_save(users, service_client, django_capture_on_commit_callbacks):
+    service_client.get(reverse('user_batch'), {"ids": str(users[1].pk)})
+
+    with django_capture_on_commit_callbacks(execute=True):
+        users[1].first_name = "Renamed"
+        users[1].save()
+
+    response = service_client.get(reverse('user_batch'), {"ids": str(users[1].pk)})
+    assert response.data[str(users[1].pk)]["first_name"] == "Renamed"
+
+
+@pytest.mark.django_db
+def test_batch_is_only_for_services(users, settings):
+    settings.SERVICE_TOKEN = 'internal-secret'
+    client = APIClient()
+    client.force_authenticate(user=users[0])
+
+    assert client.get(reverse('user_batch'), {"ids": str(users[1].pk)}).status_code == 403
@@ -0,0 +1,70 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import CustomUser
+from accounts.search import _search_fts5, _search_prefix, search_cache
+
+
+@pytest.fixture
+def users():
+    search_cache.clear()
+    return [
+        CustomUser.objects.create(username="ivan_petrov", email="ivan@example.com", first_name="Ivan", last_name="Petrov"),
+        CustomUser.objects.create(username="maria", email="m.ivanova@example.com", first_name="Maria", last_name="Ivanova"),
+        CustomUser.objects.create(username="oleg", email="oleg@example.com", first_name="Oleg", last_name="Smirnov"),
+        CustomUser.objects.create(username="ivor", email="ivor@example.com", is_active=False),
+        CustomUser.objects.create(username="rene", email="rene@example.org", first_name="René"),
+    ]
+
+
+def search(user, **params):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client.get(reverse('user_search'), params)
+
+
+@pytest.mark.django_db
+def test_search_matches_prefixes_of_all_fields(users):
+    response = search(users[0], q="iva")
+
+    assert response.status_code == 200
+    assert {item["username"] for item in response.data["results"]} == {"ivan_petrov", "maria"}
+    assert set(response.data["results"][0]) == {"id", "username", "first_name", "last_name"}
+
+
+@pytest.mark.django_db
+def test_search_requires_every_term(users):
+    response = search(users[0], q="maria iv")
+
+    assert [item["username"] for item in response.data["results"]] == ["maria"]
+
+
+@pytest.mark.django_db
+def test_search_index_follows_updates(users):
+    users[2].last_name = "Kuznetsov"
+    users[2].save()
+
+    assert [item["username"] for item in search(users[0], q="kuzn").data["results"]] == ["oleg"]
+    assert search(users[0], q="smirn").data["results"] == []
+
+
+@pytest.mark.django_db
+def test_popular_prefix_is_cached(users, django_assert_num_queries):
+    search(users[0], q="ole")
+
+    with django_assert_num_queries(0):
+        assert len(search(users[0], q="ole").data["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_short_query_returns_nothing(users):
+    assert search(users[0], q="i").data["results"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('terms', [
+    ('iva',), ('maria', 'iv'), ('petr',), ('example',), ('ivan_p',), ('m',), ('ren',), ('rené',), ('ivor',),
+])
+def test_fts5_and_prefix_search_agree(users, terms):
+    # Индекс SQLite и istartswith PostgreSQL: совпадает только начало поля
+    assert _search_fts5(terms, 20) == _search_prefix(terms, 20)
@@ -0,0 +1,4 @@
+"""
+Код, общий для всех сервисов. Каталог лежит в корне репозитория: settings.py
+каждого сервиса добавляет корень в sys.path, в Docker он копируется в /app/common.
+"""
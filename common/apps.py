@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    name = 'common'
+
+    def ready(self):
+        # Обработчик connection_created должен быть подключен до первого соединения с базой
+        import common.metrics
@@ -0,0 +1,12 @@
+import hmac
+
+from django.conf import settings
+
+
+def has_service_token(request):
+    """Запрос другого сервиса: Authorization: Bearer <SERVICE_TOKEN>"""
+    token = getattr(settings, 'SERVICE_TOKEN', None)
+    if not token:
+        return False
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
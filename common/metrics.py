@@ -0,0 +1,223 @@
+"""
+Метрики запросов в формате Prometheus: задержка и размер ответа по маршрутам,
+число и время SQL-запросов на запрос, попадания в кэши. Эндпоинт — metrics_view.
+
+Общий для всех сервисов: подключается приложением 'common' в INSTALLED_APPS,
+MetricsMiddleware в MIDDLEWARE и metrics_view в urls.py. Значения хранятся
+в памяти процесса, каждый воркер отдает свои. Отдаются только по SERVICE_TOKEN
+(в DEBUG без токена — всем).
+"""
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from .auth import has_service_token
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SLOW_SQL_LIMIT = 100  # Сколько SQL-запросов сохранять для лога медленного запроса
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def format_labels(self, values, extra=()):
+        pairs = [*zip(self.labelnames, values), *extra]
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self.render_value(labels, value) for labels, value in items)
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render_value(self, labels, value):
+        return f'{self.name}{self.format_labels(labels)} {value}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels, value):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Накопленные счетчики по границам, сумма, общее число
+                state = self._values[labels] = [[0] * len(self.buckets), 0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render_value(self, labels, value):
+        counts, total, count = value
+        lines = [
+            f'{self.name}_bucket{self.format_labels(labels, [("le", bound)])} {bucket_count}'
+            for bound, bucket_count in zip(self.buckets, counts)
+        ]
+        lines.append(f'{self.name}_bucket{self.format_labels(labels, [("le", "+Inf")])} {count}')
+        lines.append(f'{self.name}_sum{self.format_labels(labels)} {total}')
+        lines.append(f'{self.name}_count{self.format_labels(labels)} {count}')
+        return '\n'.join(lines)
+
+
+requests_total = Counter('http_requests_total', 'HTTP requests.', ('method', 'route', 'status'))
+request_duration = Histogram('http_request_duration_seconds', 'HTTP request latency.', ('method', 'route'))
+response_size = Histogram('http_response_size_bytes', 'HTTP response body size.', ('route',), SIZE_BUCKETS)
+db_queries = Histogram('db_queries_per_request', 'SQL queries per HTTP request.', ('route',), QUERY_BUCKETS)
+db_time = Counter('db_query_duration_seconds_total', 'Time spent in SQL queries.', ('route',))
+cache_requests = Counter('cache_requests_total', 'Cache lookups by result.', ('cache', 'result'))
+
+REGISTRY = [requests_total, request_duration, response_size, db_queries, db_time, cache_requests]
+
+
+def record_cache(name, hits=0, misses=0):
+    """Учесть обращения к кэшу: hit ratio = hits / (hits + misses). Приложения вызывают через свои хуки"""
+    if hits:
+        cache_requests.inc((name, 'hit'), hits)
+    if misses:
+        cache_requests.inc((name, 'miss'), misses)
+
+
+class RequestStats:
+    """SQL-запросы текущего HTTP-запроса"""
+    __slots__ = ('queries', 'query_time', 'statements')
+
+    def __init__(self, capture_sql):
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = [] if capture_sql else None
+
+
+# ContextVar переходит вместе с запросом в потоки sync_to_async, поэтому
+# запросы к базе из async-представлений тоже попадают в статистику запроса
+_request_stats = ContextVar('request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_time += time.perf_counter() - started
+        if stats.statements is not None and len(stats.statements) < SLOW_SQL_LIMIT:
+            stats.statements.append(sql)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Сигнал приходит при каждом переподключении, а список обработчиков у соединения один
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """
+    Записывает метрики каждого запроса. Должен стоять первым в MIDDLEWARE,
+    чтобы учитывать время и запросы к базе остальных middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats = RequestStats(capture_sql=settings.METRICS_SLOW_REQUEST_MS is not None)
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats(capture_sql=settings.METRICS_SLOW_REQUEST_MS is not None)
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        # Шаблон маршрута, а не путь: иначе каждый id давал бы свой ряд
+        match = request.resolver_match
+        route = match.route if match else 'unmatched'
+
+        requests_total.inc((request.method, route, str(response.status_code)))
+        request_duration.observe((request.method, route), elapsed)
+        db_queries.observe((route,), stats.queries)
+        db_time.inc((route,), stats.query_time)
+        if not response.streaming:
+            response_size.observe((route,), len(response.content))
+
+        if stats.statements is not None and elapsed * 1000 >= settings.METRICS_SLOW_REQUEST_MS:
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d queries (%.1f ms)\n%s",
+                request.method, request.get_full_path(), elapsed * 1000,
+                stats.queries, stats.query_time * 1000, '\n'.join(stats.statements),
+            )
+
+
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus"""
+    if not has_service_token(request) and not (settings.DEBUG and not getattr(settings, 'SERVICE_TOKEN', None)):
+        return HttpResponse(status=403)
+    body = '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
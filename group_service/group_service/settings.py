@@ -10,11 +10,16 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код сервисов (common/) лежит в корне репозитория, в Docker — в /app/common
+sys.path.append(str(BASE_DIR.parent))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -37,9 +42,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
+    'common',
 ]
 
 MIDDLEWARE = [
+    'common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +85,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения, по одному на поток (не пул)
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -121,3 +132,31 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Токены выдает auth_service: подпись проверяется локально по его публичным ключам (JWKS),
+# ключи кэшируются, так что запросы не ходят в auth_service
+AUTH_SERVICE_JWKS_URL = os.environ.get('AUTH_SERVICE_JWKS_URL',
+                                       'http://auth-service:8000/.well-known/jwks.json')
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
+    ),
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+}
+
+SIMPLE_JWT = {
+    'ALGORITHM': 'RS256',
+    'JWK_URL': AUTH_SERVICE_JWKS_URL,
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+
+
+# Общий секрет внутренних сервисов: с ним сборщик метрик читает /metrics
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN')
+
+
+# Метрики запросов в формате Prometheus на /metrics (см. common.metrics), доступ по SERVICE_TOKEN
+METRICS_SLOW_REQUEST_MS = None                  # Логировать запросы дольше стольких мс вместе с SQL; None — выключено